@@ -0,0 +1,104 @@
+"""
+Compare the HTTP/1.1 and HTTP/2 transports against a local h2c mock backend.
+
+The mock serves ``POST /api/chats/{chat_id}/completions`` with a fixed delay and
+records the client address of every request, so the number of distinct
+connections each transport opened can be reported next to its latency.
+
+Requires ``hypercorn`` and ``httpx[http2]``:
+
+    python benchmarks/http2_transport.py --concurrency 200 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+
+from chatbot_client.client import ChatbotClient
+from chatbot_client.transport import RequestsTransport, HTTP2Transport
+
+class MockBackend:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.peers = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.peers.add(tuple(scope["client"]))
+        while (await receive()).get("more_body"):
+            pass
+        await asyncio.sleep(self.delay)
+        body = json.dumps({"assistantMessage": "pong", "totalTokens": 1}).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+def start_backend(app: MockBackend, port: int) -> threading.Event:
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.loglevel = "WARNING"
+    stop = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        async def shutdown_trigger():
+            while not stop.is_set():
+                await asyncio.sleep(0.05)
+        loop.run_until_complete(serve(app, config, shutdown_trigger=shutdown_trigger))
+
+    threading.Thread(target=run, daemon=True).start()
+    time.sleep(0.5)
+    return stop
+
+def run_load(client: ChatbotClient, concurrency: int, total: int):
+    def one(i):
+        start = time.perf_counter()
+        client.chat_completion(f"chat-{i % 50}", "ping")
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one, range(total)))
+    return time.perf_counter() - started, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--delay", type=float, default=0.05, help="Mock completion latency in seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    app = MockBackend(args.delay)
+    stop = start_backend(app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    transports = {
+        "http/1.1": RequestsTransport(pool_maxsize=args.concurrency),
+        "http/2": HTTP2Transport(max_connections=4, http1=False),
+    }
+    try:
+        for name, transport in transports.items():
+            app.peers.clear()
+            client = ChatbotClient(base_url, transport=transport)
+            elapsed, latencies = run_load(client, args.concurrency, args.requests)
+            client.close()
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            print(f"{name:9} connections={len(app.peers):4d} "
+                  f"throughput={args.requests / elapsed:8.1f} req/s "
+                  f"p50={statistics.median(latencies) * 1000:7.1f} ms p95={p95 * 1000:7.1f} ms")
+    finally:
+        stop.set()
+
+if __name__ == "__main__":
+    main()
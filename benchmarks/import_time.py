@@ -0,0 +1,83 @@
+"""
+Import-time regression check for the chatbot_client package.
+
+Each scenario runs in a fresh interpreter a number of times. The median wall
+time of the import is compared with its budget, and the modules a scenario must
+not load (requests and Pydantic for callers that only need ChatbotClient; the
+default transport imports requests when it is created) are checked too.
+With --profile the slowest modules from ``python -X importtime`` are listed.
+
+    python benchmarks/import_time.py --runs 15 --profile
+
+Exits with status 1 when a budget is exceeded or a forbidden module is loaded.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# name -> (statement, budget in ms, modules that must not be imported)
+SCENARIOS = {
+    "package": ("import chatbot_client", 15.0, ("requests", "pydantic", "chatbot_client.client")),
+    "client": ("import chatbot_client; chatbot_client.ChatbotClient", 60.0,
+               ("requests", "pydantic", "chatbot_client.models")),
+    "models": ("import chatbot_client.models", 400.0, ()),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+def measure(statement: str, runs: int):
+    timings, modules = [], set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(statement=statement)], cwd=ROOT,
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        timings.append(result["ms"])
+        modules.update(result["modules"])
+    return statistics.median(timings), modules
+
+def profile(statement: str, top: int):
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    for self_us, cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"    {self_us / 1000:7.2f} ms self {cumulative_us / 1000:8.2f} ms cumulative  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=9)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. for slow CI runners")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    failed = False
+    for name, (statement, budget, forbidden) in SCENARIOS.items():
+        median, modules = measure(statement, args.runs)
+        budget *= args.scale
+        loaded = [module for module in forbidden if module in modules]
+        status = "ok" if median <= budget and not loaded else "FAIL"
+        failed |= status == "FAIL"
+        print(f"{name:8} {median:7.2f} ms (budget {budget:.0f} ms) {status}"
+              + (f" loaded {', '.join(loaded)}" if loaded else ""))
+        if args.profile:
+            profile(statement, args.top)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
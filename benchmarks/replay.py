@@ -0,0 +1,106 @@
+"""
+Replay a recorded session through ChatbotClient, without network, to measure client overhead.
+
+Record a session first, e.g. by running ``server.py`` with
+``CHATBOT_RECORD=session.jsonl.gz`` and using the UI. Every recorded request
+is then sent again through ``ChatbotClient._make_request`` (streamed
+responses are read to the end) against a ``ReplayTransport``. With the
+default ``--scale 0`` the numbers are pure client time: request building,
+decoding, JSON parsing, scheduling. With --profile the hottest functions from
+cProfile are listed. Only requests that failed when recorded may fail when
+replayed; any other failure is reported and makes the script exit non-zero.
+
+    python benchmarks/replay.py session.jsonl.gz --repeat 20 --concurrency 8 --profile
+"""
+import argparse
+import cProfile
+import json
+import pstats
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot_client.client import ChatbotClient
+from chatbot_client.recording import ReplayTransport
+
+def replay_call(client: ChatbotClient, exchange: dict) -> Tuple[float, Optional[str]]:
+    """Time one recorded request. Returns the latency and, for a failure that was not recorded, its error."""
+    # Paging and filters are part of the URL; it is replayed as recorded, i.e. already scrubbed
+    url = urlsplit(exchange["url"])
+    endpoint = f"{url.path}?{url.query}" if url.query else url.path
+    kwargs = {"params": exchange.get("params") or None}
+    body = exchange.get("body")
+    if body is not None:
+        try:
+            kwargs["json"] = json.loads(body)
+        except ValueError:
+            kwargs["data"] = body.encode("utf-8")
+    streamed = len(exchange.get("chunks", ())) > 1
+    error = None
+    start = time.perf_counter()
+    try:
+        if streamed:
+            response = client._make_request(exchange["method"], endpoint, stream=True, **kwargs)
+            try:
+                for _ in response.iter_bytes():
+                    pass
+            finally:
+                response.close()
+        else:
+            client._make_request(exchange["method"], endpoint, **kwargs)
+    except Exception as e:
+        # Recorded errors are replayed as errors
+        if exchange["status"] < 400 and "error" not in exchange:
+            error = f"{exchange['method']} {endpoint}: {type(e).__name__}: {e}"
+    return time.perf_counter() - start, error
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recording")
+    parser.add_argument("--scale", type=float, default=0.0, help="Factor applied to recorded latencies")
+    parser.add_argument("--repeat", type=int, default=10, help="Times the whole recording is replayed")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    transport = ReplayTransport(args.recording, latency_scale=args.scale, loop=True)
+    exchanges = [exchange for exchange in transport.exchanges if "status" in exchange]
+    if not exchanges:
+        sys.exit("The recording has no responses")
+    origin = urlsplit(exchanges[0]["url"])
+    client = ChatbotClient(f"{origin.scheme}://{origin.netloc}", transport=transport)
+    calls = exchanges * args.repeat
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda exchange: replay_call(client, exchange), calls))
+    elapsed = time.perf_counter() - started
+    if profiler is not None:
+        profiler.disable()
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = Counter(error for _, error in results if error is not None)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(f"{len(calls)} calls ({len(exchanges)} recorded) in {elapsed:.2f}s: "
+          f"{len(calls) / elapsed:.1f} calls/s p50={statistics.median(latencies) * 1000:.3f} ms "
+          f"p95={p95 * 1000:.3f} ms")
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    if errors:
+        print(f"{sum(errors.values())} calls failed that succeeded when recorded:", file=sys.stderr)
+        for error, count in errors.most_common(10):
+            print(f"  {count}x {error}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
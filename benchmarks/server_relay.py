@@ -0,0 +1,138 @@
+"""
+CPU per chat completion request in server.py, before and after the relay path.
+
+The "before" handler is the previous implementation, mounted next to the real
+endpoint: the client parses the upstream body with the json module, the
+server dumps it again with ``indent=2`` for the log, builds a Pydantic
+``MessageResponse`` and FastAPI serializes that with the stdlib encoder.
+"after" is ``POST /api/chats/{chat_id}/completions`` as it is now. The
+upstream is an in-process transport returning a canned completion, and the
+ASGI app is called directly, so the numbers are server and client CPU only.
+
+Requires fastapi (and orjson for the fast path):
+
+    python benchmarks/server_relay.py --requests 2000 --trace-entries 200
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse
+
+import server
+from chatbot_client import client as client_module
+from chatbot_client.transport import Transport, TransportResponse
+
+class CannedResponse(TransportResponse):
+    def __init__(self, body: bytes):
+        self._body = body
+        self.status_code = 200
+        self.reason = "OK"
+        self.headers = {"Content-Type": "application/json"}
+        self.http_version = "HTTP/1.1"
+
+    def iter_bytes(self, chunk_size: int = None):
+        yield self._body
+
+    def iter_raw(self, chunk_size: int = None):
+        yield self._body
+
+    def close(self) -> None:
+        pass
+
+class CannedTransport(Transport):
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def request(self, method, url, headers=None, params=None, content=None, timeout=None, cancel=None):
+        return CannedResponse(self.body)
+
+def completion_body(message_chars: int, trace_entries: int) -> bytes:
+    return json.dumps({
+        "completionId": "5f0c6a0e-3c55-4f3e-9a55-2f1d2c3b4a5e",
+        "assistantMessage": ("The answer is forty-two. " * (message_chars // 25 + 1))[:message_chars],
+        "promptTokens": 812, "completionTokens": 356, "totalTokens": 1168,
+        "traceLogs": [{"step": i, "name": f"retrieval-{i}", "durationMs": 12.5 * i,
+                       "detail": {"query": "forty two", "score": 0.87, "documents": [f"doc-{i}-{j}" for j in range(5)]}}
+                      for i in range(trace_entries)],
+    }).encode("utf-8")
+
+@server.app.post("/bench/legacy/chats/{chat_id}/completions", response_model=server.MessageResponse,
+                 response_class=JSONResponse)
+async def legacy_chat_completion(chat_id: str, request: server.ChatCompletionRequest):
+    print(f"Sending message to chat ID: {chat_id}")
+    print(f"Message content: {request.message}")
+    response = await server.run_in_threadpool(server.client.chat_completion, chat_id, request.message)
+    print(f"Received full response: {json.dumps(response, indent=2)}")
+    assistant_message = response['assistantMessage']
+    print(f"Extracted assistant message: {assistant_message}")
+    return server.MessageResponse(assistant_message=assistant_message)
+
+async def call(path: str, body: bytes) -> bytes:
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "root_path": "", "headers": [(b"content-type", b"application/json"),
+                                          (b"content-length", str(len(body)).encode())],
+             "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000)}
+    received = False
+    chunks = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await server.app(scope, receive, send)
+    return b"".join(chunks)
+
+async def run(path: str, total: int) -> float:
+    body = json.dumps({"message": "What is the answer?"}).encode()
+    for _ in range(50):  # Warm up
+        await call(path, body)
+    started = time.process_time()
+    for _ in range(total):
+        await call(path, body)
+    return (time.process_time() - started) / total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--message-chars", type=int, default=2000)
+    parser.add_argument("--trace-entries", type=int, default=200)
+    args = parser.parse_args()
+
+    upstream = completion_body(args.message_chars, args.trace_entries)
+    # What the startup hook does when the app is served; the ASGI app is called without lifespan events here
+    server.setup()
+    server.client.transport = CannedTransport(upstream)
+    server.client.scheduler = None
+    fast_loads = client_module.json_loads
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        client_module.json_loads = json.loads
+        results["before"] = asyncio.run(run("/bench/legacy/chats/c1/completions", args.requests))
+        client_module.json_loads = fast_loads
+        results["after"] = asyncio.run(run("/api/chats/c1/completions", args.requests))
+        log.truncate(0)
+        asyncio.run(server.close_client())
+    print(f"upstream body {len(upstream) / 1024:.1f} KiB, orjson {'on' if server.orjson else 'off'}, "
+          f"{args.requests} requests")
+    for name, seconds in results.items():
+        print(f"{name:7} {seconds * 1e6:8.1f} us CPU per request")
+    print(f"speedup {results['before'] / results['after']:.2f}x")
+
+if __name__ == "__main__":
+    main()
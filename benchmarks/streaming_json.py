@@ -0,0 +1,90 @@
+"""
+Time to first item, total time and peak memory of buffered versus streamed parsing of a large page.
+
+A synthetic page of ``--items`` chat entries is served in 64 KiB chunks,
+as a transport would deliver it. "buffered" joins the chunks and parses the
+whole body before the first item can be used (the ``_fetch`` path, with
+orjson when installed, and with the json module); "streamed" is
+``jsonstream.StreamedPage``, which yields every item as soon as it is
+complete. Items are consumed and dropped one at a time, as an export would.
+Peak memory is measured with tracemalloc in a separate run.
+
+    python benchmarks/streaming_json.py --items 100000
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chatbot_client.jsonstream import StreamedPage
+from chatbot_client.utils import json_loads, orjson
+
+CHUNK_SIZE = 64 * 1024
+
+def make_page(count: int) -> bytes:
+    items = [{
+        "chatId": f"3f6c1a2e-{i:08d}-4b1d-9c7e-5a2b8d0f1e3c",
+        "botId": f"bot-{i % 37}",
+        "displayName": f"Question about invoice {i} and the quarterly report",
+        "isFavorite": i % 11 == 0,
+        "createdUtc": "2024-05-17T09:21:44.123Z",
+        "updatedUtc": "2024-05-18T14:02:10.456Z",
+        "completionCount": i % 23,
+        "tags": ["finance", "reports"],
+    } for i in range(count)]
+    return json.dumps({"pageNumber": 1, "pageSize": count, "totalPageCount": 1, "totalItemCount": count,
+                       "hasPrevious": False, "hasNext": False, "items": items}).encode("utf-8")
+
+def chunks(body: bytes):
+    view = memoryview(body)
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield bytes(view[start:start + CHUNK_SIZE])
+
+def buffered(loads):
+    def run(body: bytes):
+        page = loads(b"".join(chunks(body)))
+        for item in page["items"]:
+            yield item
+    return run
+
+def streamed(body: bytes):
+    yield from StreamedPage(chunks(body))
+
+def measure(run, body: bytes):
+    started = time.perf_counter()
+    first = None
+    count = 0
+    for _ in run(body):
+        if first is None:
+            first = time.perf_counter() - started
+        count += 1
+    total = time.perf_counter() - started
+    tracemalloc.start()
+    for _ in run(body):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, first, total, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    body = make_page(args.items)
+    print(f"{args.items} items, {len(body) / 2 ** 20:.1f} MiB body, {CHUNK_SIZE // 1024} KiB chunks")
+    runs = {"buffered (json)": buffered(json.loads)}
+    if orjson is not None:
+        runs["buffered (orjson)"] = buffered(json_loads)
+    runs["streamed"] = streamed
+    for name, run in runs.items():
+        count, first, total, peak = measure(run, body)
+        print(f"{name:18} first item {first * 1000:8.2f} ms  total {total * 1000:8.1f} ms  "
+              f"peak {peak / 2 ** 20:7.1f} MiB  ({count} items)")
+
+if __name__ == "__main__":
+    main()
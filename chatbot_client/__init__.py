@@ -1,7 +1,11 @@
-from .client import ChatbotClient
-from . import admin, chat, bot, cache, statistic, system, user
+import importlib
 from .exceptions import ChatbotClientError
 
+# Submodules and ChatbotClient are imported on first attribute access, so
+# `import chatbot_client` does not pull in requests, Pydantic or unused operations.
+_LAZY_SUBMODULES = frozenset({'admin', 'chat', 'bot', 'cache', 'statistic', 'system', 'user', 'models'})
+_LAZY_ATTRIBUTES = {'ChatbotClient': '.client'}
+
 __all__ = [
     'ChatbotClient',
     'admin',
@@ -12,4 +16,17 @@ __all__ = [
     'system',
     'user',
     'ChatbotClientError',
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        module = importlib.import_module(f'.{name}', __name__)
+    elif name in _LAZY_ATTRIBUTES:
+        module = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = module
+    return module
+
+def __dir__():
+    return sorted(set(globals()) | _LAZY_SUBMODULES | set(_LAZY_ATTRIBUTES))
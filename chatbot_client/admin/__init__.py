@@ -1,4 +1,12 @@
-from . import openai_services
-from . import bots
+import importlib
 
-__all__ = ['openai_services', 'bots']
\ No newline at end of file
+_LAZY_SUBMODULES = frozenset({'openai_services', 'bots', 'bulk_facts', 'sync'})
+
+__all__ = ['openai_services', 'bots', 'bulk_facts', 'sync']
+
+def __getattr__(name):
+    if name not in _LAZY_SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f'.{name}', __name__)
+    globals()[name] = module
+    return module
@@ -1,9 +1,21 @@
-from typing import Callable, Dict, Any, List
+from typing import Callable, Dict, Any, Iterator, List, Optional, Type, TYPE_CHECKING
 from ..exceptions import APIError, ResourceNotFoundError
-from ..models import PagingResult
+from ..endpoints import endpoint
+from ..jsonstream import iter_streamed_items, stream_page
+
+if TYPE_CHECKING:
+    from ..models import PagingResult
+
+_GET_BOTS = endpoint("admin.bots.get_bots")
+_CREATE_BOT = endpoint("admin.bots.create_bot")
+_GET_BOT = endpoint("admin.bots.get_bot")
+_UPDATE_BOT = endpoint("admin.bots.update_bot")
+_DELETE_BOT = endpoint("admin.bots.delete_bot")
+_GET_BOT_FACTS = endpoint("admin.bots.get_bot_facts")
+_CREATE_BOT_FACT = endpoint("admin.bots.create_bot_fact")
 
 def get_bots(make_request: Callable, search_for: str = None, order_by: str = None, 
-             page_number: int = 1, page_size: int = 20) -> PagingResult:
+             page_number: int = 1, page_size: int = 20) -> "PagingResult":
     """
     Retrieve a list of bots.
 
@@ -20,13 +32,8 @@ def get_bots(make_request: Callable, search_for: str = None, order_by: str = Non
     Raises:
         APIError: If the API request fails.
     """
-    params = {
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", "/api/admin/bots", params=params)
+    return make_request(_GET_BOTS.method, _GET_BOTS.url(search_for=search_for, order_by=order_by,
+                                                       page_number=page_number, page_size=page_size))
 
 def create_bot(make_request: Callable, bot_data: Dict[str, Any]) -> str:
     """
@@ -42,7 +49,7 @@ def create_bot(make_request: Callable, bot_data: Dict[str, Any]) -> str:
     Raises:
         APIError: If the API request fails.
     """
-    response = make_request("POST", "/api/admin/bots", json=bot_data)
+    response = make_request(_CREATE_BOT.method, _CREATE_BOT.url(), json=bot_data)
     return response["botId"]
 
 def get_bot(make_request: Callable, bot_id: str) -> Dict[str, Any]:
@@ -61,7 +68,7 @@ def get_bot(make_request: Callable, bot_id: str) -> Dict[str, Any]:
         APIError: If the API request fails.
     """
     try:
-        return make_request("GET", f"/api/admin/bots/{bot_id}")
+        return make_request(_GET_BOT.method, _GET_BOT.url(bot_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Bot", bot_id)
@@ -81,7 +88,7 @@ def update_bot(make_request: Callable, bot_id: str, bot_data: Dict[str, Any]) ->
         APIError: If the API request fails.
     """
     try:
-        make_request("PUT", f"/api/admin/bots/{bot_id}", json=bot_data)
+        make_request(_UPDATE_BOT.method, _UPDATE_BOT.url(bot_id), json=bot_data)
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Bot", bot_id)
@@ -100,14 +107,14 @@ def delete_bot(make_request: Callable, bot_id: str) -> None:
         APIError: If the API request fails.
     """
     try:
-        make_request("DELETE", f"/api/admin/bots/{bot_id}")
+        make_request(_DELETE_BOT.method, _DELETE_BOT.url(bot_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Bot", bot_id)
         raise
 
 def get_bot_facts(make_request: Callable, bot_id: str, search_for: str = None, order_by: str = None, 
-                  page_number: int = 1, page_size: int = 20) -> PagingResult:
+                  page_number: int = 1, page_size: int = 20) -> "PagingResult":
     """
     Retrieve facts for a specific bot.
 
@@ -126,19 +133,48 @@ def get_bot_facts(make_request: Callable, bot_id: str, search_for: str = None, o
         ResourceNotFoundError: If the bot is not found.
         APIError: If the API request fails.
     """
-    params = {
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
     try:
-        return make_request("GET", f"/api/admin/bots/{bot_id}/facts", params=params)
+        return make_request(_GET_BOT_FACTS.method,
+                            _GET_BOT_FACTS.url(bot_id, search_for=search_for, order_by=order_by,
+                                               page_number=page_number, page_size=page_size))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Bot", bot_id)
         raise
 
+def iter_bot_facts(make_request: Callable, bot_id: str, search_for: Optional[str] = None,
+                   order_by: Optional[str] = None, page_size: int = 1000,
+                   item_type: Optional[Type] = None) -> Iterator[Any]:
+    """
+    Iterate over all facts of a bot, each yielded as soon as it is read from the response.
+
+    Each page is decoded while it downloads, so a bot with many thousands of
+    facts is exported without ever holding a full page of them.
+
+    Args:
+        make_request (Callable): Function to make API requests; must support ``stream=True``.
+        bot_id (str): ID of the bot to retrieve facts for.
+        item_type (type, optional): Pydantic model each fact is validated into.
+
+    Yields:
+        Any: Facts in page order.
+
+    Raises:
+        ResourceNotFoundError: If the bot is not found.
+        APIError: If the API request fails.
+    """
+    def open_page(page_number: int):
+        try:
+            return stream_page(make_request, _GET_BOT_FACTS.method,
+                               _GET_BOT_FACTS.url(bot_id, search_for=search_for, order_by=order_by,
+                                                  page_number=page_number, page_size=page_size),
+                               item_type=item_type)
+        except APIError as e:
+            if e.status_code == 404:
+                raise ResourceNotFoundError("Bot", bot_id)
+            raise
+    return iter_streamed_items(open_page)
+
 def create_bot_fact(make_request: Callable, bot_id: str, fact_data: Dict[str, Any]) -> str:
     """
     Create a new fact for a bot.
@@ -156,7 +192,7 @@ def create_bot_fact(make_request: Callable, bot_id: str, fact_data: Dict[str, An
         APIError: If the API request fails.
     """
     try:
-        response = make_request("POST", f"/api/admin/bots/{bot_id}/facts", json=fact_data)
+        response = make_request(_CREATE_BOT_FACT.method, _CREATE_BOT_FACT.url(bot_id), json=fact_data)
         return response["botFactId"]
     except APIError as e:
         if e.status_code == 404:
@@ -0,0 +1,241 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from ..exceptions import ConfigurationError
+from ..paging import iter_items
+from ..retry import is_retryable_unsent, retry_call
+from ..scheduler import BATCH, priority_scope
+from ..utils import json_serial, format_error_message
+from .bots import create_bot_fact, get_bot_facts
+
+class BulkReport:
+    """Counters and throughput of a bulk import or export."""
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.error_path: Optional[str] = None
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self) -> float:
+        """Processed facts per second."""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f"BulkReport(succeeded={self.succeeded}, failed={self.failed}, skipped={self.skipped}, "
+                f"elapsed={self.elapsed:.1f}s, rate={self.rate:.1f}/s, error_path={self.error_path!r})")
+
+class _Checkpoint:
+    """
+    Records which source records are finished so an interrupted import can resume.
+
+    Records complete out of order, so the file stores a watermark below which
+    everything is done plus the finished record numbers above it.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.watermark = 0
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                state = json.load(f)
+            if state.get("source") != self.source:
+                raise ConfigurationError(f"Checkpoint {path} belongs to {state.get('source')}")
+            self.watermark = state["watermark"]
+            self.done = set(state["done"])
+
+    def is_done(self, record: int) -> bool:
+        return record <= self.watermark or record in self.done
+
+    def mark(self, record: int) -> None:
+        self.done.add(record)
+        while self.watermark + 1 in self.done:
+            self.watermark += 1
+            self.done.remove(self.watermark)
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"source": self.source, "watermark": self.watermark, "done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+def read_facts(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Stream facts from a JSONL or CSV file without loading it into memory.
+
+    CSV columns are used as the fact fields as-is.
+
+    Args:
+        path (str): Path to a ``.jsonl``/``.ndjson`` or ``.csv`` file.
+
+    Yields:
+        Tuple[int, Dict[str, Any]]: The 1-based record number and the fact data.
+
+    Raises:
+        ConfigurationError: If the file type is not supported or a line is not valid JSON.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        with open(path, 'r', encoding='utf-8') as f:
+            record = 0
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record += 1
+                try:
+                    yield record, json.loads(line)
+                except json.JSONDecodeError:
+                    raise ConfigurationError(f"Invalid JSON on line {line_number} of {path}")
+    elif extension == ".csv":
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for record, row in enumerate(csv.DictReader(f), 1):
+                yield record, row
+    else:
+        raise ConfigurationError(f"Unsupported fact file type: {path}")
+
+def import_bot_facts(make_request: Callable, bot_id: str, source: str, max_workers: int = 8,
+                     attempts: int = 3, checkpoint_path: Optional[str] = None, error_path: Optional[str] = None,
+                     checkpoint_every: int = 100, progress: Optional[Callable[[BulkReport], None]] = None,
+                     priority: str = BATCH) -> BulkReport:
+    """
+    Create every fact from a JSONL or CSV file with bounded parallelism.
+
+    Facts are read lazily and at most ``2 * max_workers`` are in flight. A
+    failed fact is retried with backoff only when the create cannot have
+    happened (no connection, 408/425/429); other failures, such as a read
+    timeout after the server may have stored it, are not retried. Facts still
+    failing are written to a JSONL error file that can be fed back into this
+    function after checking for ones that were stored after all. With a
+    checkpoint, finished records are skipped when the import is run again.
+    Facts that were in flight when the process died are sent again on resume.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        bot_id (str): ID of the bot to create facts for.
+        source (str): Path to a ``.jsonl`` or ``.csv`` file of facts.
+        max_workers (int, optional): Number of concurrent create calls. Defaults to 8.
+        attempts (int, optional): Attempts per fact. Defaults to 3.
+        checkpoint_path (str, optional): File used to save and resume progress.
+        error_path (str, optional): Where failed facts go. Defaults to ``<source>.errors.jsonl``.
+        checkpoint_every (int, optional): Save the checkpoint and report progress
+            after this many facts. Defaults to 100.
+        progress (Callable[[BulkReport], None], optional): Called with the running report.
+        priority (str, optional): Scheduler class of the requests. Defaults to ``"batch"``.
+
+    Returns:
+        BulkReport: Counts, throughput and the error file path if any fact failed.
+    """
+    report = BulkReport()
+    checkpoint = _Checkpoint(checkpoint_path, source) if checkpoint_path else None
+    error_path = error_path or f"{source}.errors.jsonl"
+    errors_file = None
+    in_flight = {}
+
+    def create(fact):
+        with priority_scope(priority):
+            # Creates are not idempotent: a fact is only sent again if the previous attempt cannot have stored it
+            return retry_call(lambda: create_bot_fact(make_request, bot_id, fact), attempts=attempts,
+                              retry_if=is_retryable_unsent)
+
+    def finish(futures):
+        nonlocal errors_file
+        for future in futures:
+            record, fact = in_flight.pop(future)
+            try:
+                future.result()
+                report.succeeded += 1
+            except Exception as e:
+                report.failed += 1
+                if errors_file is None:
+                    errors_file = open(error_path, 'a', encoding='utf-8')
+                    report.error_path = error_path
+                errors_file.write(json.dumps({"record": record, "fact": fact, "error": format_error_message(e)},
+                                             default=json_serial) + "\n")
+            if checkpoint:
+                checkpoint.mark(record)
+            if report.processed % checkpoint_every == 0:
+                if checkpoint:
+                    checkpoint.save()
+                if progress:
+                    progress(report)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for record, fact in read_facts(source):
+                if checkpoint and checkpoint.is_done(record):
+                    report.skipped += 1
+                    continue
+                in_flight[pool.submit(copy_context().run, create, fact)] = (record, fact)
+                if len(in_flight) >= 2 * max_workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    finish(done)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                finish(done)
+    finally:
+        if checkpoint:
+            checkpoint.save()
+        if errors_file is not None:
+            errors_file.close()
+        report.finished = time.monotonic()
+    if progress:
+        progress(report)
+    return report
+
+def export_bot_facts(make_request: Callable, bot_id: str, destination: str, page_size: int = 100,
+                     max_workers: int = 4, attempts: int = 3, search_for: Optional[str] = None,
+                     priority: str = BATCH) -> BulkReport:
+    """
+    Export every fact of a bot to a JSONL file.
+
+    Pages are fetched concurrently and written in order as they arrive, so
+    memory use is bounded by a few pages regardless of the number of facts.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        bot_id (str): ID of the bot to export facts from.
+        destination (str): Path of the JSONL file to write.
+        page_size (int, optional): Facts per page. Defaults to 100.
+        max_workers (int, optional): Number of pages fetched concurrently. Defaults to 4.
+        attempts (int, optional): Attempts per page. Defaults to 3.
+        search_for (str, optional): Search term for filtering facts.
+        priority (str, optional): Scheduler class of the requests. Defaults to ``"batch"``.
+
+    Returns:
+        BulkReport: Number of facts written and throughput.
+
+    Raises:
+        ResourceNotFoundError: If the bot is not found.
+        APIError: If a page still fails after all attempts.
+    """
+    def fetch_page(page_number: int):
+        return retry_call(lambda: get_bot_facts(make_request, bot_id, search_for=search_for,
+                                                page_number=page_number, page_size=page_size),
+                          attempts=attempts)
+
+    report = BulkReport()
+    try:
+        with open(destination, 'w', encoding='utf-8') as f, priority_scope(priority):
+            for fact in iter_items(fetch_page, max_workers=max_workers):
+                f.write(json.dumps(fact, default=json_serial) + "\n")
+                report.succeeded += 1
+    finally:
+        report.finished = time.monotonic()
+    return report
@@ -1,9 +1,18 @@
-from typing import Callable, List, Dict, Any
+from typing import Callable, List, Dict, Any, TYPE_CHECKING
 from ..exceptions import APIError, ResourceNotFoundError
-from ..models import PagingResult
+from ..endpoints import endpoint
+
+if TYPE_CHECKING:
+    from ..models import PagingResult
+
+_GET_OPENAI_SERVICES = endpoint("admin.openai_services.get_openai_services")
+_CREATE_OPENAI_SERVICE = endpoint("admin.openai_services.create_openai_service")
+_GET_OPENAI_SERVICE = endpoint("admin.openai_services.get_openai_service")
+_UPDATE_OPENAI_SERVICE = endpoint("admin.openai_services.update_openai_service")
+_DELETE_OPENAI_SERVICE = endpoint("admin.openai_services.delete_openai_service")
 
 def get_openai_services(make_request: Callable, search_for: str = None, order_by: str = None, 
-                        page_number: int = 1, page_size: int = 20) -> PagingResult:
+                        page_number: int = 1, page_size: int = 20) -> "PagingResult":
     """
     Retrieve a list of OpenAI services.
 
@@ -20,13 +29,9 @@ def get_openai_services(make_request: Callable, search_for: str = None, order_by
     Raises:
         APIError: If the API request fails.
     """
-    params = {
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", "/api/admin/openAiServices", params=params)
+    return make_request(_GET_OPENAI_SERVICES.method,
+                        _GET_OPENAI_SERVICES.url(search_for=search_for, order_by=order_by,
+                                                 page_number=page_number, page_size=page_size))
 
 def create_openai_service(make_request: Callable, service_data: Dict[str, Any]) -> str:
     """
@@ -42,7 +47,7 @@ def create_openai_service(make_request: Callable, service_data: Dict[str, Any])
     Raises:
         APIError: If the API request fails.
     """
-    response = make_request("POST", "/api/admin/openAiServices", json=service_data)
+    response = make_request(_CREATE_OPENAI_SERVICE.method, _CREATE_OPENAI_SERVICE.url(), json=service_data)
     return response
 
 def get_openai_service(make_request: Callable, service_id: str) -> Dict[str, Any]:
@@ -61,7 +66,7 @@ def get_openai_service(make_request: Callable, service_id: str) -> Dict[str, Any
         APIError: If the API request fails.
     """
     try:
-        return make_request("GET", f"/api/admin/openAiServices/{service_id}")
+        return make_request(_GET_OPENAI_SERVICE.method, _GET_OPENAI_SERVICE.url(service_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("OpenAI Service", service_id)
@@ -81,7 +86,7 @@ def update_openai_service(make_request: Callable, service_id: str, service_data:
         APIError: If the API request fails.
     """
     try:
-        make_request("PUT", f"/api/admin/openAiServices/{service_id}", json=service_data)
+        make_request(_UPDATE_OPENAI_SERVICE.method, _UPDATE_OPENAI_SERVICE.url(service_id), json=service_data)
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("OpenAI Service", service_id)
@@ -100,7 +105,7 @@ def delete_openai_service(make_request: Callable, service_id: str) -> None:
         APIError: If the API request fails.
     """
     try:
-        make_request("DELETE", f"/api/admin/openAiService/{service_id}")
+        make_request(_DELETE_OPENAI_SERVICE.method, _DELETE_OPENAI_SERVICE.url(service_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("OpenAI Service", service_id)
@@ -0,0 +1,382 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import groupby
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from ..exceptions import ConfigurationError, ResourceNotFoundError
+from ..paging import iter_items
+from ..retry import retry_call
+from ..scheduler import BATCH, priority_scope
+from ..utils import format_error_message, load_config
+from . import bots, openai_services
+from .bulk_facts import BulkReport
+
+# Fields the backend maintains itself; never compared and never sent back
+_READ_ONLY = frozenset({"createdUtc", "updatedUtc"})
+# Values of fields whose name contains one of these are masked in plans and reports
+_SECRET_MARKERS = ("key", "secret", "password", "token")
+
+class _Kind:
+    __slots__ = ("section", "label", "id_field", "key", "list", "get", "create", "update", "delete")
+
+    def __init__(self, section: str, label: str, id_field: str, key: str, list_page: Callable,
+                 get: Callable, create: Callable, update: Callable, delete: Callable):
+        self.section = section
+        self.label = label
+        self.id_field = id_field
+        self.key = key
+        self.list = list_page
+        self.get = get
+        self.create = create
+        self.update = update
+        self.delete = delete
+
+# In apply order: services before the bots that may use them, deletes run in reverse
+_KINDS = (
+    _Kind("openaiServices", "OpenAI service", "openAiServiceId", "name", openai_services.get_openai_services,
+          openai_services.get_openai_service, openai_services.create_openai_service,
+          openai_services.update_openai_service, openai_services.delete_openai_service),
+    _Kind("bots", "bot", "botId", "code", bots.get_bots, bots.get_bot, bots.create_bot, bots.update_bot,
+          bots.delete_bot),
+)
+
+def _mask(field: str, value: Any) -> Any:
+    if value is None or not any(marker in field.lower() for marker in _SECRET_MARKERS):
+        return value
+    return "***"
+
+class Change:
+    """One create, update or delete of a bot or OpenAI service."""
+
+    __slots__ = ("section", "action", "key", "entity_id", "fields", "body", "previous")
+
+    def __init__(self, section: str, action: str, key: str, entity_id: Optional[str] = None,
+                 fields: Optional[Dict[str, Tuple[Any, Any]]] = None, body: Optional[Dict[str, Any]] = None,
+                 previous: Optional[Dict[str, Any]] = None):
+        self.section = section
+        self.action = action  # "create", "update" or "delete"
+        self.key = key
+        self.entity_id = entity_id
+        self.fields = fields or {}  # field -> (current value, desired value), only fields that differ
+        self.body = body  # Sent to create or update
+        self.previous = previous  # Entity before the change, used to roll it back
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"section": self.section, "action": self.action, "key": self.key, "id": self.entity_id,
+                "fields": {field: {"from": _mask(field, old), "to": _mask(field, new)}
+                           for field, (old, new) in self.fields.items()}}
+
+    def __repr__(self) -> str:
+        return f"Change({self.action} {self.section} {self.key!r}, fields={sorted(self.fields)})"
+
+class SyncPlan:
+    """The changes that bring the backend to the desired state, and how many entities already match."""
+
+    def __init__(self):
+        self.changes: List[Change] = []
+        self.unchanged = 0
+        self.scanned = 0
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def count(self, action: str) -> int:
+        return sum(1 for change in self.changes if change.action == action)
+
+    def describe(self) -> str:
+        """Human readable diff, one line per entity and one per changed field; secrets are masked."""
+        labels = {kind.section: kind.label for kind in _KINDS}
+        lines = []
+        for change in self.changes:
+            sign = {"create": "+", "update": "~", "delete": "-"}[change.action]
+            lines.append(f"{sign} {labels[change.section]} {change.key}"
+                         + (f" ({change.entity_id})" if change.entity_id else ""))
+            for field, (old, new) in sorted(change.fields.items()):
+                old, new = _mask(field, old), _mask(field, new)
+                if change.action == "create":
+                    lines.append(f"    {field}: {new!r}")
+                elif change.action == "update":
+                    lines.append(f"    {field}: {old!r} -> {new!r}")
+        lines.append(f"{self.count('create')} to create, {self.count('update')} to update, "
+                     f"{self.count('delete')} to delete, {self.unchanged} unchanged")
+        return "\n".join(lines)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"changes": [change.to_json() for change in self.changes], "unchanged": self.unchanged,
+                "scanned": self.scanned}
+
+class SyncReport(BulkReport):
+    """Outcome of ``sync_admin``. ``succeeded`` and ``failed`` count changes; ``skipped`` those never attempted."""
+
+    def __init__(self, plan: SyncPlan, dry_run: bool = False):
+        super().__init__()
+        self.plan = plan
+        self.dry_run = dry_run
+        self.rolled_back = 0
+        self.rollback_failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0
+
+    def __repr__(self) -> str:
+        return (f"SyncReport(changes={len(self.plan)}, unchanged={self.plan.unchanged}, "
+                f"succeeded={self.succeeded}, failed={self.failed}, skipped={self.skipped}, "
+                f"rolled_back={self.rolled_back}, rollback_failed={self.rollback_failed}, "
+                f"dry_run={self.dry_run}, elapsed={self.elapsed:.1f}s)")
+
+def _writable(entity: Dict[str, Any], kind: _Kind) -> Dict[str, Any]:
+    return {field: value for field, value in entity.items() if field not in _READ_ONLY and field != kind.id_field}
+
+def _diff(current: Dict[str, Any], desired: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    # Only fields named in the desired state are managed; anything else the backend has is left alone
+    return {field: (current.get(field), value) for field, value in desired.items()
+            if field not in _READ_ONLY and (field not in current or current[field] != value)}
+
+def _index(entries: List[Dict[str, Any]], kind: _Kind, where: str) -> Dict[str, Dict[str, Any]]:
+    indexed = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get(kind.key) in (None, ""):
+            raise ConfigurationError(f"{where} has a {kind.label} without {kind.key!r}")
+        key = str(entry[kind.key])
+        if key in indexed:
+            raise ConfigurationError(f"{where} has several {kind.label}s with {kind.key} {key!r}")
+        indexed[key] = entry
+    return indexed
+
+def _run(func: Callable, items: List[Any], max_workers: int) -> List[Tuple[Any, Any, Optional[Exception]]]:
+    """Call ``func`` on every item concurrently; return ``(item, result, error)`` in item order."""
+    if not items:
+        return []
+
+    def call(item):
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="admin-sync") as pool:
+        futures = [pool.submit(copy_context().run, call, item) for item in items]
+        return [future.result() for future in futures]
+
+def plan_sync(make_request: Callable, desired: Union[str, Dict[str, Any]], prune: bool = False,
+              keys: Optional[Dict[str, str]] = None, page_size: int = 100, max_workers: int = 8) -> SyncPlan:
+    """
+    Compare the desired bots and OpenAI services with the backend and list the changes needed.
+
+    The desired state has a ``"bots"`` and an ``"openaiServices"`` list; a
+    section that is missing is not managed at all. Entities are matched by a
+    natural key (``code`` for bots, ``name`` for services, see ``keys``)
+    since IDs are assigned by the backend. Only the fields an entry names
+    are compared, so fields left out of the config keep whatever value they
+    have. Both lists are read with concurrent paging. The list endpoints
+    return summaries, so every entity that looks changed or names fields
+    the summary lacks, and every entity to delete, is fetched in full
+    (concurrently) before it is compared; updates and rollbacks are then
+    built from the full entity, never from the summary.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        desired (Union[str, Dict[str, Any]]): Desired state, or the path of a JSON file holding it.
+        prune (bool, optional): Delete entities of a managed section that the desired state
+            does not list. Defaults to False.
+        keys (Dict[str, str], optional): Natural key field per section, overriding the defaults.
+        page_size (int, optional): Entities per page while reading. Defaults to 100.
+        max_workers (int, optional): Concurrent requests. Defaults to 8.
+
+    Returns:
+        SyncPlan: The changes, in apply order.
+
+    Raises:
+        ConfigurationError: If the desired state cannot be loaded, or keys are missing or repeated.
+        APIError: If reading the current state fails.
+    """
+    if isinstance(desired, str):
+        desired = load_config(desired)
+    if not isinstance(desired, dict):
+        raise ConfigurationError("desired state must be an object with 'bots' and/or 'openaiServices'")
+    keys = keys or {}
+    kinds = []
+    for kind in _KINDS:
+        if desired.get(kind.section) is None:
+            continue
+        if keys.get(kind.section):
+            kind = _Kind(kind.section, kind.label, kind.id_field, keys[kind.section], kind.list, kind.get,
+                         kind.create, kind.update, kind.delete)
+        kinds.append((kind, _index(desired[kind.section], kind, f"desired {kind.section}")))
+
+    def fetch(entry: Tuple[_Kind, Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        kind = entry[0]
+        return list(iter_items(lambda page_number: kind.list(make_request, page_number=page_number,
+                                                             page_size=page_size),
+                               max_workers=max_workers))
+
+    plan = SyncPlan()
+    pending_details = []
+    for (kind, wanted), listed, error in _run(fetch, kinds, max_workers):
+        if error is not None:
+            raise error
+        plan.scanned += len(listed)
+        current = _index(listed, kind, f"current {kind.section}")
+        for key, entry in wanted.items():
+            existing = current.get(key)
+            if existing is None:
+                body = dict(entry)
+                plan.changes.append(Change(kind.section, "create", key, body=body,
+                                           fields={field: (None, value) for field, value in body.items()}))
+            elif _diff(existing, entry):
+                pending_details.append((kind, key, existing, entry))
+            else:
+                plan.unchanged += 1
+        if prune:
+            for key, existing in current.items():
+                if key not in wanted:
+                    pending_details.append((kind, key, existing, None))
+
+    def details(item: Tuple[_Kind, str, Dict[str, Any], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        kind, _, existing, _ = item
+        return {**existing, **(kind.get(make_request, existing[kind.id_field]) or {})}
+
+    for (kind, key, existing, entry), detailed, error in _run(details, pending_details, max_workers):
+        if entry is None:
+            if isinstance(error, ResourceNotFoundError):
+                continue  # Deleted meanwhile
+            if error is not None:
+                raise error
+            plan.changes.append(Change(kind.section, "delete", key, entity_id=existing.get(kind.id_field),
+                                       previous=detailed))
+            continue
+        if error is not None:
+            raise error
+        _compare(plan, kind, key, detailed, entry)
+
+    order = {kind.section: position for position, kind in enumerate(_KINDS)}
+    plan.changes.sort(key=lambda change: (change.action == "delete",
+                                          -order[change.section] if change.action == "delete"
+                                          else order[change.section]))
+    return plan
+
+def _compare(plan: SyncPlan, kind: _Kind, key: str, existing: Dict[str, Any], entry: Dict[str, Any]) -> None:
+    fields = _diff(existing, entry)
+    if not fields:
+        plan.unchanged += 1
+        return
+    # Updates replace the entity, so they carry all its current fields (from the full entity) with the desired
+    # ones on top
+    body = {**_writable(existing, kind), **{field: value for field, (_, value) in fields.items()}}
+    plan.changes.append(Change(kind.section, "update", key, entity_id=existing.get(kind.id_field), fields=fields,
+                               body=body, previous=existing))
+
+def _created_id(result: Any, kind: _Kind) -> Optional[str]:
+    if isinstance(result, dict):
+        return result.get(kind.id_field)
+    return result
+
+def sync_admin(make_request: Callable, desired: Union[str, Dict[str, Any]], prune: bool = False,
+               dry_run: bool = False, rollback: bool = True, keys: Optional[Dict[str, str]] = None,
+               max_workers: int = 8, attempts: int = 3, page_size: int = 100,
+               priority: str = BATCH) -> SyncReport:
+    """
+    Bring the backend's bots and OpenAI services to a declared state with as few writes as possible.
+
+    The plan of ``plan_sync`` is applied in phases: creates and updates of
+    services, then of bots, then deletes of bots, then of services. Within
+    a phase all changes run concurrently, so with nothing to change a sync
+    makes no write at all and its time is spent on the paged reads. Updates
+    and deletes are retried on transient errors; creates are not, since a
+    create that timed out may have happened.
+
+    If a change fails, the following phases are skipped and, with
+    ``rollback``, the changes already made are undone in reverse: created
+    entities are deleted, updated ones get their previous fields back and
+    deleted ones are created again (under a new ID).
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        desired (Union[str, Dict[str, Any]]): Desired state, or the path of a JSON file holding it.
+            See ``plan_sync``.
+        prune (bool, optional): Delete entities the desired state does not list. Defaults to False.
+        dry_run (bool, optional): Only plan; ``report.plan.describe()`` shows the diff. Defaults to False.
+        rollback (bool, optional): Undo applied changes when one fails. Defaults to True.
+        keys (Dict[str, str], optional): Natural key field per section, overriding the defaults.
+        max_workers (int, optional): Concurrent requests. Defaults to 8.
+        attempts (int, optional): Attempts per update or delete. Defaults to 3.
+        page_size (int, optional): Entities per page while reading. Defaults to 100.
+        priority (str, optional): Scheduler class of the requests. Defaults to ``"batch"``.
+
+    Returns:
+        SyncReport: The plan and what was applied; failed changes are in ``errors``.
+
+    Raises:
+        ConfigurationError: If the desired state cannot be loaded, or keys are missing or repeated.
+        APIError: If reading the current state fails.
+    """
+    kinds = {kind.section: kind for kind in _KINDS}
+    started = time.monotonic()
+    with priority_scope(priority):
+        plan = plan_sync(make_request, desired, prune=prune, keys=keys, page_size=page_size,
+                         max_workers=max_workers)
+        report = SyncReport(plan, dry_run)
+        report.started = started
+        if dry_run or not plan.changes:
+            report.skipped = len(plan) if dry_run else 0
+            report.finished = time.monotonic()
+            return report
+
+        def apply(change: Change) -> None:
+            kind = kinds[change.section]
+            if change.action == "create":
+                change.entity_id = _created_id(kind.create(make_request, change.body), kind)
+            elif change.action == "update":
+                retry_call(lambda: kind.update(make_request, change.entity_id, change.body), attempts=attempts)
+            else:
+                try:
+                    retry_call(lambda: kind.delete(make_request, change.entity_id), attempts=attempts)
+                except ResourceNotFoundError:
+                    pass  # Already gone
+
+        phases = [list(changes) for _, changes in
+                  groupby(plan.changes, key=lambda change: (change.action == "delete", change.section))]
+
+        applied: List[List[Change]] = []
+        try:
+            for position, phase in enumerate(phases):
+                done = []
+                for change, _, error in _run(apply, phase, max_workers):
+                    if error is None:
+                        report.succeeded += 1
+                        done.append(change)
+                    else:
+                        report.failed += 1
+                        report.errors.append({**change.to_json(), "error": format_error_message(error)})
+                applied.append(done)
+                if report.failed:
+                    report.skipped = sum(len(rest) for rest in phases[position + 1:])
+                    break
+            if report.failed and rollback:
+                _rollback(make_request, kinds, applied, report, max_workers, attempts)
+        finally:
+            report.finished = time.monotonic()
+    return report
+
+def _rollback(make_request: Callable, kinds: Dict[str, _Kind], applied: List[List[Change]], report: SyncReport,
+              max_workers: int, attempts: int) -> None:
+    def undo(change: Change) -> None:
+        kind = kinds[change.section]
+        if change.action == "create":
+            if change.entity_id is not None:
+                retry_call(lambda: kind.delete(make_request, change.entity_id), attempts=attempts)
+        elif change.action == "update":
+            previous = _writable(change.previous, kind)
+            retry_call(lambda: kind.update(make_request, change.entity_id, previous), attempts=attempts)
+        else:
+            kind.create(make_request, _writable(change.previous, kind))
+
+    for done in reversed(applied):
+        for change, _, error in _run(undo, done, max_workers):
+            if error is None:
+                report.rolled_back += 1
+            else:
+                report.rollback_failed += 1
+                report.errors.append({**change.to_json(), "rollback": True, "error": format_error_message(error)})
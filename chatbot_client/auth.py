@@ -0,0 +1,321 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlencode
+from .exceptions import AuthenticationError, ConfigurationError
+from .transport import RequestsTransport, Transport
+
+class CredentialProvider:
+    """
+    Interface for the bearer tokens ``ChatbotClient`` sends upstream.
+
+    ``token`` is called for every request and must be cheap. After a 401
+    response the client calls ``refresh`` with the token that was rejected
+    and retries the request once with the token it returns.
+    """
+
+    def token(self) -> str:
+        raise NotImplementedError
+
+    def refresh(self, stale: Optional[str] = None) -> str:
+        """Return a token other than ``stale``, fetching a new one if needed."""
+        return self.token()
+
+    def close(self) -> None:
+        """Release resources held by the provider."""
+
+    def identity(self) -> str:
+        """Whose tokens these are, the same in every process; used (hashed) to keep deployments' state apart."""
+        return f"{type(self).__module__}.{type(self).__qualname__}"
+
+class StaticCredential(CredentialProvider):
+    """A fixed API key, sent as a bearer token."""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def token(self) -> str:
+        return self.api_key
+
+    def identity(self) -> str:
+        return self.api_key
+
+class CachedCredential(CredentialProvider):
+    """
+    Token from ``fetch``, kept in memory and refreshed in the background before it expires.
+
+    ``token`` returns the cached token without locking. Once a token is
+    within ``refresh_margin`` seconds of expiry (or half its lifetime for
+    short-lived tokens), the next call starts a refresh in a background
+    thread and still returns the current token, so requests only wait for
+    the token endpoint when there is no valid token at all: on the first
+    call, after an idle period longer than the token lifetime, or after a
+    401. All refreshes are single-flight: threads that need a token while
+    one is being fetched wait for that fetch instead of starting their own.
+    A failed background refresh keeps the current token and is retried
+    after ``retry_interval`` seconds.
+
+    Args:
+        fetch (Callable[[], Tuple[str, float]]): Returns a new token and its lifetime in seconds.
+        refresh_margin (float, optional): Seconds before expiry to refresh. Defaults to 300.
+        expiry_skew (float, optional): Seconds a token is considered expired early, for clock skew
+            and request latency. Defaults to 10.
+        retry_interval (float, optional): Seconds between background refresh attempts after a failure.
+            Defaults to 10.
+    """
+
+    def __init__(self, fetch: Callable[[], Tuple[str, float]], refresh_margin: float = 300.0,
+                 expiry_skew: float = 10.0, retry_interval: float = 10.0):
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.expiry_skew = expiry_skew
+        self.retry_interval = retry_interval
+        # (token, expires at, refresh at) in time.monotonic(), replaced as a whole so reads need no lock
+        self._state: Tuple[Optional[str], float, float] = (None, 0.0, 0.0)
+        self._condition = threading.Condition()
+        self._refreshing = False
+        self._flight = 0
+        self._error: Optional[BaseException] = None
+        self.last_error: Optional[str] = None
+        self.stats = {"fetched": 0, "background": 0, "waited": 0, "forced": 0, "failed": 0}
+
+    def token(self) -> str:
+        token, expires_at, refresh_at = self._state
+        now = time.monotonic()
+        if token is not None and now < expires_at:
+            if now >= refresh_at:
+                self._refresh_in_background()
+            return token
+        return self._refresh(stale=None)
+
+    def refresh(self, stale: Optional[str] = None) -> str:
+        self.stats["forced"] += 1
+        return self._refresh(stale)
+
+    def _valid(self, stale: Optional[str]) -> Optional[str]:
+        token, expires_at, _ = self._state
+        if token is not None and token != stale and time.monotonic() < expires_at:
+            return token
+        return None
+
+    def _refresh(self, stale: Optional[str]) -> str:
+        with self._condition:
+            token = self._valid(stale)
+            if token is not None:
+                return token
+            if self._refreshing:
+                # Share the fetch in flight, and its failure
+                self.stats["waited"] += 1
+                flight = self._flight
+                while self._refreshing and self._flight == flight:
+                    self._condition.wait()
+                token = self._valid(stale)
+                if token is not None:
+                    return token
+                if self._error is not None:
+                    raise self._error
+            self._refreshing = True
+            self._flight += 1
+        return self._run_fetch()
+
+    def _refresh_in_background(self) -> None:
+        with self._condition:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._flight += 1
+        self.stats["background"] += 1
+        threading.Thread(target=self._run_fetch, kwargs={"background": True}, name="credential-refresh",
+                         daemon=True).start()
+
+    def _run_fetch(self, background: bool = False) -> Optional[str]:
+        # Called by the thread that set _refreshing
+        started = time.monotonic()
+        try:
+            token, lifetime = self.fetch()
+        except Exception as e:
+            with self._condition:
+                self.stats["failed"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._error = e
+                if background:
+                    # Keep the current token until it expires and try again later
+                    current, expires_at, _ = self._state
+                    self._state = (current, expires_at, time.monotonic() + self.retry_interval)
+                self._refreshing = False
+                self._condition.notify_all()
+            if background:
+                return None
+            raise
+        lifetime = max(0.0, float(lifetime) - self.expiry_skew)
+        with self._condition:
+            self.stats["fetched"] += 1
+            self._state = (token, started + lifetime, started + lifetime - min(self.refresh_margin, lifetime / 2))
+            self._error = None
+            self._refreshing = False
+            self._condition.notify_all()
+        return token
+
+    def expires_in(self) -> Optional[float]:
+        """Seconds until the cached token is treated as expired, or None without a token."""
+        token, expires_at, _ = self._state
+        return None if token is None else expires_at - time.monotonic()
+
+class ClientCredentials(CachedCredential):
+    """
+    OAuth 2.0 client credentials grant, e.g. an Azure AD app registration.
+
+    Tokens are requested from ``token_url`` with ``grant_type=client_credentials``
+    and cached and refreshed as described in ``CachedCredential``. For Azure AD
+    the token URL is ``https://login.microsoftonline.com/<tenant>/oauth2/v2.0/token``
+    and the scope ``<application ID URI>/.default``.
+
+    Args:
+        token_url (str): Token endpoint.
+        client_id (str): Client ID.
+        client_secret (str): Client secret.
+        scope (str, optional): Requested scope.
+        transport (Transport, optional): HTTP layer for token requests. Defaults to a new ``RequestsTransport``.
+        timeout (float, optional): Token request timeout in seconds. Defaults to 10.
+        **kwargs: ``refresh_margin``, ``expiry_skew`` and ``retry_interval``, see ``CachedCredential``.
+
+    Raises:
+        ConfigurationError: If the client ID or secret is missing.
+    """
+
+    def __init__(self, token_url: str, client_id: str, client_secret: str, scope: Optional[str] = None,
+                 transport: Optional[Transport] = None, timeout: float = 10.0, **kwargs):
+        if not client_id or not client_secret:
+            raise ConfigurationError("client_id and client_secret are required")
+        super().__init__(self._fetch_token, **kwargs)
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self._owns_transport = transport is None
+        self.transport = transport or RequestsTransport(pool_connections=1, pool_maxsize=2)
+        self.timeout = timeout
+
+    def identity(self) -> str:
+        return f"{self.token_url} {self.client_id} {self.scope or ''}"
+
+    def _fetch_token(self) -> Tuple[str, float]:
+        form = {"grant_type": "client_credentials", "client_id": self.client_id, "client_secret": self.client_secret}
+        if self.scope:
+            form["scope"] = self.scope
+        response = self.transport.request("POST", self.token_url,
+                                          headers={"Accept": "application/json",
+                                                   "Content-Type": "application/x-www-form-urlencoded"},
+                                          content=urlencode(form).encode("ascii"), timeout=self.timeout)
+        try:
+            body = response.read()
+        finally:
+            response.close()
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            data = {}
+        if response.status_code >= 400:
+            detail = data.get("error_description") or data.get("error") or response.reason
+            raise AuthenticationError(f"Token request failed: {response.status_code} {detail}")
+        if not isinstance(data, dict) or "access_token" not in data:
+            raise AuthenticationError("Token response has no access_token")
+        return data["access_token"], float(data.get("expires_in", 3600))
+
+    def close(self) -> None:
+        if self._owns_transport:
+            self.transport.close()
+
+class LocalTokenServer:
+    """
+    Stand-in OAuth token endpoint on localhost, for tests and local development.
+
+    Answers client credentials requests at ``url`` with random tokens that
+    expire after ``expires_in`` seconds. ``is_valid`` tells a fake upstream
+    whether a bearer token would be accepted, and ``revoke`` invalidates
+    tokens early to provoke a 401.
+
+        with LocalTokenServer(expires_in=5) as tokens:
+            credentials = ClientCredentials(tokens.url, tokens.client_id, tokens.client_secret)
+
+    Args:
+        client_id (str, optional): Accepted client ID. Defaults to ``"local-client"``.
+        client_secret (str, optional): Accepted client secret. Defaults to ``"local-secret"``.
+        expires_in (float, optional): Token lifetime in seconds. Defaults to 60.
+        delay (float, optional): Seconds each token request takes. Defaults to 0.
+        port (int, optional): Port to listen on, 0 for any free port. Defaults to 0.
+    """
+
+    def __init__(self, client_id: str = "local-client", client_secret: str = "local-secret",
+                 expires_in: float = 60.0, delay: float = 0.0, port: int = 0):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.expires_in = expires_in
+        self.delay = delay
+        self.requests = 0
+        self._issued: Dict[str, float] = {}
+        self._revoked: Set[str] = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/token"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-token-server", daemon=True)
+        self._thread.start()
+
+    def _handler(self):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("ascii")).items()}
+                status, body = owner._issue(form)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _issue(self, form: Dict[str, str]) -> Tuple[int, dict]:
+        with self._lock:
+            self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if form.get("grant_type") != "client_credentials":
+            return 400, {"error": "unsupported_grant_type"}
+        if form.get("client_id") != self.client_id or form.get("client_secret") != self.client_secret:
+            return 401, {"error": "invalid_client", "error_description": "Unknown client or wrong secret"}
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._issued[token] = time.monotonic() + self.expires_in
+        return 200, {"access_token": token, "token_type": "Bearer", "expires_in": self.expires_in}
+
+    def is_valid(self, token: str) -> bool:
+        """Whether ``token`` was issued here, has not expired and was not revoked."""
+        with self._lock:
+            expires_at = self._issued.get(token)
+            return expires_at is not None and token not in self._revoked and time.monotonic() < expires_at
+
+    def revoke(self, token: Optional[str] = None) -> None:
+        """Invalidate one token, or every token issued so far."""
+        with self._lock:
+            self._revoked.update([token] if token is not None else self._issued)
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalTokenServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,6 +1,16 @@
-from typing import Callable, Dict, Any, List
+from typing import Callable, Dict, Any, List, TYPE_CHECKING
 from ..exceptions import APIError, ResourceNotFoundError
-from ..models import PagingResult
+from ..endpoints import endpoint
+
+if TYPE_CHECKING:
+    from ..models import PagingResult
+
+_SEARCH_BOT = endpoint("bot.search_bot")
+_GET_BOTS = endpoint("bot.get_bots")
+_GET_BOTS_BY_START_BOT = endpoint("bot.get_bots_by_start_bot")
+_GET_START_BOTS = endpoint("bot.get_start_bots")
+_GET_BOT_IMAGE = endpoint("bot.get_bot_image")
+_IS_STOP_ALL_BOTS = endpoint("bot.is_stop_all_bots")
 
 def search_bot(make_request: Callable, bot_id: str, query: str) -> str:
     """
@@ -18,10 +28,10 @@ def search_bot(make_request: Callable, bot_id: str, query: str) -> str:
         APIError: If the API request fails.
     """
     data = {"userMessage": query}
-    return make_request("POST", f"/api/bots/{bot_id}/search", json=data)
+    return make_request(_SEARCH_BOT.method, _SEARCH_BOT.url(bot_id), json=data)
 
 def get_bots(make_request: Callable, search_for: str = None, order_by: str = None, 
-             page_number: int = 1, page_size: int = 20) -> PagingResult:
+             page_number: int = 1, page_size: int = 20) -> "PagingResult":
     """
     Retrieve a list of bots.
 
@@ -38,16 +48,11 @@ def get_bots(make_request: Callable, search_for: str = None, order_by: str = Non
     Raises:
         APIError: If the API request fails.
     """
-    params = {
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", "/api/bots", params=params)
+    return make_request(_GET_BOTS.method, _GET_BOTS.url(search_for=search_for, order_by=order_by,
+                                                       page_number=page_number, page_size=page_size))
 
 def get_bots_by_start_bot(make_request: Callable, start_bot_id: str, search_for: str = None, 
-                          order_by: str = None, page_number: int = 1, page_size: int = 20) -> PagingResult:
+                          order_by: str = None, page_number: int = 1, page_size: int = 20) -> "PagingResult":
     """
     Retrieve a list of bots associated with a start bot.
 
@@ -65,16 +70,12 @@ def get_bots_by_start_bot(make_request: Callable, start_bot_id: str, search_for:
     Raises:
         APIError: If the API request fails.
     """
-    params = {
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", f"/api/bots/bystartbot/{start_bot_id}", params=params)
+    return make_request(_GET_BOTS_BY_START_BOT.method,
+                        _GET_BOTS_BY_START_BOT.url(start_bot_id, search_for=search_for, order_by=order_by,
+                                                   page_number=page_number, page_size=page_size))
 
 def get_start_bots(make_request: Callable, search_for: str = None, order_by: str = None, 
-                   page_number: int = 1, page_size: int = 20) -> PagingResult:
+                   page_number: int = 1, page_size: int = 20) -> "PagingResult":
     """
     Retrieve a list of start bots.
 
@@ -91,13 +92,8 @@ def get_start_bots(make_request: Callable, search_for: str = None, order_by: str
     Raises:
         APIError: If the API request fails.
     """
-    params = {
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", "/api/bots/startbots", params=params)
+    return make_request(_GET_START_BOTS.method, _GET_START_BOTS.url(search_for=search_for, order_by=order_by,
+                                                                   page_number=page_number, page_size=page_size))
 
 def get_bot_image(make_request: Callable, bot_id: str) -> bytes:
     """
@@ -115,7 +111,7 @@ def get_bot_image(make_request: Callable, bot_id: str) -> bytes:
         APIError: If the API request fails.
     """
     try:
-        return make_request("GET", f"/api/bots/botimage/{bot_id}", return_raw=True)
+        return make_request(_GET_BOT_IMAGE.method, _GET_BOT_IMAGE.url(bot_id), return_raw=True)
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Bot", bot_id)
@@ -134,4 +130,4 @@ def is_stop_all_bots(make_request: Callable) -> bool:
     Raises:
         APIError: If the API request fails.
     """
-    return make_request("GET", "/api/bots/stop")
\ No newline at end of file
+    return make_request(_IS_STOP_ALL_BOTS.method, _IS_STOP_ALL_BOTS.url())
\ No newline at end of file
@@ -0,0 +1,269 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from ..paging import iter_items
+from ..utils import to_timestamp
+from .bot import get_bots, get_bots_by_start_bot, get_start_bots
+
+_SEARCH_FIELDS = ("displayName", "code", "description")
+_WORD = re.compile(r"\w+")
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class _Index:
+    """Immutable search structures over one catalog snapshot, swapped in whole on every sync."""
+
+    def __init__(self, bots: Dict[str, Dict[str, Any]], start_bot_ids: List[str],
+                 members: Dict[str, List[str]]):
+        self.bots = bots
+        self.start_bot_ids = start_bot_ids
+        self.members = members
+        self.start_bots_of: Dict[str, List[str]] = {}
+        for start_bot_id, bot_ids in members.items():
+            for bot_id in bot_ids:
+                self.start_bots_of.setdefault(bot_id, []).append(start_bot_id)
+        self.updated = {bot_id: to_timestamp(bot.get("updatedUtc")) for bot_id, bot in bots.items()}
+        # Newest first; search results keep this order within equal scores
+        self.by_updated = sorted(bots, key=lambda bot_id: self.updated[bot_id], reverse=True)
+        self.rank = {bot_id: position for position, bot_id in enumerate(self.by_updated)}
+        # Terms are matched against the vocabulary, which is far smaller than
+        # the catalog: trigrams map to words, words map to bots
+        self.words: Dict[str, Set[str]] = {}
+        self.prefixes: Dict[str, Set[str]] = {}
+        self.names: Dict[str, str] = {}
+        self.name_words: Dict[str, List[str]] = {}
+        self.codes: Dict[str, str] = {}
+        for bot_id, bot in bots.items():
+            self.names[bot_id] = str(bot.get("displayName") or "").lower()
+            self.name_words[bot_id] = _WORD.findall(self.names[bot_id])
+            self.codes[bot_id] = str(bot.get("code") or "").lower()
+            for field in _SEARCH_FIELDS:
+                for word in _WORD.findall(str(bot.get(field) or "").lower()):
+                    self.words.setdefault(word, set()).add(bot_id)
+                    for length in (1, 2):
+                        self.prefixes.setdefault(word[:length], set()).add(bot_id)
+        self.trigrams: Dict[str, Set[str]] = {}
+        for word in self.words:
+            for gram in _trigrams(word):
+                self.trigrams.setdefault(gram, set()).add(word)
+        self._terms: Dict[str, Set[str]] = {}
+        self.results: Dict[tuple, List[str]] = {}
+
+    def candidates(self, term: str) -> Set[str]:
+        """IDs of the bots with a word containing ``term``, or starting with it for short terms."""
+        cached = self._terms.get(term)
+        if cached is not None:
+            return cached
+        if len(term) < 3:
+            result = self.prefixes.get(term, set())
+        else:
+            grams = sorted(_trigrams(term), key=lambda gram: len(self.trigrams.get(gram, ())))
+            words = set(self.trigrams.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not words:
+                    break
+                words &= self.trigrams.get(gram, set())
+            # Trigrams can match out of order, confirm the substring
+            result = set()
+            for word in words:
+                if term in word:
+                    result |= self.words[word]
+        if len(self._terms) < 4096:
+            self._terms[term] = result
+        return result
+
+    def score(self, bot_id: str, terms: List[str]) -> int:
+        name = self.names[bot_id]
+        score = 0
+        for term in terms:
+            if self.codes[bot_id] == term:
+                score += 8
+            if name.startswith(term):
+                score += 4
+            elif any(word.startswith(term) for word in self.name_words[bot_id]):
+                score += 3
+            elif term in name or term in self.codes[bot_id]:
+                score += 2
+            else:
+                score += 1
+        return score
+
+class BotCatalog:
+    """
+    Local, searchable copy of the bot catalog.
+
+    ``sync`` downloads every bot, every start bot and each start bot's bots
+    with concurrent paging, then builds a trigram index (prefix index for one
+    and two character terms) over ``displayName``, ``code`` and ``description``.
+    Searches run entirely in memory against an immutable snapshot, so they are
+    safe from any thread while a sync or refresh builds the next one.
+
+    ``refresh`` fetches bots newest first and stops at the first page with no
+    bot changed since the last sync, so it costs one or two requests when
+    little changed. Deleted bots and changed start-bot relationships are only
+    picked up by a full ``sync``.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        page_size (int, optional): Bots per page. Defaults to 100.
+        max_workers (int, optional): Concurrent requests during a sync. Defaults to 4.
+        refresh_order_by (str, optional): ``orderBy`` value listing bots by ``updatedUtc``
+            descending. If None, ``refresh`` reads every page.
+    """
+
+    def __init__(self, make_request: Callable, page_size: int = 100, max_workers: int = 4,
+                 refresh_order_by: Optional[str] = "updatedUtc desc"):
+        self.make_request = make_request
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.refresh_order_by = refresh_order_by
+        self.synced_at: Optional[float] = None
+        self._index = _Index({}, [], {})
+        self._lock = threading.Lock()
+
+    def _all(self, fetch: Callable[..., Dict[str, Any]], *args, order_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        return list(iter_items(
+            lambda page_number: fetch(self.make_request, *args, order_by=order_by, page_number=page_number,
+                                      page_size=self.page_size),
+            max_workers=self.max_workers))
+
+    def sync(self) -> None:
+        """Download the whole catalog and replace the index."""
+        with self._lock, ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            bots_future = pool.submit(copy_context().run, self._all, get_bots)
+            start_bots = self._all(get_start_bots)
+            member_futures = {
+                bot["botId"]: pool.submit(copy_context().run, self._all, get_bots_by_start_bot, bot["botId"])
+                for bot in start_bots}
+            bots = {bot["botId"]: bot for bot in bots_future.result()}
+            for bot in start_bots:
+                bots.setdefault(bot["botId"], bot)
+            members = {}
+            for start_bot_id, future in member_futures.items():
+                members[start_bot_id] = []
+                for bot in future.result():
+                    bots.setdefault(bot["botId"], bot)
+                    members[start_bot_id].append(bot["botId"])
+            self._index = _Index(bots, [bot["botId"] for bot in start_bots], members)
+            self.synced_at = time.time()
+
+    def refresh(self) -> int:
+        """
+        Fetch bots updated since the last sync and reindex them.
+
+        Runs a full ``sync`` if the catalog was never synced.
+
+        Returns:
+            int: Number of new or changed bots.
+        """
+        if self.synced_at is None:
+            self.sync()
+            return len(self._index.bots)
+        with self._lock:
+            index = self._index
+            watermark = max(index.updated.values(), default=0.0)
+            changed = {}
+            page_number = 1
+            while True:
+                page = get_bots(self.make_request, order_by=self.refresh_order_by, page_number=page_number,
+                                page_size=self.page_size)
+                newer = [bot for bot in page.get("items") or [] if to_timestamp(bot.get("updatedUtc")) > watermark
+                         or bot["botId"] not in index.bots]
+                for bot in newer:
+                    changed[bot["botId"]] = bot
+                if not page.get("hasNext") or (self.refresh_order_by and not newer):
+                    break
+                page_number += 1
+            if changed:
+                bots = dict(index.bots)
+                bots.update(changed)
+                start_bot_ids = list(index.start_bot_ids)
+                start_bot_ids += [bot_id for bot_id, bot in changed.items()
+                                  if bot.get("isStartBot") and bot_id not in index.members]
+                members = dict(index.members)
+                for bot_id in start_bot_ids:
+                    members.setdefault(bot_id, [])
+                self._index = _Index(bots, start_bot_ids, members)
+            self.synced_at = time.time()
+            return len(changed)
+
+    def get(self, bot_id: str) -> Optional[Dict[str, Any]]:
+        """Return the bot with this ID, or None."""
+        return self._index.bots.get(bot_id)
+
+    def start_bots(self) -> List[Dict[str, Any]]:
+        """Return the start bots, newest first."""
+        index = self._index
+        return sorted((index.bots[bot_id] for bot_id in index.start_bot_ids),
+                      key=lambda bot: index.rank[bot["botId"]])
+
+    def bots_for_start_bot(self, start_bot_id: str) -> List[Dict[str, Any]]:
+        """Return the bots reachable from a start bot, newest first."""
+        index = self._index
+        return sorted((index.bots[bot_id] for bot_id in index.members.get(start_bot_id, ())),
+                      key=lambda bot: index.rank[bot["botId"]])
+
+    def start_bots_for(self, bot_id: str) -> List[str]:
+        """Return the IDs of the start bots that lead to a bot."""
+        return list(self._index.start_bots_of.get(bot_id, ()))
+
+    def search(self, query: str = "", start_bot_id: Optional[str] = None, is_start_bot: Optional[bool] = None,
+               limit: Optional[int] = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search the catalog locally.
+
+        Every word of the query must occur in ``displayName``, ``code`` or
+        ``description``; one or two character words match word prefixes.
+        Results are ordered by relevance, then by ``updatedUtc`` newest first.
+
+        Args:
+            query (str, optional): Search words. An empty query lists every bot.
+            start_bot_id (str, optional): Only bots reachable from this start bot.
+            is_start_bot (bool, optional): Only start bots (True) or only other bots (False).
+            limit (int, optional): Maximum results. Defaults to 20; None returns all.
+            offset (int, optional): Results to skip, for paging. Defaults to 0.
+
+        Returns:
+            List[Dict[str, Any]]: Matching bots as returned by the API.
+        """
+        index = self._index
+        terms = _WORD.findall(query.lower())
+        cache_key = (tuple(terms), start_bot_id, is_start_bot)
+        ids = index.results.get(cache_key)
+        if ids is None:
+            ids = self._match(index, terms, start_bot_id, is_start_bot)
+            if len(index.results) < 1024:
+                index.results[cache_key] = ids
+        end = offset + limit if limit is not None else None
+        return [index.bots[bot_id] for bot_id in ids[offset:end]]
+
+    @staticmethod
+    def _match(index: _Index, terms: List[str], start_bot_id: Optional[str],
+               is_start_bot: Optional[bool]) -> List[str]:
+        if terms:
+            candidates: Optional[Set[str]] = None
+            for term in sorted(terms, key=len, reverse=True):
+                matches = index.candidates(term)
+                candidates = set(matches) if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+        else:
+            candidates = None
+        if start_bot_id is not None:
+            allowed = set(index.members.get(start_bot_id, ()))
+            candidates = allowed if candidates is None else candidates & allowed
+        if is_start_bot is not None:
+            ids: Iterable[str] = index.by_updated if candidates is None else candidates
+            candidates = {bot_id for bot_id in ids if bool(index.bots[bot_id].get("isStartBot")) == is_start_bot}
+        if candidates is None:
+            return index.by_updated
+        if not terms:
+            return sorted(candidates, key=index.rank.__getitem__)
+        return sorted(candidates, key=lambda bot_id: (-index.score(bot_id, terms), index.rank[bot_id]))
+
+    def __len__(self) -> int:
+        return len(self._index.bots)
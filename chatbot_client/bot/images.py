@@ -0,0 +1,297 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from ..exceptions import ConfigurationError
+from .thumbnails import make_thumbnail, sniff_content_type
+
+class CachedImage:
+    """Image bytes with the headers needed to serve them. ``size`` is the thumbnail size, 0 for the original."""
+
+    __slots__ = ("data", "content_type", "etag", "fetched", "size")
+
+    def __init__(self, data: bytes, content_type: str, etag: Optional[str] = None, fetched: Optional[float] = None,
+                 size: int = 0):
+        self.data = data
+        self.content_type = content_type
+        self.etag = etag or '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+        self.fetched = fetched if fetched is not None else time.time()
+        self.size = size
+
+class ImageCache:
+    """
+    Tiered cache for bot images: a memory LRU bounded in bytes, then files on disk, then the API.
+
+    Originals are fetched once per bot (concurrent misses share the fetch)
+    and served stale while a background thread revalidates them after
+    ``ttl`` seconds. Thumbnails for ``sizes`` are generated in a process pool
+    as soon as an original arrives, never on the request path; until one is
+    ready the original is served. Requested sizes are rounded up to the next
+    configured size, so arbitrary sizes cannot fill the cache.
+
+    Args:
+        fetch (Callable[[str], bytes]): Returns the original image of a bot,
+            e.g. ``lambda bot_id: bot.get_bot_image(make_request, bot_id)``.
+        directory (str, optional): Disk tier location. Defaults to a directory in the temp dir.
+        memory_bytes (int, optional): Memory tier budget. Defaults to 32 MiB.
+        ttl (float, optional): Seconds before an original is revalidated. Defaults to one hour.
+        sizes (Iterable[int], optional): Thumbnail edge lengths in pixels. Defaults to 32, 64, 128 and 256.
+        max_workers (int, optional): Thumbnail worker processes. Defaults to 2.
+    """
+
+    def __init__(self, fetch: Callable[[str], bytes], directory: Optional[str] = None,
+                 memory_bytes: int = 32 * 1024 * 1024, ttl: float = 3600.0,
+                 sizes: Iterable[int] = (32, 64, 128, 256), max_workers: int = 2):
+        self.fetch = fetch
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "chatbot_client_images")
+        os.makedirs(self.directory, exist_ok=True)
+        self.memory_bytes = memory_bytes
+        self.ttl = ttl
+        self.sizes = sorted(set(sizes))
+        self.max_workers = max_workers
+        self._memory: "OrderedDict[Tuple[str, int], CachedImage]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._fetching: Dict[str, Future] = {}
+        self._revalidating = set()
+        # (bot_id, size) -> ETag of the original a thumbnail was scheduled for; kept after a failure
+        # so an image Pillow cannot read is not resubmitted on every request
+        self._thumbnailing: Dict[Tuple[str, int], str] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        try:
+            import PIL  # noqa: F401
+            self.thumbnails = True
+        except ImportError:
+            self.thumbnails = False
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "fetches": 0, "thumbnails": 0}
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def round_size(self, size: Optional[int]) -> int:
+        """The configured thumbnail size serving a request for ``size``, 0 for the original."""
+        if not size or not self.sizes:
+            return 0
+        for candidate in self.sizes:
+            if candidate >= size:
+                return candidate
+        return 0  # Larger than every thumbnail: the original
+
+    def _path(self, bot_id: str, size: int) -> str:
+        name = hashlib.sha256(bot_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.{size}")
+
+    # Memory tier
+
+    def _remember(self, key: Tuple[str, int], image: CachedImage) -> None:
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_used -= len(previous.data)
+            if len(image.data) > self.memory_bytes:
+                return
+            self._memory[key] = image
+            self._memory_used += len(image.data)
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted.data)
+
+    def peek(self, bot_id: str, size: Optional[int] = None) -> Optional[CachedImage]:
+        """
+        Return an image from memory without any I/O, or None.
+
+        Falls back to the cached original only while the thumbnail is being
+        made (or could not be made); otherwise a missing thumbnail returns
+        None, so ``get`` looks on disk and schedules it again.
+        """
+        size = self.round_size(size)
+        with self._lock:
+            image = self._memory.get((bot_id, size))
+            key = (bot_id, size)
+            if image is None and size:
+                key = (bot_id, 0)
+                image = self._memory.get(key)
+                if image is not None and self._thumbnailing.get((bot_id, size)) != image.etag:
+                    image = None
+            if image is None:
+                return None
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+        if time.time() - image.fetched > self.ttl:
+            self._revalidate(bot_id)
+        return image
+
+    # Disk tier
+
+    def _load(self, bot_id: str, size: int) -> Optional[CachedImage]:
+        path = self._path(bot_id, size)
+        try:
+            with open(f"{path}.json", "r") as f:
+                meta = json.load(f)
+            with open(path, "rb") as f:
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        return CachedImage(data, meta["content_type"], meta["etag"], meta["fetched"], size)
+
+    def _save(self, bot_id: str, size: int, image: CachedImage) -> None:
+        path = self._path(bot_id, size)
+        for target, content, mode in ((path, image.data, "wb"),
+                                      (f"{path}.json", json.dumps({"content_type": image.content_type,
+                                                                   "etag": image.etag,
+                                                                   "fetched": image.fetched}), "w")):
+            tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(content)
+            os.replace(tmp_path, target)
+
+    # Upstream
+
+    def _fetch_original(self, bot_id: str) -> CachedImage:
+        with self._lock:
+            future = self._fetching.get(bot_id)
+            owner = future is None
+            if owner:
+                future = self._fetching[bot_id] = Future()
+        if not owner:
+            return future.result()
+        try:
+            data = self.fetch(bot_id)
+            self.stats["fetches"] += 1
+            previous = self._load(bot_id, 0)
+            image = CachedImage(data, sniff_content_type(data))
+            self._save(bot_id, 0, image)
+            self._remember((bot_id, 0), image)
+            if previous is None or previous.etag != image.etag:
+                self._drop_thumbnails(bot_id)
+                self._schedule_thumbnails(bot_id, image)
+            future.set_result(image)
+            return image
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._fetching.pop(bot_id, None)
+
+    def _revalidate(self, bot_id: str) -> None:
+        with self._lock:
+            if bot_id in self._revalidating:
+                return
+            self._revalidating.add(bot_id)
+
+        def run():
+            try:
+                self._fetch_original(bot_id)
+            except Exception:
+                pass  # Keep serving the stale copy
+            finally:
+                with self._lock:
+                    self._revalidating.discard(bot_id)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # Thumbnails
+
+    def _drop_thumbnails(self, bot_id: str) -> None:
+        for size in self.sizes:
+            with self._lock:
+                self._thumbnailing.pop((bot_id, size), None)
+                previous = self._memory.pop((bot_id, size), None)
+                if previous is not None:
+                    self._memory_used -= len(previous.data)
+            for path in (self._path(bot_id, size), f"{self._path(bot_id, size)}.json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _schedule_thumbnails(self, bot_id: str, original: CachedImage) -> None:
+        supported = self.thumbnails and original.content_type.startswith("image/") \
+            and original.content_type != "image/svg+xml"
+        with self._lock:
+            sizes = [size for size in self.sizes if self._thumbnailing.get((bot_id, size)) != original.etag]
+            for size in sizes:
+                # Unsupported images are marked too, so peek serves the original without asking again
+                self._thumbnailing[(bot_id, size)] = original.etag
+            if not supported:
+                return
+            if sizes and self._pool is None:
+                # Forking a threaded server can deadlock the child, so start fresh interpreters; they
+                # import only bot.thumbnails to run make_thumbnail
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        for size in sizes:
+            future = self._pool.submit(make_thumbnail, original.data, size)
+            future.add_done_callback(lambda done, size=size: self._store_thumbnail(bot_id, size, original, done))
+
+    def _store_thumbnail(self, bot_id: str, size: int, original: CachedImage, done: Future) -> None:
+        try:
+            data, content_type = done.result()
+        except Exception:
+            return  # Not an image Pillow can read: the original is served instead
+        with self._lock:
+            if self._thumbnailing.get((bot_id, size)) != original.etag:
+                return  # The original changed meanwhile
+            del self._thumbnailing[(bot_id, size)]
+        if len(data) >= len(original.data):
+            data, content_type = original.data, original.content_type
+        image = CachedImage(data, content_type, fetched=original.fetched, size=size)
+        self._save(bot_id, size, image)
+        self._remember((bot_id, size), image)
+        self.stats["thumbnails"] += 1
+
+    def get(self, bot_id: str, size: Optional[int] = None) -> CachedImage:
+        """
+        Return a bot's image, or its thumbnail closest to ``size`` pixels.
+
+        Args:
+            bot_id (str): ID of the bot.
+            size (int, optional): Requested edge length. Rounded up to a configured size.
+
+        Returns:
+            CachedImage: The image bytes with media type and strong ETag.
+
+        Raises:
+            ResourceNotFoundError: If the bot is not found.
+            APIError: If the image cannot be fetched.
+        """
+        image = self.peek(bot_id, size)
+        if image is not None:
+            return image
+        size = self.round_size(size)
+        if size:
+            image = self._load(bot_id, size)
+            if image is not None:
+                self.stats["disk_hits"] += 1
+                self._remember((bot_id, size), image)
+                return image
+        with self._lock:
+            original = self._memory.get((bot_id, 0))
+        if original is None:
+            original = self._load(bot_id, 0)
+            if original is None:
+                original = self._fetch_original(bot_id)
+            else:
+                self.stats["disk_hits"] += 1
+                self._remember((bot_id, 0), original)
+        if time.time() - original.fetched > self.ttl:
+            self._revalidate(bot_id)
+        elif size:
+            # The thumbnail was evicted, lost with the disk tier, or never made (e.g. with Pillow missing)
+            self._schedule_thumbnails(bot_id, original)
+        return original
+
+def validate_sizes(sizes: Iterable[int]) -> Tuple[int, ...]:
+    """Check thumbnail sizes from configuration."""
+    sizes = tuple(int(size) for size in sizes)
+    if any(size <= 0 or size > 4096 for size in sizes):
+        raise ConfigurationError("thumbnail sizes must be between 1 and 4096 pixels")
+    return sizes
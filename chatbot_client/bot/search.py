@@ -0,0 +1,149 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterable, List, Optional, TYPE_CHECKING
+from ..cancellation import CancellationToken, cancel_scope, current_token
+from ..exceptions import CancelledError
+from .bot import search_bot
+
+if TYPE_CHECKING:
+    from ..store import StateStore
+
+# Where the hits of a search_bot response may be listed
+_HIT_FIELDS = ("items", "results", "searchResults", "documents", "hits")
+# Constant of reciprocal rank fusion: larger values flatten the advantage of the first hits
+_RRF_K = 60
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as the cache key."""
+    return " ".join(query.casefold().split())
+
+def _cache_key(bot_id: str, query: str) -> str:
+    digest = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+    return f"search_bot:{bot_id}:{digest}"
+
+def _hits(result: Any) -> List[Any]:
+    """The individual hits of one ``search_bot`` response, in the order the bot ranked them."""
+    if isinstance(result, list):
+        return result
+    if isinstance(result, dict):
+        for field in _HIT_FIELDS:
+            if isinstance(result.get(field), list):
+                return result[field]
+    return [] if result is None else [result]
+
+def _merge(results: Dict[str, Any], bot_ids: List[str], score_field: Optional[str],
+           limit: Optional[int]) -> List[Dict[str, Any]]:
+    merged = []
+    for bot_id in bot_ids:
+        if bot_id not in results:
+            continue
+        for position, hit in enumerate(_hits(results[bot_id])):
+            score = None
+            if score_field and isinstance(hit, dict) and isinstance(hit.get(score_field), (int, float)):
+                score = float(hit[score_field])
+            merged.append({"botId": bot_id, "rank": position + 1, "score": score, "hit": hit})
+    if score_field and merged and all(entry["score"] is not None for entry in merged):
+        merged.sort(key=lambda entry: -entry["score"])
+    else:
+        # Scores of different bots are not comparable (or missing): fuse by rank instead
+        for entry in merged:
+            entry["score"] = 1.0 / (_RRF_K + entry["rank"])
+        merged.sort(key=lambda entry: -entry["score"])
+    return merged[:limit] if limit is not None else merged
+
+def search_bots(make_request: Callable, bot_ids: Iterable[str], query: str, deadline: Optional[float] = 10.0,
+                max_workers: int = 8, store: Optional["StateStore"] = None, cache_ttl: Optional[float] = 300.0,
+                score_field: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Send one query to several bots at once and merge their results.
+
+    All bots are searched concurrently, so the call takes about as long as
+    the slowest bot, and never much longer than ``deadline``: searches still
+    running then are cancelled and the results of the others returned.
+    Results are cached in ``store`` per bot and normalized query (case and
+    whitespace are ignored) for ``cache_ttl`` seconds; failed searches are not
+    cached.
+
+    Hits are merged by reciprocal rank fusion, which only relies on the order
+    each bot returned them in. If every hit carries a numeric ``score_field``
+    comparable across bots, they are sorted by it instead.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        bot_ids (Iterable[str]): IDs of the bots to search.
+        query (str): Search query.
+        deadline (float, optional): Seconds to wait for all bots. None waits for every bot. Defaults to 10.
+        max_workers (int, optional): Concurrent searches. Defaults to 8.
+        store (StateStore, optional): Cache for results, None disables caching.
+        cache_ttl (float, optional): Seconds a result is cached. Defaults to 300.
+        score_field (str, optional): Field of a hit holding a relevance score comparable across bots.
+        limit (int, optional): Most merged hits returned.
+
+    Returns:
+        Dict[str, Any]: ``results``, the merged hits as ``{"botId", "rank", "score", "hit"}`` best first;
+        ``bots``, by bot ID, a ``status`` of ``"ok"``, ``"cached"``, ``"timeout"`` or ``"error"`` with
+        ``elapsed`` seconds and the ``error`` message of failed searches; and ``partial``, True if
+        any bot is missing from the results.
+
+    Raises:
+        CancelledError: If the caller's own cancellation token fires.
+    """
+    started = time.monotonic()
+    bot_ids = list(dict.fromkeys(bot_ids))
+    results: Dict[str, Any] = {}
+    status: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for bot_id in bot_ids:
+        cached = store.get(_cache_key(bot_id, query)) if store is not None and cache_ttl else None
+        if cached is not None:
+            results[bot_id] = cached["result"]
+            status[bot_id] = {"status": "cached", "elapsed": 0.0}
+        else:
+            pending.append(bot_id)
+
+    if pending:
+        outer = current_token()
+        token = CancellationToken(timeout=deadline, parent=outer)
+        timings: Dict[str, float] = {}
+
+        def search(bot_id: str) -> Any:
+            begin = time.monotonic()
+            try:
+                with cancel_scope(token):
+                    return search_bot(make_request, bot_id, query)
+            finally:
+                timings[bot_id] = time.monotonic() - begin
+
+        pool = ThreadPoolExecutor(max_workers=min(max_workers, len(pending)), thread_name_prefix="search-bots")
+        try:
+            futures = {pool.submit(copy_context().run, search, bot_id): bot_id for bot_id in pending}
+            done, not_done = wait(futures, timeout=token.remaining())
+        finally:
+            # Whatever still runs is abandoned: cancelled, and not waited for
+            token.cancel("search deadline reached")
+            pool.shutdown(wait=False, cancel_futures=True)
+        if outer is not None:
+            outer.raise_if_cancelled()
+        elapsed = time.monotonic() - started
+        for future, bot_id in futures.items():
+            if future in not_done or bot_id not in timings:
+                status[bot_id] = {"status": "timeout", "elapsed": elapsed}
+                continue
+            error = future.exception()
+            if error is None:
+                results[bot_id] = future.result()
+                status[bot_id] = {"status": "ok", "elapsed": timings[bot_id]}
+                if store is not None and cache_ttl:
+                    store.set(_cache_key(bot_id, query), {"result": results[bot_id]}, ttl=cache_ttl)
+            elif isinstance(error, CancelledError):
+                status[bot_id] = {"status": "timeout", "elapsed": timings[bot_id]}
+            else:
+                status[bot_id] = {"status": "error", "elapsed": timings[bot_id], "error": str(error)}
+
+    return {
+        "results": _merge(results, bot_ids, score_field, limit),
+        "bots": {bot_id: status[bot_id] for bot_id in bot_ids},
+        "partial": len(results) < len(bot_ids),
+    }
@@ -0,0 +1,44 @@
+# Runs in the thumbnail worker processes, which are started with "spawn" and import this module to
+# unpickle make_thumbnail: keep it free of import-time side effects; Pillow is imported when needed.
+import io
+from typing import Tuple
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+def sniff_content_type(data: bytes) -> str:
+    """Guess an image's media type from its first bytes."""
+    for signature, content_type in _SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if b"<svg" in data[:512]:
+        return "image/svg+xml"
+    return "application/octet-stream"
+
+def make_thumbnail(data: bytes, size: int) -> Tuple[bytes, str]:
+    """
+    Downsize an image to fit in a ``size`` x ``size`` square, keeping its aspect ratio.
+
+    Runs in a worker process, which imports only this module. JPEGs stay JPEG, everything else becomes PNG so
+    transparency is kept. Requires Pillow.
+
+    Returns:
+        Tuple[bytes, str]: The encoded thumbnail and its media type.
+    """
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((size, size), Image.LANCZOS)
+        output = io.BytesIO()
+        if image.format == "JPEG" or sniff_content_type(data) == "image/jpeg":
+            image.convert("RGB").save(output, "JPEG", quality=85, optimize=True)
+            return output.getvalue(), "image/jpeg"
+        if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            image = image.convert("RGBA")
+        image.save(output, "PNG", optimize=True)
+        return output.getvalue(), "image/png"
@@ -1,5 +1,8 @@
 from typing import Callable
 from ..exceptions import APIError
+from ..endpoints import endpoint
+
+_CLEAR_CACHE = endpoint("cache.clear_cache")
 
 def clear_cache(make_request: Callable) -> None:
     """
@@ -17,6 +20,6 @@ def clear_cache(make_request: Callable) -> None:
         None
     """
     try:
-        make_request("DELETE", "/cache")
+        make_request(_CLEAR_CACHE.method, _CLEAR_CACHE.url())
     except APIError as e:
         raise APIError(f"Failed to clear cache: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,170 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+from .exceptions import CancelledError, DeadlineExceededError
+
+class CancellationToken:
+    """
+    Cancellation signal with an optional deadline, shared by everything working on one operation.
+
+    The client checks the token before each attempt, waits on it instead of
+    sleeping during retry backoff and rate-limit waits, caps transport timeouts
+    at the time left, and registers callbacks that close the upstream connection
+    as soon as the token fires.
+
+    Args:
+        timeout (float, optional): Seconds from now until the deadline.
+        deadline (float, optional): Absolute deadline on the ``time.monotonic()`` clock.
+        parent (CancellationToken, optional): Token whose cancellation and deadline also apply to this one.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, deadline: Optional[float] = None,
+                 parent: Optional["CancellationToken"] = None):
+        if timeout is not None:
+            deadline = _earliest(deadline, time.monotonic() + timeout)
+        self.deadline = deadline
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self._timer: Optional[threading.Timer] = None
+        if parent is not None:
+            self._follow(parent)
+
+    def _follow(self, parent: "CancellationToken") -> Callable[[], None]:
+        """Fire with ``parent`` and share its deadline. Returns a function that unlinks the two."""
+        self.deadline = _earliest(self.deadline, parent.deadline)
+        return parent.on_cancel(lambda: self.cancel(parent.reason))
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the token was cancelled or its deadline has passed."""
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self._expire()
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None if there is none."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: Optional[str] = None) -> None:
+        """Cancel the token and run the registered callbacks. Later calls have no effect."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason or "cancelled by caller"
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+            if self._timer is not None:
+                self._timer.cancel()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def _expire(self) -> None:
+        self.cancel("deadline exceeded")
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raise if the token has fired.
+
+        Raises:
+            DeadlineExceededError: If the deadline has passed.
+            CancelledError: If the token was cancelled.
+        """
+        if self.cancelled:
+            raise self.error()
+
+    def error(self) -> CancelledError:
+        """The exception describing why the token fired."""
+        if self.reason == "deadline exceeded":
+            return DeadlineExceededError()
+        return CancelledError(self.reason or "cancelled by caller")
+
+    def wait(self, seconds: float) -> None:
+        """
+        Sleep for ``seconds`` unless the token fires first.
+
+        Raises:
+            CancelledError: If the token fires before the time is up.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            self._event.wait(remaining)
+            self._expire()
+        else:
+            self._event.wait(seconds)
+        self.raise_if_cancelled()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run ``callback`` when the token fires, immediately if it already has.
+
+        A deadline starts a timer thread the first time a callback is registered,
+        so blocking reads are interrupted when it passes.
+
+        Returns:
+            Callable[[], None]: Function that unregisters the callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                if self.deadline is not None and self._timer is None:
+                    self._timer = threading.Timer(self.remaining(), self._expire)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+def _earliest(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None:
+        return b
+    return a if b is None else min(a, b)
+
+_current: ContextVar[Optional[CancellationToken]] = ContextVar("chatbot_client_cancellation", default=None)
+
+def current_token() -> Optional[CancellationToken]:
+    """The token of the innermost ``cancel_scope``, if any."""
+    return _current.get()
+
+@contextmanager
+def cancel_scope(token: Optional[CancellationToken] = None, timeout: Optional[float] = None
+                 ) -> Iterator[CancellationToken]:
+    """
+    Apply a token to every client call made inside the block, including calls
+    made by operation functions that do not take a token themselves.
+
+    Args:
+        token (CancellationToken, optional): Token to use. A new one is created if omitted.
+        timeout (float, optional): Deadline for the block, combined with ``token`` and any enclosing scope.
+
+    Yields:
+        CancellationToken: The token in effect.
+    """
+    outer = _current.get()
+    unlinks = []
+    if token is None or timeout is not None or (outer is not None and outer is not token):
+        scoped = CancellationToken(timeout=timeout)
+        unlinks = [scoped._follow(parent) for parent in (token, outer) if parent is not None]
+        token = scoped
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+        for unlink in unlinks:
+            unlink()
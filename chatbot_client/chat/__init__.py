@@ -2,6 +2,7 @@ from .chat import (
     create_chat,
     create_chat_by_bot_code,
     chat_completion,
+    stream_chat_completion,
     get_chat,
     delete_chat,
     bot_feedback,
@@ -17,6 +18,7 @@ __all__ = [
     'create_chat',
     'create_chat_by_bot_code',
     'chat_completion',
+    'stream_chat_completion',
     'get_chat',
     'delete_chat',
     'bot_feedback',
@@ -1,5 +1,20 @@
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, Iterator, Optional
 from ..exceptions import APIError, ResourceNotFoundError
+from ..endpoints import endpoint
+from .streaming import iter_completion_text
+
+_CREATE_CHAT = endpoint("chat.create_chat")
+_CREATE_CHAT_BY_BOT_CODE = endpoint("chat.create_chat_by_bot_code")
+_CHAT_COMPLETION = endpoint("chat.chat_completion")
+_GET_CHAT = endpoint("chat.get_chat")
+_DELETE_CHAT = endpoint("chat.delete_chat")
+_BOT_FEEDBACK = endpoint("chat.bot_feedback")
+_GET_OPEN_CHAT_BOT_ID = endpoint("chat.get_open_chat_bot_id")
+_UPDATE_CHAT_DISPLAY_NAME = endpoint("chat.update_chat_display_name")
+_UPDATE_CHAT_USER_SYSTEM_MESSAGE = endpoint("chat.update_chat_user_system_message")
+_DELETE_CHAT_USER_SYSTEM_MESSAGE = endpoint("chat.delete_chat_user_system_message")
+_CREATE_CHAT_ONE_TIME_TICKET = endpoint("chat.create_chat_one_time_ticket")
+_GET_CHAT_DOWNLOAD = endpoint("chat.get_chat_download")
 
 def create_chat(make_request: Callable, bot_id: str) -> Dict[str, Any]:
     """
@@ -16,7 +31,7 @@ def create_chat(make_request: Callable, bot_id: str) -> Dict[str, Any]:
         APIError: If the API request fails.
     """
     data = {"botId": bot_id}
-    return make_request("POST", "/api/chats", json=data)
+    return make_request(_CREATE_CHAT.method, _CREATE_CHAT.url(), json=data)
 
 def create_chat_by_bot_code(make_request: Callable, bot_code: str) -> Dict[str, Any]:
     """
@@ -33,9 +48,10 @@ def create_chat_by_bot_code(make_request: Callable, bot_code: str) -> Dict[str,
         APIError: If the API request fails.
     """
     data = {"botCode": bot_code}
-    return make_request("POST", "/api/chats/create/bybotcode", json=data)
+    return make_request(_CREATE_CHAT_BY_BOT_CODE.method, _CREATE_CHAT_BY_BOT_CODE.url(), json=data)
 
-def chat_completion(make_request: Callable, chat_id: str, user_message: str, ignore_chat_history: bool = False, is_admin_chat: bool = False, is_trace_log_enabled: bool = False) -> Dict[str, Any]:
+def chat_completion(make_request: Callable, chat_id: str, user_message: str, ignore_chat_history: bool = False, is_admin_chat: bool = False, is_trace_log_enabled: bool = False,
+                    idempotency_key: Optional[str] = None) -> Dict[str, Any]:
     """
     Send a message to the chatbot and get a response.
 
@@ -46,6 +62,7 @@ def chat_completion(make_request: Callable, chat_id: str, user_message: str, ign
         ignore_chat_history (bool): Whether to ignore chat history.
         is_admin_chat (bool): Whether this is an admin chat.
         is_trace_log_enabled (bool): Whether to enable trace logging.
+        idempotency_key (str, optional): Sent as the ``Idempotency-Key`` header.
 
     Returns:
         Dict[str, Any]: Chatbot's response and other details.
@@ -59,7 +76,54 @@ def chat_completion(make_request: Callable, chat_id: str, user_message: str, ign
         "isAdminChat": is_admin_chat,
         "isTraceLogEnabled": is_trace_log_enabled
     }
-    return make_request("POST", f"/api/chats/{chat_id}/completions", json=data)
+    if idempotency_key:
+        return make_request(_CHAT_COMPLETION.method, _CHAT_COMPLETION.url(chat_id), json=data,
+                            headers={"Idempotency-Key": idempotency_key})
+    return make_request(_CHAT_COMPLETION.method, _CHAT_COMPLETION.url(chat_id), json=data)
+
+def stream_chat_completion(make_request: Callable, chat_id: str, user_message: str, ignore_chat_history: bool = False,
+                           is_admin_chat: bool = False, is_trace_log_enabled: bool = False,
+                           on_completion: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[str]:
+    """
+    Send a message to the chatbot and yield the answer as it is produced.
+
+    The request asks for server-sent events; if the backend answers with a
+    plain JSON completion instead, the whole message is yielded at once.
+    Closing the generator closes the upstream response.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        chat_id (str): ID of the chat session.
+        user_message (str): Message to send to the chatbot.
+        ignore_chat_history (bool): Whether to ignore chat history.
+        is_admin_chat (bool): Whether this is an admin chat.
+        is_trace_log_enabled (bool): Whether to enable trace logging.
+        on_completion (Callable, optional): Called with the final completion details when available.
+
+    Yields:
+        str: Pieces of the assistant message.
+
+    Raises:
+        ResourceNotFoundError: If the chat is not found.
+        APIError: If the API request fails.
+    """
+    data = {
+        "userMessage": user_message,
+        "ignoreChatHistory": ignore_chat_history,
+        "isAdminChat": is_admin_chat,
+        "isTraceLogEnabled": is_trace_log_enabled
+    }
+    try:
+        response = make_request(_CHAT_COMPLETION.method, _CHAT_COMPLETION.url(chat_id), json=data, stream=True,
+                                headers={"Accept": "text/event-stream, application/json"})
+    except APIError as e:
+        if e.status_code == 404:
+            raise ResourceNotFoundError("Chat", chat_id)
+        raise
+    try:
+        yield from iter_completion_text(response.iter_bytes(), response.headers.get("Content-Type"), on_completion)
+    finally:
+        response.close()
 
 def get_chat(make_request: Callable, chat_id: str) -> Dict[str, Any]:
     """
@@ -77,7 +141,7 @@ def get_chat(make_request: Callable, chat_id: str) -> Dict[str, Any]:
         APIError: If the API request fails.
     """
     try:
-        return make_request("GET", f"/api/chats/{chat_id}")
+        return make_request(_GET_CHAT.method, _GET_CHAT.url(chat_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Chat", chat_id)
@@ -96,7 +160,7 @@ def delete_chat(make_request: Callable, chat_id: str) -> None:
         APIError: If the API request fails.
     """
     try:
-        make_request("DELETE", f"/api/chats/{chat_id}")
+        make_request(_DELETE_CHAT.method, _DELETE_CHAT.url(chat_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Chat", chat_id)
@@ -117,7 +181,7 @@ def bot_feedback(make_request: Callable, chat_id: str, feedback_data: Dict[str,
     Raises:
         APIError: If the API request fails.
     """
-    return make_request("POST", f"/api/chats/{chat_id}/feedback", json=feedback_data)
+    return make_request(_BOT_FEEDBACK.method, _BOT_FEEDBACK.url(chat_id), json=feedback_data)
 
 def get_open_chat_bot_id(make_request: Callable) -> Dict[str, Any]:
     """
@@ -132,7 +196,7 @@ def get_open_chat_bot_id(make_request: Callable) -> Dict[str, Any]:
     Raises:
         APIError: If the API request fails.
     """
-    return make_request("GET", "/api/chats/OpenChatBotId")
+    return make_request(_GET_OPEN_CHAT_BOT_ID.method, _GET_OPEN_CHAT_BOT_ID.url())
 
 def update_chat_display_name(make_request: Callable, chat_id: str, display_name: str) -> None:
     """
@@ -149,7 +213,7 @@ def update_chat_display_name(make_request: Callable, chat_id: str, display_name:
     """
     data = {"displayName": display_name}
     try:
-        make_request("PUT", f"/api/chats/{chat_id}/displayName", json=data)
+        make_request(_UPDATE_CHAT_DISPLAY_NAME.method, _UPDATE_CHAT_DISPLAY_NAME.url(chat_id), json=data)
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Chat", chat_id)
@@ -170,7 +234,7 @@ def update_chat_user_system_message(make_request: Callable, chat_id: str, user_s
     """
     data = {"userSystemMessageId": user_system_message_id}
     try:
-        make_request("PUT", f"/api/chats/{chat_id}/userSystemMessage", json=data)
+        make_request(_UPDATE_CHAT_USER_SYSTEM_MESSAGE.method, _UPDATE_CHAT_USER_SYSTEM_MESSAGE.url(chat_id), json=data)
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Chat", chat_id)
@@ -189,7 +253,7 @@ def delete_chat_user_system_message(make_request: Callable, chat_id: str) -> Non
         APIError: If the API request fails.
     """
     try:
-        make_request("DELETE", f"/api/chats/{chat_id}/userSystemMessage")
+        make_request(_DELETE_CHAT_USER_SYSTEM_MESSAGE.method, _DELETE_CHAT_USER_SYSTEM_MESSAGE.url(chat_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Chat", chat_id)
@@ -211,7 +275,7 @@ def create_chat_one_time_ticket(make_request: Callable, chat_id: str) -> str:
         APIError: If the API request fails.
     """
     try:
-        return make_request("POST", f"/api/chats/{chat_id}/tickets")
+        return make_request(_CREATE_CHAT_ONE_TIME_TICKET.method, _CREATE_CHAT_ONE_TIME_TICKET.url(chat_id))
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Chat", chat_id)
@@ -234,9 +298,9 @@ def get_chat_download(make_request: Callable, chat_id: str, path: str, ticket: s
         ResourceNotFoundError: If the chat or download is not found.
         APIError: If the API request fails.
     """
-    params = {"ticket": ticket}
     try:
-        return make_request("GET", f"/api/chats/{chat_id}/downloads/{path}", params=params, return_raw=True)
+        return make_request(_GET_CHAT_DOWNLOAD.method, _GET_CHAT_DOWNLOAD.url(chat_id, path, ticket=ticket),
+                            return_raw=True)
     except APIError as e:
         if e.status_code == 404:
             raise ResourceNotFoundError("Chat or Download", f"{chat_id}/{path}")
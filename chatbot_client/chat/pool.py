@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from ..exceptions import ResourceNotFoundError
+from ..scheduler import BATCH, priority_scope
+from .chat import create_chat, create_chat_by_bot_code, delete_chat
+
+# Pool key: ("id", bot_id) or ("code", bot_code), matching the create call used
+_Key = Tuple[str, str]
+
+class _Slot:
+    __slots__ = ("ready", "demand", "creating")
+
+    def __init__(self):
+        self.ready: Deque[Tuple[float, Dict[str, Any]]] = deque()  # (created, ChatCreateResponse)
+        self.demand: Deque[float] = deque()  # acquire times within the demand window
+        self.creating = 0
+
+class ChatPool:
+    """
+    Per-bot pool of chats created ahead of time, so a new conversation does not wait for ``create_chat``.
+
+    ``acquire`` hands out a pooled chat instantly when one is ready and falls
+    back to creating one. Every acquire then tops the bot's pool up in the
+    background to its target depth: the number of chats acquired for that bot
+    during the last ``demand_window`` seconds, capped at ``max_depth``. Bots
+    nobody used recently get no chats created ahead of time. Pooled chats
+    older than ``idle_ttl`` are deleted with ``delete_chat`` by ``sweep``,
+    which acquires also run now and then, and all pooled chats on ``close``.
+
+    Pre-created chats exist on the server, so they show up in the user's chat
+    list until they are handed out or deleted. Refills run in the ``"batch"``
+    scheduler class and never delay interactive requests.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        max_depth (int, optional): Most chats kept ready per bot. Defaults to 4.
+        min_depth (int, optional): Chats kept ready per bot seen before, even without recent demand. Defaults to 0.
+        demand_window (float, optional): Seconds of acquire history that set the target depth. Defaults to 300.
+        idle_ttl (float, optional): Seconds a pooled chat may wait before it is deleted. Defaults to 600.
+        max_workers (int, optional): Concurrent create and delete calls in the background. Defaults to 2.
+    """
+
+    def __init__(self, make_request: Callable, max_depth: int = 4, min_depth: int = 0,
+                 demand_window: float = 300.0, idle_ttl: float = 600.0, max_workers: int = 2):
+        self.make_request = make_request
+        self.max_depth = max_depth
+        self.min_depth = min(min_depth, max_depth)
+        self.demand_window = demand_window
+        self.idle_ttl = idle_ttl
+        self._slots: Dict[_Key, _Slot] = {}
+        # ChatCreateResponse without the chatId: bot name, greeting, sample questions
+        self._metadata: Dict[_Key, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-pool")
+        self._closed = False
+        self._swept = time.monotonic()
+        self.stats = {"hits": 0, "misses": 0, "created": 0, "expired": 0, "errors": 0}
+
+    def _create(self, key: _Key) -> Dict[str, Any]:
+        kind, value = key
+        if kind == "id":
+            chat = create_chat(self.make_request, value)
+        else:
+            chat = create_chat_by_bot_code(self.make_request, value)
+        metadata = {k: v for k, v in chat.items() if k != "chatId"}
+        with self._lock:
+            self._metadata[key] = metadata
+            if kind == "code" and chat.get("botId"):
+                self._metadata.setdefault(("id", chat["botId"]), metadata)
+        return chat
+
+    def _acquire(self, key: _Key) -> Dict[str, Any]:
+        now = time.monotonic()
+        chat = None
+        with self._lock:
+            slot = self._slots.setdefault(key, _Slot())
+            slot.demand.append(now)
+            while slot.ready:
+                created, candidate = slot.ready.popleft()
+                if now - created < self.idle_ttl:
+                    chat = candidate
+                    break
+                self.stats["expired"] += 1
+                self._submit(self._delete, candidate["chatId"])
+            self.stats["hits" if chat is not None else "misses"] += 1
+        if chat is None:
+            chat = self._create(key)
+        self._refill(key)
+        if now - self._swept > min(60.0, self.idle_ttl / 2):
+            self._swept = now
+            self.sweep()
+        return chat
+
+    def acquire(self, bot_id: str) -> Dict[str, Any]:
+        """
+        Return a new chat with a bot, taken from the pool when one is ready.
+
+        Args:
+            bot_id (str): ID of the bot.
+
+        Returns:
+            Dict[str, Any]: The ``ChatCreateResponse`` of the chat.
+
+        Raises:
+            ChatbotClientError: If no chat was ready and creating one failed.
+        """
+        return self._acquire(("id", bot_id))
+
+    def acquire_by_bot_code(self, bot_code: str) -> Dict[str, Any]:
+        """Like ``acquire``, for chats created with ``create_chat_by_bot_code``."""
+        return self._acquire(("code", bot_code))
+
+    def metadata(self, bot_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached ``ChatCreateResponse`` fields of a bot, without ``chatId``, or None if not seen yet."""
+        with self._lock:
+            metadata = self._metadata.get(("id", bot_id))
+            return dict(metadata) if metadata is not None else None
+
+    def target_depth(self, key: _Key) -> int:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return 0
+            horizon = time.monotonic() - self.demand_window
+            while slot.demand and slot.demand[0] < horizon:
+                slot.demand.popleft()
+            return max(self.min_depth, min(self.max_depth, len(slot.demand)))
+
+    def _refill(self, key: _Key) -> None:
+        target = self.target_depth(key)
+        with self._lock:
+            if self._closed:
+                return
+            slot = self._slots[key]
+            missing = target - len(slot.ready) - slot.creating
+            slot.creating += max(0, missing)
+        for _ in range(missing):
+            self._submit(self._fill_one, key)
+
+    def _fill_one(self, key: _Key) -> None:
+        try:
+            with priority_scope(BATCH):
+                chat = self._create(key)
+        except Exception:
+            with self._lock:
+                self._slots[key].creating -= 1
+                self.stats["errors"] += 1
+            return
+        with self._lock:
+            slot = self._slots[key]
+            slot.creating -= 1
+            self.stats["created"] += 1
+            if not self._closed:
+                slot.ready.append((time.monotonic(), chat))
+                return
+        self._delete(chat["chatId"])
+
+    def _delete(self, chat_id: str) -> None:
+        try:
+            with priority_scope(BATCH):
+                delete_chat(self.make_request, chat_id)
+        except ResourceNotFoundError:
+            pass
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+
+    def _submit(self, func: Callable, *args) -> None:
+        try:
+            self._pool.submit(func, *args)
+        except RuntimeError:  # Shut down
+            pass
+
+    def sweep(self) -> int:
+        """
+        Delete pooled chats older than ``idle_ttl``.
+
+        Returns:
+            int: Number of chats scheduled for deletion.
+        """
+        expired: List[str] = []
+        horizon = time.monotonic() - self.idle_ttl
+        with self._lock:
+            for slot in self._slots.values():
+                while slot.ready and slot.ready[0][0] < horizon:
+                    expired.append(slot.ready.popleft()[1]["chatId"])
+            self.stats["expired"] += len(expired)
+        for chat_id in expired:
+            self._submit(self._delete, chat_id)
+        return len(expired)
+
+    def discard(self, bot_id: Optional[str] = None) -> None:
+        """Forget pooled chats that were deleted on the server, all of them or those with one bot."""
+        with self._lock:
+            for (kind, value), slot in self._slots.items():
+                if bot_id is None or (kind == "id" and value == bot_id) \
+                        or any(chat.get("botId") == bot_id for _, chat in slot.ready):
+                    slot.ready.clear()
+
+    def depths(self) -> Dict[str, int]:
+        """Return the number of ready chats per bot ID or bot code."""
+        with self._lock:
+            return {value: len(slot.ready) for (_, value), slot in self._slots.items()}
+
+    def close(self) -> None:
+        """Stop refilling and delete every pooled chat."""
+        with self._lock:
+            self._closed = True
+            chat_ids = [chat["chatId"] for slot in self._slots.values() for _, chat in slot.ready]
+            for slot in self._slots.values():
+                slot.ready.clear()
+        for chat_id in chat_ids:
+            self._submit(self._delete, chat_id)
+        self._pool.shutdown(wait=True)
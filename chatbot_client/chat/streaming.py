@@ -0,0 +1,96 @@
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from ..exceptions import ChatbotClientError
+
+def iter_sse_data(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Parse a ``text/event-stream`` body incrementally.
+
+    Args:
+        chunks (Iterable[bytes]): Body chunks as they arrive.
+
+    Yields:
+        str: The data of each event, with multi-line data joined by newlines.
+    """
+    buffer = b""
+    data = []
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if not line:
+                if data:
+                    yield "\n".join(data)
+                    data = []
+            elif line.startswith(b"data:"):
+                data.append(line[5:].lstrip(b" ").decode("utf-8"))
+    if buffer.startswith(b"data:"):
+        data.append(buffer[5:].lstrip(b" ").rstrip(b"\r").decode("utf-8"))
+    if data:
+        yield "\n".join(data)
+
+def _delta_text(event: Dict[str, Any]) -> Optional[str]:
+    if isinstance(event.get("delta"), str):
+        return event["delta"]
+    if isinstance(event.get("content"), str):
+        return event["content"]
+    choices = event.get("choices")
+    if choices:
+        return (choices[0].get("delta") or {}).get("content")
+    return None
+
+def iter_completion_text(chunks: Iterable[bytes], content_type: Optional[str],
+                         on_completion: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[str]:
+    """
+    Yield the assistant's answer from a chat completion response as it arrives.
+
+    Server-sent events are read as they stream in: ``delta``/``content`` fields
+    and OpenAI style ``choices[0].delta.content`` are yielded as text, and an
+    event carrying ``totalTokens`` is treated as the final completion. A plain
+    JSON response yields its ``assistantMessage`` once.
+
+    Args:
+        chunks (Iterable[bytes]): Decoded response body chunks.
+        content_type (str, optional): The response Content-Type header.
+        on_completion (Callable, optional): Called with the final completion object, if any.
+
+    Yields:
+        str: Pieces of the assistant message.
+
+    Raises:
+        ChatbotClientError: If a plain response is not a JSON object.
+    """
+    if not (content_type or "").startswith("text/event-stream"):
+        try:
+            completion = json.loads(b"".join(chunks) or b"{}")
+        except ValueError as e:
+            raise ChatbotClientError(f"API request failed: invalid JSON response: {str(e)}")
+        if not isinstance(completion, dict):
+            raise ChatbotClientError("API request failed: completion response is not a JSON object")
+        if on_completion is not None and completion:
+            on_completion(completion)
+        if completion.get("assistantMessage"):
+            yield completion["assistantMessage"]
+        return
+    streamed = False
+    for data in iter_sse_data(chunks):
+        if data == "[DONE]":
+            break
+        try:
+            event = json.loads(data)
+        except ValueError:
+            streamed = True
+            yield data
+            continue
+        if not isinstance(event, dict):
+            continue
+        text = _delta_text(event)
+        if text:
+            streamed = True
+            yield text
+        if "totalTokens" in event:
+            if on_completion is not None:
+                on_completion(event)
+            if not streamed and event.get("assistantMessage"):
+                yield event["assistantMessage"]
@@ -0,0 +1,274 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..exceptions import APIError, ResourceNotFoundError
+from .chat import _GET_CHAT
+
+def _completions_field(chat: Dict[str, Any]) -> Optional[str]:
+    """Name of the list of completions in a ``get_chat`` response, the first list of dicts with a ``completionId``."""
+    for key, value in chat.items():
+        if isinstance(value, list) and value and isinstance(value[0], dict) and "completionId" in value[0]:
+            return key
+    return None
+
+class _Transcript:
+    __slots__ = ("epoch", "version", "field", "chat", "chat_version", "completions", "versions", "removed",
+                 "horizon", "synced", "stale")
+
+    def __init__(self):
+        # A new epoch invalidates every cursor handed out before, e.g. after eviction
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.field: Optional[str] = None
+        self.chat: Dict[str, Any] = {}  # get_chat response without the completions
+        self.chat_version = 0
+        self.completions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.versions: Dict[str, int] = {}  # completion ID -> version it was added or last changed at
+        self.removed: List[Tuple[int, str]] = []  # (version, completion ID), oldest first
+        self.horizon = 0  # Removals up to this version were forgotten
+        self.synced = 0.0
+        self.stale = True
+
+class TranscriptCache:
+    """
+    Per chat cache of ``get_chat`` transcripts that hands out only what changed since a caller's cursor.
+
+    ``delta(chat_id, cursor)`` brings the cached transcript up to date and
+    returns the completions added or changed after ``cursor`` and the IDs of
+    those removed, with a new cursor for the next call. A browser revisiting
+    a long chat thus receives a few completions instead of the whole chat.
+
+    The backend's ``get_chat`` has no documented way to ask for newer
+    completions only, so by default each refresh fetches the whole chat and
+    diffs it locally by ``completionId``: upstream bytes stay the same, but
+    only the delta is passed on. If the backend accepts a query parameter
+    with the last completion ID known, name it in ``since_param``; responses
+    are then merged instead of replacing the transcript, which is correct
+    whether or not the backend honours it; completions deleted elsewhere are
+    then only noticed by a forced ``refresh``, which fetches the whole chat.
+    ``max_age`` skips the refresh for chats synced that recently and not
+    changed through this client.
+
+    Deletions through ``ChatbotClient`` keep the cache consistent: the
+    client calls ``remove_completion`` after
+    ``delete_current_user_chat_completion_by_id`` and ``forget`` after a chat
+    is deleted, and ``invalidate`` after a completion is sent.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        max_chats (int, optional): Chats kept, least recently used are evicted. Defaults to 256.
+        max_age (float, optional): Seconds a synced transcript is served without asking upstream. Defaults to 0.
+        since_param (str, optional): Query parameter of ``get_chat`` taking the last completion ID known.
+        max_removed (int, optional): Removals remembered per chat; older cursors get the full transcript.
+            Defaults to 100.
+    """
+
+    def __init__(self, make_request: Callable, max_chats: int = 256, max_age: float = 0.0,
+                 since_param: Optional[str] = None, max_removed: int = 100):
+        self.make_request = make_request
+        self.max_chats = max_chats
+        self.max_age = max_age
+        self.since_param = since_param
+        self.max_removed = max_removed
+        self._chats: "OrderedDict[str, _Transcript]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One upstream refresh per chat at a time; concurrent callers wait for it
+        self._refreshing: Dict[str, threading.Event] = {}
+        self.stats = {"fetched": 0, "incremental": 0, "cached": 0, "full": 0, "delta": 0}
+
+    def _entry(self, chat_id: str) -> _Transcript:
+        # Called with the lock held
+        transcript = self._chats.get(chat_id)
+        if transcript is None:
+            transcript = self._chats[chat_id] = _Transcript()
+            while len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return transcript
+
+    def _fetch(self, chat_id: str, after: Optional[str]) -> Dict[str, Any]:
+        params = {self.since_param: after} if self.since_param and after else None
+        try:
+            if params:
+                return self.make_request(_GET_CHAT.method, _GET_CHAT.url(chat_id), params=params)
+            return self.make_request(_GET_CHAT.method, _GET_CHAT.url(chat_id))
+        except APIError as e:
+            if e.status_code == 404:
+                self.forget(chat_id)
+                raise ResourceNotFoundError("Chat", chat_id)
+            raise
+
+    def refresh(self, chat_id: str, force: bool = False) -> None:
+        """
+        Bring the cached transcript of a chat up to date with the backend.
+
+        Args:
+            chat_id (str): ID of the chat.
+            force (bool, optional): Ask upstream even within ``max_age``. Defaults to False.
+
+        Raises:
+            ResourceNotFoundError: If the chat is not found.
+            APIError: If the API request fails.
+        """
+        while True:
+            with self._lock:
+                transcript = self._entry(chat_id)
+                if not force and not transcript.stale and time.monotonic() - transcript.synced < self.max_age:
+                    self.stats["cached"] += 1
+                    return
+                pending = self._refreshing.get(chat_id)
+                if pending is None:
+                    done = self._refreshing[chat_id] = threading.Event()
+                    # Cleared before the fetch, so an invalidate while it runs is not lost
+                    transcript.stale = False
+                    after = next(reversed(transcript.completions), None) if self.since_param and not force else None
+                    break
+            pending.wait()
+            force = False  # The refresh just made is recent enough
+        try:
+            started = time.monotonic()
+            chat = self._fetch(chat_id, after)
+            with self._lock:
+                transcript = self._entry(chat_id)
+                self.stats["fetched"] += 1
+                self._merge(transcript, chat or {}, incremental=after is not None)
+                if after is not None:
+                    self.stats["incremental"] += 1
+                transcript.synced = started
+        except BaseException:
+            with self._lock:
+                if chat_id in self._chats:
+                    self._chats[chat_id].stale = True
+            raise
+        finally:
+            with self._lock:
+                self._refreshing.pop(chat_id, None)
+            done.set()
+
+    def _merge(self, transcript: _Transcript, chat: Dict[str, Any], incremental: bool) -> None:
+        # Called with the lock held
+        field = transcript.field or _completions_field(chat)
+        transcript.field = field
+        completions = (chat.get(field) or []) if field else []
+        metadata = {k: v for k, v in chat.items() if k != field}
+        version = transcript.version + 1
+        changed = False
+        if metadata != transcript.chat:
+            transcript.chat = metadata
+            transcript.chat_version = version
+            changed = True
+        seen = set()
+        for completion in completions:
+            completion_id = completion.get("completionId")
+            if completion_id is None:
+                continue
+            seen.add(completion_id)
+            if transcript.completions.get(completion_id) != completion:
+                transcript.completions[completion_id] = completion
+                transcript.versions[completion_id] = version
+                changed = True
+        if not incremental:
+            # A full response is authoritative: anything missing from it was deleted elsewhere
+            for completion_id in [c for c in transcript.completions if c not in seen]:
+                self._drop(transcript, completion_id, version)
+                changed = True
+        if changed:
+            transcript.version = version
+
+    def _drop(self, transcript: _Transcript, completion_id: str, version: int) -> None:
+        del transcript.completions[completion_id]
+        del transcript.versions[completion_id]
+        transcript.removed.append((version, completion_id))
+        excess = len(transcript.removed) - self.max_removed
+        if excess > 0:
+            transcript.horizon = transcript.removed[excess - 1][0]
+            del transcript.removed[:excess]
+
+    def delta(self, chat_id: str, cursor: Optional[str] = None, refresh: bool = True) -> Dict[str, Any]:
+        """
+        Return what changed in a chat since ``cursor``.
+
+        Args:
+            chat_id (str): ID of the chat.
+            cursor (str, optional): Cursor from the previous call; None for the whole transcript.
+            refresh (bool, optional): Refresh from the backend first (see ``max_age``). Defaults to True.
+
+        Returns:
+            Dict[str, Any]: ``cursor`` for the next call; ``reset``, True when the caller must drop what
+            it has because the full transcript follows; ``chat``, the chat fields without the
+            completions, or None if unchanged; ``completions`` added or changed, in chat order; and
+            ``removed`` completion IDs.
+
+        Raises:
+            ResourceNotFoundError: If the chat is not found.
+            APIError: If the API request fails.
+        """
+        if refresh:
+            self.refresh(chat_id)
+        with self._lock:
+            transcript = self._entry(chat_id)
+            since = self._parse_cursor(transcript, cursor)
+            reset = since is None or since < transcript.horizon
+            if reset:
+                since = 0
+                self.stats["full"] += 1
+            else:
+                self.stats["delta"] += 1
+            return {
+                "cursor": f"{transcript.epoch}:{transcript.version}",
+                "reset": reset,
+                "chat": dict(transcript.chat) if transcript.chat_version > since else None,
+                "completions": [completion for completion_id, completion in transcript.completions.items()
+                                if transcript.versions[completion_id] > since],
+                "removed": [] if reset else [completion_id for version, completion_id in transcript.removed
+                                             if version > since],
+            }
+
+    @staticmethod
+    def _parse_cursor(transcript: _Transcript, cursor: Optional[str]) -> Optional[int]:
+        if not cursor:
+            return None
+        epoch, _, version = cursor.partition(":")
+        if epoch != transcript.epoch or not version.isdigit() or int(version) > transcript.version:
+            return None
+        return int(version)
+
+    def get_chat(self, chat_id: str) -> Dict[str, Any]:
+        """Return the whole chat, as ``get_chat`` would, refreshed incrementally."""
+        self.refresh(chat_id)
+        with self._lock:
+            transcript = self._entry(chat_id)
+            chat = dict(transcript.chat)
+            if transcript.field:
+                chat[transcript.field] = list(transcript.completions.values())
+            return chat
+
+    def remove_completion(self, chat_id: str, completion_id: str) -> None:
+        """Drop a completion that was deleted through the client."""
+        with self._lock:
+            transcript = self._chats.get(chat_id)
+            if transcript is not None and completion_id in transcript.completions:
+                transcript.version += 1
+                self._drop(transcript, completion_id, transcript.version)
+
+    def invalidate(self, chat_id: str) -> None:
+        """Make the next ``delta`` or ``get_chat`` ask upstream, e.g. after a new completion."""
+        with self._lock:
+            transcript = self._chats.get(chat_id)
+            if transcript is not None:
+                transcript.stale = True
+
+    def forget(self, chat_id: Optional[str] = None) -> None:
+        """Drop the transcript of a deleted chat, or all of them."""
+        with self._lock:
+            if chat_id is None:
+                self._chats.clear()
+            else:
+                self._chats.pop(chat_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._chats)
@@ -1,6 +1,17 @@
-import requests
-from typing import Optional
-from .exceptions import ChatbotClientError
+import json
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, TYPE_CHECKING
+from .exceptions import ChatbotClientError, APIError, ConfigurationError, TransportError
+from .cancellation import CancellationToken, current_token
+from .transport import Transport, TransportResponse, RequestsTransport, HTTP2Transport
+from .endpoints import resolve
+from .retry import retry_call
+from .store import StateStore, MemoryStore, deployment_key
+from .idempotency import Deduplicator
+from .limiter import IGNORED, classify
+from .statistic.usage import TokenUsage
+from .utils import json_loads, json_serial
 from .cache.cache import clear_cache
 from .admin import openai_services, bots
 from .bot import bot
@@ -9,39 +20,379 @@ from .system import system
 from .user import user
 from .chat import chat as chat_module  # Ensure consistent import
 
+if TYPE_CHECKING:
+    from .admin.bulk_facts import BulkReport
+    from .admin.sync import SyncPlan, SyncReport
+    from .auth import CredentialProvider
+    from .bot.catalog import BotCatalog
+    from .chat.pool import ChatPool
+    from .chat.transcript import TranscriptCache
+    from .compression import CompressionConfig
+    from .limiter import AdaptiveLimiter
+    from .ratelimit import RateLimiter
+    from .scheduler import Scheduler
+    from .system.watcher import SystemStatusWatcher
+    from .user.history import ChatHistoryIndex
+    from .user.retention import RetentionReport
+    from .writebehind import WriteBehindQueue
+
+class _DecodedResponse(TransportResponse):
+    """Streaming response whose body goes through the client's decoding (e.g. decompression)."""
+
+    def __init__(self, response: TransportResponse, body, on_close: Optional[Callable[[], None]] = None):
+        self._response = response
+        self._body = body
+        self._on_close = on_close
+        self.status_code = response.status_code
+        self.reason = response.reason
+        self.headers = response.headers
+        self.http_version = response.http_version
+
+    def iter_bytes(self, chunk_size: int = None):
+        return self._body
+
+    def iter_raw(self, chunk_size: int = None):
+        return self._response.iter_raw()
+
+    def close(self) -> None:
+        self._response.close()
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
 class ChatbotClient:
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, transport: Optional[Transport] = None,
+                 http2: bool = False, timeout: Optional[float] = None,
+                 compression: Optional["CompressionConfig"] = None, timeouts: Optional[Dict[str, float]] = None,
+                 retries: int = 0, store: Optional[StateStore] = None,
+                 rate_limiter: Optional["RateLimiter"] = None, cache_ttl: Optional[float] = None,
+                 scheduler: Optional["Scheduler"] = None, dedup_window: float = 30.0,
+                 limiter: Optional["AdaptiveLimiter"] = None, credentials: Optional["CredentialProvider"] = None):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        if api_key:
-            self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        self.headers = {"Accept": "application/json"}
+        if api_key and credentials is None:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+        # Supplies a bearer token per request instead of the fixed api_key; a 401 is retried once with a new token
+        self.credentials = credentials
+        # Names per-deployment files (e.g. the write-behind journal) so clients of other backends or keys differ
+        self.deployment = deployment_key(self.base_url, credentials.identity() if credentials is not None else api_key)
+        if transport is None:
+            transport = HTTP2Transport() if http2 else RequestsTransport()
+        self.transport = transport
+        self.timeout = timeout
+        # Per endpoint timeout class ("fast", "default", "slow"), overriding timeout
+        self.timeouts = timeouts or {}
+        # Extra attempts for idempotent endpoints on transient failures
+        self.retries = retries
+        self.compression = compression
+        if compression is not None:
+            self.headers["Accept-Encoding"] = compression.accept_encoding
+        # Shared with other worker processes when a SQLiteStore is passed
+        self.store = store or MemoryStore()
+        self.token_usage = TokenUsage(self.store)
+        self.rate_limiter = rate_limiter
+        # Seconds to keep responses of cacheable endpoints (the bot catalog), None disables
+        self.cache_ttl = cache_ttl
+        # Orders requests by priority class when more are pending than it allows in flight
+        self.scheduler = scheduler
+        # Caps requests in flight per timeout class at a limit tuned from upstream latency and errors
+        self.limiter = limiter
+        # Completions sent with an idempotency key are run once per (chat, message, key)
+        self.deduplicator = Deduplicator(self.store, window=dedup_window)
+        # Set by enable_chat_history_index(); kept in sync by the chat and user wrappers below
+        self.chat_history: Optional["ChatHistoryIndex"] = None
+        # Set by enable_chat_pool(); create_chat then hands out pre-created chats
+        self.chat_pool: Optional["ChatPool"] = None
+        # Set by enable_write_behind(); bot_feedback and update_statistic are then queued
+        self.write_behind: Optional["WriteBehindQueue"] = None
+        # Set by enable_transcript_cache(); get_chat then refreshes a cached transcript
+        self.transcripts: Optional["TranscriptCache"] = None
+        # Set by enable_status_watcher(); get_system_status then answers from its last check
+        self.status_watcher: Optional["SystemStatusWatcher"] = None
 
-    def _make_request(self, method: str, endpoint: str, **kwargs):
+    @property
+    def session(self):
+        """The underlying ``requests.Session`` when using the default transport."""
+        return getattr(self.transport, "session", None)
+
+    def close(self) -> None:
+        if self.status_watcher is not None:
+            self.status_watcher.stop()
+        if self.chat_pool is not None:
+            self.chat_pool.close()
+        if self.write_behind is not None:
+            self.write_behind.close()
+        if self.credentials is not None:
+            self.credentials.close()
+        self.transport.close()
+
+    def _send(self, method: str, endpoint: str, params: Optional[dict] = None, json_data=None,
+              data: Optional[bytes] = None, headers: Optional[dict] = None,
+              timeout: Optional[float] = None, cancel: Optional[CancellationToken] = None) -> TransportResponse:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
         url = f"{self.base_url}{endpoint}"
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+        content = data
+        if json_data is not None:
+            content = json.dumps(json_data, default=json_serial).encode("utf-8")
+            request_headers["Content-Type"] = "application/json"
+        if content is not None and self.compression is not None:
+            content, content_encoding = self.compression.encode_request(content)
+            if content_encoding:
+                request_headers["Content-Encoding"] = content_encoding
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(cancel=cancel)
+        if timeout is None:
+            timeout = self.timeout
+        remaining = cancel.remaining() if cancel is not None else None
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        token = None
+        if self.credentials is not None:
+            token = self.credentials.token()
+            request_headers["Authorization"] = f"Bearer {token}"
+        response = self._transmit(method, url, request_headers, params, content, timeout, cancel)
+        if response.status_code == 401 and token is not None:
+            # Revoked or expired early: retry once with a token fetched now
+            response.close()
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            request_headers["Authorization"] = f"Bearer {self.credentials.refresh(stale=token)}"
+            response = self._transmit(method, url, request_headers, params, content, timeout, cancel)
+        if response.status_code >= 400:
+            try:
+                body = b"".join(self._iter_body(response, cancel))
+            finally:
+                response.close()
+            try:
+                details = json.loads(body) if body else None
+            except ValueError:
+                details = None
+            raise APIError(f"{response.status_code} {response.reason} for url: {url}",
+                           status_code=response.status_code, response=details)
+        return response
+
+    def _transmit(self, method: str, url: str, headers: dict, params: Optional[dict], content: Optional[bytes],
+                  timeout: Optional[float], cancel: Optional[CancellationToken]) -> TransportResponse:
+        try:
+            return self.transport.request(method, url, headers=headers, params=params, content=content,
+                                          timeout=timeout, cancel=cancel)
+        except TransportError:
+            if cancel is not None and cancel.cancelled:
+                raise cancel.error()
+            raise
+
+    def _iter_body(self, response: TransportResponse, cancel: Optional[CancellationToken] = None):
+        """Yield the decoded response body, decompressing it ourselves when compression is configured."""
+        if self.compression is None:
+            chunks = response.iter_bytes()
+        else:
+            chunks = self.compression.decode_response(response.iter_raw(), response.headers.get("Content-Encoding"))
+        if cancel is None:
+            return chunks
+        return self._guard(chunks, cancel)
+
+    @staticmethod
+    def _guard(chunks, cancel: CancellationToken):
+        # A cancelled read fails or ends early once the transport closes the
+        # connection; report it as a cancellation rather than a network error
+        # or a truncated body.
         try:
-            response = self.session.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            raise ChatbotClientError(f"API request failed: {str(e)}")
+            for chunk in chunks:
+                cancel.raise_if_cancelled()
+                yield chunk
+        except TransportError:
+            if cancel.cancelled:
+                raise cancel.error()
+            raise
+        cancel.raise_if_cancelled()
+
+    def _make_request(self, method: str, endpoint: str, return_raw: bool = False, stream: bool = False, **kwargs):
+        if "json" in kwargs:
+            kwargs["json_data"] = kwargs.pop("json")
+        # cache=False reads past the response cache (the result still replaces the cached one)
+        use_cache = kwargs.pop("cache", True)
+        cancel = kwargs.get("cancel") or current_token()
+        kwargs["cancel"] = cancel
+        route = resolve(method, endpoint)
+        if route is not None and "timeout" not in kwargs and route.timeout_class in self.timeouts:
+            kwargs["timeout"] = self.timeouts[route.timeout_class]
+        if stream:
+            # The caller reads the body as it arrives and must close the response,
+            # which also gives back the scheduler slot
+            releases = []
+            if self.scheduler is not None:
+                priority = self.scheduler.acquire(cancel=cancel)
+                releases.append(partial(self.scheduler.release, priority))
+            permit = None
+            try:
+                if self.limiter is not None:
+                    permit = self.limiter.acquire(route.timeout_class if route else "default", cancel)
+                    releases.insert(0, permit.release)
+                response = self._send(method, endpoint, **kwargs)
+            except BaseException as e:
+                if permit is not None:
+                    permit.release(IGNORED if cancel is not None and cancel.cancelled else classify(e))
+                for release in releases:
+                    release()
+                raise
+            if permit is not None:
+                # Latency of a stream is the time to its headers; the permit is held until it is closed
+                releases[0] = partial(permit.release, rtt=permit.elapsed())
+
+            def on_close():
+                for release in releases:
+                    release()
+            return _DecodedResponse(response, self._iter_body(response, cancel), on_close if releases else None)
+        if route is None:
+            return self._fetch(method, endpoint, return_raw, **kwargs)
+        kwargs["timeout_class"] = route.timeout_class
+        cache_key = None
+        if self.cache_ttl and route.cacheable and not return_raw:
+            cache_key = f"response:{self.base_url}{endpoint}"
+            cached = self.store.get(cache_key) if use_cache else None
+            if cached is not None:
+                return cached
+        if self.retries and route.idempotent:
+            result = retry_call(lambda: self._fetch(method, endpoint, return_raw, **kwargs),
+                                attempts=self.retries + 1, cancel=cancel)
+        else:
+            result = self._fetch(method, endpoint, return_raw, **kwargs)
+        if cache_key is not None and result is not None:
+            self.store.set(cache_key, result, ttl=self.cache_ttl)
+        if isinstance(result, dict) and "totalTokens" in result:
+            self.token_usage.record(result)
+        return result
+
+    def _fetch(self, method: str, endpoint: str, return_raw: bool = False, timeout_class: str = "default",
+               **kwargs):
+        # A slot is held per attempt, so retry backoff does not keep others waiting
+        cancel = kwargs.get("cancel")
+        slot = self.scheduler.slot(cancel=cancel) if self.scheduler is not None else nullcontext()
+        limit = self.limiter.slot(timeout_class, cancel) if self.limiter is not None else nullcontext()
+        with slot, limit:
+            response = self._send(method, endpoint, **kwargs)
+            try:
+                body = b"".join(self._iter_body(response, kwargs.get("cancel")))
+            finally:
+                response.close()
+        if return_raw:
+            return body
+        try:
+            return json_loads(body) if body else None
+        except ValueError as e:
+            raise ChatbotClientError(f"API request failed: invalid JSON response: {str(e)}")
+
+    def _requester(self, cancel: Optional[CancellationToken]) -> Callable:
+        return self._make_request if cancel is None else partial(self._make_request, cancel=cancel)
 
     # Chat operations
-    def create_chat(self, bot_id: str) -> str:
+    def create_chat(self, bot_id: str) -> dict:
+        if self.chat_pool is not None:
+            return self.chat_pool.acquire(bot_id)
         return chat_module.create_chat(self._make_request, bot_id)
 
-    def chat_completion(self, chat_id: str, user_message: str) -> str:
-        return chat_module.chat_completion(self._make_request, chat_id, user_message)
+    def enable_chat_pool(self, **options) -> "ChatPool":
+        """Create chats ahead of time so ``create_chat`` returns at once. See ``ChatPool``."""
+        from .chat.pool import ChatPool
+        self.chat_pool = ChatPool(self._make_request, **options)
+        return self.chat_pool
+
+    def chat_completion(self, chat_id: str, user_message: str, cancel: Optional[CancellationToken] = None,
+                        idempotency_key: Optional[str] = None) -> str:
+        if self.transcripts is not None:
+            self.transcripts.invalidate(chat_id)
+        if idempotency_key is None:
+            return chat_module.chat_completion(self._requester(cancel), chat_id, user_message)
+        # Duplicates attach to the call in flight or get its stored answer
+        return self.deduplicator.run(
+            ("chat_completion", self.base_url, chat_id, user_message, idempotency_key),
+            lambda token: chat_module.chat_completion(self._requester(token), chat_id, user_message,
+                                                      idempotency_key=idempotency_key),
+            cancel=cancel or current_token())
+
+    def stream_chat_completion(self, chat_id: str, user_message: str,
+                               cancel: Optional[CancellationToken] = None) -> Iterator[str]:
+        if self.transcripts is not None:
+            self.transcripts.invalidate(chat_id)
+        return chat_module.stream_chat_completion(self._requester(cancel), chat_id, user_message,
+                                                  on_completion=self.token_usage.record)
+
+    def get_chat(self, chat_id: str) -> dict:
+        if self.transcripts is not None:
+            return self.transcripts.get_chat(chat_id)
+        return chat_module.get_chat(self._make_request, chat_id)
+
+    def get_chat_delta(self, chat_id: str, cursor: Optional[str] = None) -> dict:
+        """
+        Return the completions of a chat added, changed or removed since ``cursor``. See ``TranscriptCache``.
+
+        Raises:
+            ConfigurationError: If ``enable_transcript_cache()`` was not called.
+        """
+        if self.transcripts is None:
+            # Not enabled on demand: that would race between concurrent first calls and change get_chat
+            raise ConfigurationError("get_chat_delta requires enable_transcript_cache()")
+        return self.transcripts.delta(chat_id, cursor)
+
+    def enable_transcript_cache(self, **options) -> "TranscriptCache":
+        """Cache chat transcripts and hand out only what changed. See ``TranscriptCache``."""
+        from .chat.transcript import TranscriptCache
+        self.transcripts = TranscriptCache(self._make_request, **options)
+        return self.transcripts
 
     def delete_chat(self, chat_id: str) -> None:
-        return chat_module.delete_chat(self._make_request, chat_id)
+        result = chat_module.delete_chat(self._make_request, chat_id)
+        if self.chat_history is not None:
+            self.chat_history.remove_chat(chat_id)
+        if self.transcripts is not None:
+            self.transcripts.forget(chat_id)
+        return result
+
+    def bot_feedback(self, chat_id: str, feedback_data: dict) -> Optional[dict]:
+        # Queued feedback has no response yet
+        if self.write_behind is not None:
+            return self.write_behind.bot_feedback(chat_id, feedback_data)
+        return chat_module.bot_feedback(self._make_request, chat_id, feedback_data)
+
+    def enable_write_behind(self, **options) -> "WriteBehindQueue":
+        """Send ``bot_feedback`` and ``update_statistic`` in the background. See ``WriteBehindQueue``."""
+        from .writebehind import WriteBehindQueue, default_journal_path
+        if not options.get("path"):
+            options["path"] = default_journal_path(self.deployment)
+        self.write_behind = WriteBehindQueue(self._make_request, **options)
+        return self.write_behind
+
+    def update_chat_display_name(self, chat_id: str, display_name: str) -> None:
+        result = chat_module.update_chat_display_name(self._make_request, chat_id, display_name)
+        if self.chat_history is not None:
+            self.chat_history.rename(chat_id, display_name)
+        return result
 
     # Bot operations
     def search_bot(self, bot_id: str, query: str) -> dict:
         return bot.search_bot(self._make_request, bot_id, query)
 
+    def search_bots(self, bot_ids: List[str], query: str, **options) -> dict:
+        """Search several bots concurrently and merge the results, cached in the client's store. See ``search_bots``."""
+        from .bot.search import search_bots
+        options.setdefault("store", self.store)
+        return search_bots(self._make_request, bot_ids, query, **options)
+
     def get_bots(self) -> list:
         return bot.get_bots(self._make_request)
 
+    def get_bot_image(self, bot_id: str) -> bytes:
+        return bot.get_bot_image(self._make_request, bot_id)
+
+    def bot_catalog(self, **options) -> "BotCatalog":
+        from .bot.catalog import BotCatalog
+        # Syncs must see new bots at once, not the bot lists cached for cache_ttl
+        return BotCatalog(partial(self._make_request, cache=False), **options)
+
     # Admin operations
     def get_openai_services(self) -> list:
         return openai_services.get_openai_services(self._make_request)
@@ -49,22 +400,133 @@ class ChatbotClient:
     def create_bot(self, bot_data: dict) -> str:
         return bots.create_bot(self._make_request, bot_data)
 
+    def iter_bot_facts(self, bot_id: str, **options) -> Iterator[dict]:
+        return bots.iter_bot_facts(self._make_request, bot_id, **options)
+
+    def import_bot_facts(self, bot_id: str, source: str, **options) -> "BulkReport":
+        from .admin import bulk_facts
+        return bulk_facts.import_bot_facts(self._make_request, bot_id, source, **options)
+
+    def export_bot_facts(self, bot_id: str, destination: str, **options) -> "BulkReport":
+        from .admin import bulk_facts
+        return bulk_facts.export_bot_facts(self._make_request, bot_id, destination, **options)
+
+    def plan_admin_sync(self, desired, **options) -> "SyncPlan":
+        from .admin.sync import plan_sync
+        return plan_sync(self._make_request, desired, **options)
+
+    def sync_admin(self, desired, **options) -> "SyncReport":
+        """Apply a declared set of bots and OpenAI services with minimal writes. See ``admin.sync.sync_admin``."""
+        from .admin.sync import sync_admin
+        report = sync_admin(self._make_request, desired, **options)
+        if report.succeeded:
+            # Cached bot listings may show the old bots
+            self.store.clear("response:")
+        return report
+
     def clear_cache(self):
-        return clear_cache(self._make_request)
+        result = clear_cache(self._make_request)
+        self.store.clear("response:")
+        return result
 
     # Statistic operations
+    def update_statistic(self) -> None:
+        if self.write_behind is not None:
+            return self.write_behind.update_statistic()
+        return statistic.update_statistic(self._make_request)
+
     def get_token_usage(self, **params) -> dict:
         return statistic.get_token_usage(self._make_request, **params)
 
+    def iter_token_usage_statistic(self, **options) -> Iterator[dict]:
+        return statistic.iter_token_usage_statistic(self._make_request, **options)
+
     # System operations
     def get_system_status(self) -> dict:
-        return system.get_system_status(self._make_request)
+        watcher = self.status_watcher
+        if watcher is not None and watcher.is_fresh():
+            return watcher.snapshot.system_status
+        return system.get_current_system_status(self._make_request)
+
+    def enable_status_watcher(self, **options) -> "SystemStatusWatcher":
+        """Poll the system status in the background and answer status checks locally. See ``SystemStatusWatcher``."""
+        from .system.watcher import SystemStatusWatcher
+        if self.status_watcher is not None:
+            self.status_watcher.stop()
+        self.status_watcher = SystemStatusWatcher(self._make_request, **options).start()
+        return self.status_watcher
 
     # User operations
     def get_current_user(self) -> dict:
         return user.get_current_user(self._make_request)
 
+    def iter_current_user_chats(self, **options) -> Iterator[dict]:
+        return user.iter_current_user_chats(self._make_request, **options)
+
     def update_user_settings(self, settings: dict) -> None:
         return user.update_user_settings(self._make_request)
 
+    def enable_chat_history_index(self, sync: bool = True, **options) -> "ChatHistoryIndex":
+        """Keep a local, searchable index of the current user's chats. See ``ChatHistoryIndex``."""
+        from .user.history import ChatHistoryIndex
+        self.chat_history = ChatHistoryIndex(self._make_request, **options)
+        if sync:
+            self.chat_history.sync()
+        return self.chat_history
+
+    def enforce_retention(self, **options) -> "RetentionReport":
+        from .user.retention import enforce_retention
+        report = enforce_retention(self._make_request, **options)
+        if self.chat_history is not None and not report.dry_run:
+            self.chat_history.sync()
+        if self.transcripts is not None and not report.dry_run:
+            self.transcripts.forget()
+        return report
+
+    def update_chat_is_favorite(self, chat_id: str, is_favorite: bool) -> None:
+        user.update_chat_is_favorite(self._make_request, chat_id, is_favorite)
+        if self.chat_history is not None:
+            self.chat_history.set_favorite(chat_id, is_favorite)
+
+    def delete_current_user_chats(self, keep_favorites: bool) -> None:
+        user.delete_current_user_chats(self._make_request, keep_favorites)
+        if self.chat_pool is not None:
+            self.chat_pool.discard()
+        if self.transcripts is not None:
+            self.transcripts.forget()
+        if self.chat_history is not None:
+            self.chat_history.remove_chats(keep_favorites)
+
+    def delete_current_user_chat_by_id(self, chat_id: str) -> None:
+        user.delete_current_user_chat_by_id(self._make_request, chat_id)
+        if self.chat_history is not None:
+            self.chat_history.remove_chat(chat_id)
+        if self.transcripts is not None:
+            self.transcripts.forget(chat_id)
+
+    def delete_current_user_chat_completion_by_id(self, chat_id: str, completion_id: str) -> None:
+        user.delete_current_user_chat_completion_by_id(self._make_request, chat_id, completion_id)
+        if self.chat_history is not None:
+            self.chat_history.remove_completion(chat_id)
+        if self.transcripts is not None:
+            self.transcripts.remove_completion(chat_id, completion_id)
+
+    def delete_current_user_chats_by_bot_id(self, bot_id: str, keep_favorites: bool) -> None:
+        user.delete_current_user_chats_by_bot_id(self._make_request, bot_id, keep_favorites)
+        if self.chat_pool is not None:
+            self.chat_pool.discard(bot_id)
+        if self.transcripts is not None:
+            self.transcripts.forget()
+        if self.chat_history is not None:
+            self.chat_history.remove_chats(keep_favorites, bot_id=bot_id)
+
+    def delete_current_user_chats_by_bot_id_and_system_message_id(self, bot_id: str, system_message_id: str,
+                                                                  keep_favorites: bool) -> None:
+        user.delete_current_user_chats_by_bot_id_and_system_message_id(self._make_request, bot_id,
+                                                                       system_message_id, keep_favorites)
+        if self.transcripts is not None:
+            self.transcripts.forget()
+        if self.chat_history is not None:
+            self.chat_history.remove_chats(keep_favorites, bot_id=bot_id, user_system_message_id=system_message_id)
+
     # Add more methods here as needed for other operations
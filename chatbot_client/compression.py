@@ -0,0 +1,243 @@
+import gzip
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+from .exceptions import ConfigurationError, TransportError
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+_DECODE_ERRORS = (zlib.error,)
+if brotli is not None:
+    _DECODE_ERRORS += (brotli.error,)
+if zstandard is not None:
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+def available_encodings() -> Sequence[str]:
+    """Return the content encodings that can be decoded in this environment, best first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.extend(["gzip", "deflate"])
+    return encodings
+
+class _IdentityDecoder:
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int):
+        self._decoder = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decoder.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._decoder.flush()
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._decoder = brotli.Decompressor()
+        # brotli exposes process(), brotlicffi exposes decompress()
+        self._process = getattr(self._decoder, "process", None) or self._decoder.decompress
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._process(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+class _ZstdDecoder:
+    def __init__(self):
+        self._decoder = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decoder.decompress(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+def _single_decoder(encoding: str):
+    if encoding in ("", "identity"):
+        return _IdentityDecoder()
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    raise ConfigurationError(f"Unsupported content encoding: {encoding}")
+
+def decode_stream(chunks: Iterable[bytes], content_encoding: Optional[str]) -> Iterator[bytes]:
+    """
+    Incrementally decode a response body.
+
+    Args:
+        chunks (Iterable[bytes]): Body chunks as received on the wire.
+        content_encoding (str, optional): Value of the Content-Encoding header.
+            Stacked encodings such as ``"gzip, br"`` are undone in reverse order.
+
+    Yields:
+        bytes: Decoded chunks. Empty chunks are skipped.
+    """
+    encodings = [e.strip().lower() for e in (content_encoding or "").split(",") if e.strip()]
+    decoders = [_single_decoder(e) for e in reversed(encodings)]
+    if not decoders:
+        yield from chunks
+        return
+    try:
+        for chunk in chunks:
+            for decoder in decoders:
+                chunk = decoder.decompress(chunk)
+            if chunk:
+                yield chunk
+        tail = b""
+        for decoder in decoders:
+            tail = decoder.decompress(tail) + decoder.flush()
+    except _DECODE_ERRORS as e:
+        raise TransportError(f"could not decode {content_encoding} response: {str(e)}")
+    if tail:
+        yield tail
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress a request body.
+
+    Args:
+        data (bytes): Body to compress.
+        encoding (str): One of ``gzip``, ``deflate``, ``br`` or ``zstd``.
+        level (int, optional): Codec specific compression level.
+
+    Returns:
+        bytes: The compressed body.
+
+    Raises:
+        ConfigurationError: If the encoding is not supported here.
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6 if level is None else level)
+    if encoding == "deflate":
+        return zlib.compress(data, 6 if level is None else level)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data) if level is None else brotli.compress(data, quality=level)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    raise ConfigurationError(f"Unsupported content encoding: {encoding}")
+
+class CompressionStats:
+    """Thread-safe counters of bytes on the wire versus decoded size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.responses = 0
+            self.response_wire_bytes = 0
+            self.response_decoded_bytes = 0
+            self.requests_compressed = 0
+            self.request_wire_bytes = 0
+            self.request_raw_bytes = 0
+
+    def record_response(self, wire_bytes: int, decoded_bytes: int) -> None:
+        with self._lock:
+            self.responses += 1
+            self.response_wire_bytes += wire_bytes
+            self.response_decoded_bytes += decoded_bytes
+
+    def record_request(self, wire_bytes: int, raw_bytes: int) -> None:
+        with self._lock:
+            if wire_bytes != raw_bytes:
+                self.requests_compressed += 1
+            self.request_wire_bytes += wire_bytes
+            self.request_raw_bytes += raw_bytes
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return the current counters and the compression ratios."""
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "response_wire_bytes": self.response_wire_bytes,
+                "response_decoded_bytes": self.response_decoded_bytes,
+                "response_ratio": (self.response_wire_bytes / self.response_decoded_bytes
+                                   if self.response_decoded_bytes else 1.0),
+                "requests_compressed": self.requests_compressed,
+                "request_wire_bytes": self.request_wire_bytes,
+                "request_raw_bytes": self.request_raw_bytes,
+                "request_ratio": (self.request_wire_bytes / self.request_raw_bytes
+                                  if self.request_raw_bytes else 1.0),
+            }
+
+class CompressionConfig:
+    """
+    Compression settings for ``ChatbotClient``.
+
+    Args:
+        accept (Sequence[str], optional): Encodings to advertise in Accept-Encoding,
+            in order of preference. Defaults to every encoding available here.
+        request_encoding (str, optional): Encoding used for large request bodies,
+            or None to never compress requests. The backend must accept it.
+        min_request_size (int): Smallest body, in bytes, that gets compressed.
+            Defaults to 16 KiB.
+        level (int, optional): Compression level for request bodies.
+    """
+
+    def __init__(self, accept: Optional[Sequence[str]] = None, request_encoding: Optional[str] = None,
+                 min_request_size: int = 16 * 1024, level: Optional[int] = None):
+        supported = available_encodings()
+        accept = list(accept) if accept is not None else list(supported)
+        for encoding in accept + ([request_encoding] if request_encoding else []):
+            if encoding not in supported:
+                raise ConfigurationError(f"Content encoding '{encoding}' is not available")
+        self.accept = accept
+        self.request_encoding = request_encoding
+        self.min_request_size = min_request_size
+        self.level = level
+        self.stats = CompressionStats()
+
+    @property
+    def accept_encoding(self) -> str:
+        return ", ".join(self.accept) if self.accept else "identity"
+
+    def encode_request(self, content: bytes):
+        """Return ``(body, content_encoding)``, compressing the body if it is large enough."""
+        if self.request_encoding and len(content) >= self.min_request_size:
+            compressed = compress(content, self.request_encoding, self.level)
+            self.stats.record_request(len(compressed), len(content))
+            return compressed, self.request_encoding
+        self.stats.record_request(len(content), len(content))
+        return content, None
+
+    def decode_response(self, chunks: Iterable[bytes], content_encoding: Optional[str]) -> Iterator[bytes]:
+        """Stream-decode a response body while recording wire and decoded sizes."""
+        counted = {"wire": 0, "decoded": 0}
+
+        def counting(source):
+            for chunk in source:
+                counted["wire"] += len(chunk)
+                yield chunk
+
+        try:
+            for chunk in decode_stream(counting(chunks), content_encoding):
+                counted["decoded"] += len(chunk)
+                yield chunk
+        finally:
+            self.stats.record_response(counted["wire"], counted["decoded"])
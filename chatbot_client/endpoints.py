@@ -0,0 +1,247 @@
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+PAGING_QUERY = {
+    "search_for": "SearchFor",
+    "order_by": "OrderBy",
+    "page_number": "PageNumber",
+    "page_size": "PageSize",
+}
+
+def _encode_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+_PLACEHOLDER = re.compile(r"\{(\w+)(?::(path))?\}")
+
+class Endpoint:
+    """
+    Declarative description of one backend operation.
+
+    The path template is compiled once into literal and placeholder parts, so
+    building a URL is a join instead of an f-string plus a params dict that the
+    HTTP library encodes again on every call. ``None`` query values are dropped.
+
+    Args:
+        name (str): Dotted operation name, e.g. ``"chat.chat_completion"``.
+        method (str): HTTP method.
+        path (str): Path template such as ``"/api/chats/{chat_id}"``. A
+            ``{name:path}`` placeholder may contain slashes.
+        query (Dict[str, str], optional): Maps Python argument names to query parameter names.
+        response_model (str, optional): Name of the model in ``chatbot_client.models``.
+        idempotent (bool, optional): Safe to retry. Defaults to True for GET, PUT and DELETE.
+        cacheable (bool): Responses may be cached by the client. Defaults to False.
+        timeout_class (str): One of ``"fast"``, ``"default"`` or ``"slow"``.
+    """
+    __slots__ = ("name", "method", "path", "query", "response_model", "idempotent", "cacheable",
+                 "timeout_class", "_parts", "_pattern_source", "_pattern", "_static_prefix")
+
+    def __init__(self, name: str, method: str, path: str, query: Optional[Dict[str, str]] = None,
+                 response_model: Optional[str] = None, idempotent: Optional[bool] = None,
+                 cacheable: bool = False, timeout_class: str = "default"):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.query = tuple((query or {}).items())
+        self.response_model = response_model
+        self.idempotent = method in ("GET", "PUT", "DELETE") if idempotent is None else idempotent
+        self.cacheable = cacheable
+        self.timeout_class = timeout_class
+        parts = []
+        pattern = ["^"]
+        position = 0
+        for match in _PLACEHOLDER.finditer(path):
+            literal = path[position:match.start()]
+            parts.append(literal)
+            parts.append("/" if match.group(2) else "")
+            pattern.append(re.escape(literal))
+            pattern.append("(.+)" if match.group(2) else "([^/]+)")
+            position = match.end()
+        parts.append(path[position:])
+        pattern.append(re.escape(path[position:]) + "$")
+        # Even indexes are literals, odd indexes are the characters kept unquoted for a placeholder
+        self._parts = tuple(parts)
+        # Compiled on first match so importing the registry stays cheap
+        self._pattern_source = "".join(pattern)
+        self._pattern = None
+        self._static_prefix = len(path) - sum(len(m.group(0)) for m in _PLACEHOLDER.finditer(path))
+
+    @property
+    def is_static(self) -> bool:
+        return len(self._parts) == 1
+
+    def url(self, *path_args: Any, **query: Any) -> str:
+        """
+        Build the request path with its query string.
+
+        Args:
+            *path_args: Values for the path placeholders, in template order.
+            **query: Query arguments by their Python name; ``None`` values are dropped.
+
+        Returns:
+            str: The path relative to the client's base URL.
+        """
+        parts = self._parts
+        if len(path_args) != len(parts) // 2:
+            raise TypeError(f"{self.name} expects {len(parts) // 2} path arguments, got {len(path_args)}")
+        if path_args:
+            pieces = [parts[0]]
+            for i, value in enumerate(path_args):
+                pieces.append(quote(_encode_value(value), safe=parts[2 * i + 1]))
+                pieces.append(parts[2 * i + 2])
+            url = "".join(pieces)
+        else:
+            url = parts[0]
+        if query:
+            encoded = []
+            for python_name, api_name in self.query:
+                value = query.get(python_name)
+                if value is not None:
+                    encoded.append(f"{api_name}={quote(_encode_value(value), safe='')}")
+            if encoded:
+                url = f"{url}?{'&'.join(encoded)}"
+        return url
+
+    def match(self, path: str) -> bool:
+        if self._pattern is None:
+            self._pattern = re.compile(self._pattern_source)
+        return self._pattern.match(path) is not None
+
+    def model(self):
+        """Return the response model class, importing the models module on first use."""
+        if self.response_model is None:
+            return None
+        from . import models
+        return getattr(models, self.response_model)
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.name!r}, {self.method} {self.path})"
+
+ENDPOINTS: Dict[str, Endpoint] = {endpoint.name: endpoint for endpoint in (
+    # Chat
+    Endpoint("chat.create_chat", "POST", "/api/chats", response_model="ChatCreateResponse"),
+    Endpoint("chat.create_chat_by_bot_code", "POST", "/api/chats/create/bybotcode",
+             response_model="ChatCreateResponse"),
+    Endpoint("chat.chat_completion", "POST", "/api/chats/{chat_id}/completions",
+             response_model="ChatCompletionResponse", timeout_class="slow"),
+    Endpoint("chat.get_chat", "GET", "/api/chats/{chat_id}"),
+    Endpoint("chat.delete_chat", "DELETE", "/api/chats/{chat_id}"),
+    Endpoint("chat.bot_feedback", "POST", "/api/chats/{chat_id}/feedback", response_model="BotFeedbackResponse"),
+    Endpoint("chat.get_open_chat_bot_id", "GET", "/api/chats/OpenChatBotId", cacheable=True, timeout_class="fast"),
+    Endpoint("chat.update_chat_display_name", "PUT", "/api/chats/{chat_id}/displayName"),
+    Endpoint("chat.update_chat_user_system_message", "PUT", "/api/chats/{chat_id}/userSystemMessage"),
+    Endpoint("chat.delete_chat_user_system_message", "DELETE", "/api/chats/{chat_id}/userSystemMessage"),
+    Endpoint("chat.create_chat_one_time_ticket", "POST", "/api/chats/{chat_id}/tickets", timeout_class="fast"),
+    Endpoint("chat.get_chat_download", "GET", "/api/chats/{chat_id}/downloads/{path:path}",
+             query={"ticket": "ticket"}, timeout_class="slow"),
+    # Bot
+    Endpoint("bot.search_bot", "POST", "/api/bots/{bot_id}/search", idempotent=True, timeout_class="slow"),
+    Endpoint("bot.get_bots", "GET", "/api/bots", query=PAGING_QUERY, response_model="GetBotsResponse",
+             cacheable=True),
+    Endpoint("bot.get_bots_by_start_bot", "GET", "/api/bots/bystartbot/{start_bot_id}", query=PAGING_QUERY,
+             response_model="GetBotsResponse", cacheable=True),
+    Endpoint("bot.get_start_bots", "GET", "/api/bots/startbots", query=PAGING_QUERY,
+             response_model="GetBotsResponse", cacheable=True),
+    Endpoint("bot.get_bot_image", "GET", "/api/bots/botimage/{bot_id}", cacheable=True),
+    Endpoint("bot.is_stop_all_bots", "GET", "/api/bots/stop", timeout_class="fast"),
+    # Admin
+    Endpoint("admin.bots.get_bots", "GET", "/api/admin/bots", query=PAGING_QUERY),
+    Endpoint("admin.bots.create_bot", "POST", "/api/admin/bots"),
+    Endpoint("admin.bots.get_bot", "GET", "/api/admin/bots/{bot_id}"),
+    Endpoint("admin.bots.update_bot", "PUT", "/api/admin/bots/{bot_id}"),
+    Endpoint("admin.bots.delete_bot", "DELETE", "/api/admin/bots/{bot_id}"),
+    Endpoint("admin.bots.get_bot_facts", "GET", "/api/admin/bots/{bot_id}/facts", query=PAGING_QUERY),
+    Endpoint("admin.bots.create_bot_fact", "POST", "/api/admin/bots/{bot_id}/facts"),
+    Endpoint("admin.openai_services.get_openai_services", "GET", "/api/admin/openAiServices", query=PAGING_QUERY),
+    Endpoint("admin.openai_services.create_openai_service", "POST", "/api/admin/openAiServices"),
+    Endpoint("admin.openai_services.get_openai_service", "GET", "/api/admin/openAiServices/{service_id}"),
+    Endpoint("admin.openai_services.update_openai_service", "PUT", "/api/admin/openAiServices/{service_id}"),
+    Endpoint("admin.openai_services.delete_openai_service", "DELETE", "/api/admin/openAiService/{service_id}"),
+    # User
+    Endpoint("user.get_current_user", "GET", "/api/users/current", response_model="CurrentUser",
+             timeout_class="fast"),
+    Endpoint("user.update_current_user", "PUT", "/api/users/current"),
+    Endpoint("user.accept_terms", "PUT", "/api/users/current/acceptTerms"),
+    Endpoint("user.delete_current_user_chats", "DELETE", "/api/users/current/chats/all/{keep_favorites}"),
+    Endpoint("user.delete_current_user_chat_by_id", "DELETE", "/api/users/current/chats/byid/{chat_id}"),
+    Endpoint("user.delete_current_user_chat_completion_by_id", "DELETE",
+             "/api/users/current/chats/{chat_id}/completion/{completion_id}"),
+    Endpoint("user.delete_current_user_chats_by_bot_id", "DELETE",
+             "/api/users/current/chats/bybot/{bot_id}/{keep_favorites}"),
+    Endpoint("user.delete_current_user_chats_by_bot_id_and_system_message_id", "DELETE",
+             "/api/users/current/chats/bybot/{bot_id}/{system_message_id}/{keep_favorites}"),
+    Endpoint("user.get_current_user_chats_by_bot", "GET", "/api/users/current/chats/{bot_id}",
+             query={"only_favorites": "OnlyFavorites", **PAGING_QUERY}),
+    Endpoint("user.get_current_user_chats_by_bot_and_systemprompt", "GET",
+             "/api/users/current/chats/{bot_id}/{user_systemprompt_id}",
+             query={"only_favorites": "OnlyFavorites", **PAGING_QUERY}),
+    Endpoint("user.get_current_user_chats", "GET", "/api/users/current/chats",
+             query={"only_favorites": "OnlyFavorites", **PAGING_QUERY}),
+    Endpoint("user.update_chat_is_favorite", "PUT", "/api/users/current/chats/{chat_id}/isfavorite"),
+    Endpoint("user.get_user_system_messages", "GET", "/api/users/current/userSystemMessage", query=PAGING_QUERY),
+    Endpoint("user.create_user_system_message", "POST", "/api/users/current/userSystemMessage"),
+    Endpoint("user.get_user_system_message", "GET", "/api/users/current/userSystemMessage/{message_id}",
+             response_model="UserSystemMessage"),
+    Endpoint("user.update_user_system_message", "PUT", "/api/users/current/userSystemMessage/{message_id}"),
+    Endpoint("user.delete_user_system_message", "DELETE", "/api/users/current/userSystemMessage/{message_id}"),
+    Endpoint("user.get_user_system_message_count", "GET", "/api/users/current/userSystemMessageCount",
+             timeout_class="fast"),
+    # Statistic
+    Endpoint("statistic.update_statistic", "PUT", "/api/statistic"),
+    Endpoint("statistic.get_token_usage_statistic", "GET", "/api/statistic/tokenUsageStatistic", query={
+        "bot_id": "BotId",
+        "token_usage_type_id": "TokenUsageTypeId",
+        "from_request_date": "FromRequestDate",
+        "to_request_date": "ToRequestDate",
+        **PAGING_QUERY,
+    }, timeout_class="slow"),
+    # System
+    Endpoint("system.get_current_system_status", "GET", "/api/System/status/current", timeout_class="fast"),
+    Endpoint("system.set_current_system_status", "PUT", "/api/System/status/current"),
+    # Cache
+    Endpoint("cache.clear_cache", "DELETE", "/cache"),
+)}
+
+_STATIC_ROUTES: Dict[Tuple[str, str], Endpoint] = {
+    (endpoint.method, endpoint.path): endpoint for endpoint in ENDPOINTS.values() if endpoint.is_static
+}
+# Templates with more literal characters are tried first, so /api/bots/startbots wins over /api/bots/{bot_id}
+_DYNAMIC_ROUTES = sorted((endpoint for endpoint in ENDPOINTS.values() if not endpoint.is_static),
+                         key=lambda endpoint: endpoint._static_prefix, reverse=True)
+
+@lru_cache(maxsize=4096)
+def _resolve_path(method: str, path: str) -> Optional[Endpoint]:
+    endpoint = _STATIC_ROUTES.get((method, path))
+    if endpoint is not None:
+        return endpoint
+    for endpoint in _DYNAMIC_ROUTES:
+        if endpoint.method == method and endpoint.match(path):
+            return endpoint
+    return None
+
+def resolve(method: str, url: str) -> Optional[Endpoint]:
+    """
+    Find the registered endpoint for a request path.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Request path, optionally with a query string.
+
+    Returns:
+        Optional[Endpoint]: The matching endpoint, or None for unregistered paths.
+    """
+    return _resolve_path(method, url.split("?", 1)[0])
+
+def endpoint(name: str) -> Endpoint:
+    """Return the registered endpoint with the given dotted name."""
+    return ENDPOINTS[name]
+
+def iter_endpoints(predicate: Optional[Callable[[Endpoint], bool]] = None):
+    """Iterate over the registered endpoints, optionally filtered by ``predicate``."""
+    return (e for e in ENDPOINTS.values() if predicate is None or predicate(e))
@@ -64,4 +64,30 @@ class UserOperationError(ChatbotClientError):
 class ConfigurationError(ChatbotClientError):
     """Exception raised for configuration errors."""
     def __init__(self, message: str):
-        super().__init__(f"Configuration error: {message}")
\ No newline at end of file
+        super().__init__(f"Configuration error: {message}")
+
+class TransportError(ChatbotClientError):
+    """
+    Exception raised when the underlying HTTP transport fails.
+
+    ``sent`` is False only when the request certainly never reached the server
+    (the connection could not be opened); otherwise it may have been processed.
+    """
+    def __init__(self, message: str, sent: bool = True):
+        self.sent = sent
+        super().__init__(f"API request failed: {message}")
+
+class CancelledError(ChatbotClientError):
+    """Exception raised when an operation is abandoned through its cancellation token."""
+    def __init__(self, message: str = "cancelled"):
+        super().__init__(f"Operation cancelled: {message}")
+
+class DeadlineExceededError(CancelledError):
+    """Exception raised when an operation runs past the deadline of its cancellation token."""
+    def __init__(self, message: str = "the operation did not finish in time"):
+        ChatbotClientError.__init__(self, f"Deadline exceeded: {message}")
+
+class ReplayError(ChatbotClientError):
+    """Exception raised when a replayed request has no recorded response."""
+    def __init__(self, message: str):
+        super().__init__(f"No recorded response for {message}")
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Optional, Sequence
+from .cancellation import CancellationToken
+from .store import StateStore, MemoryStore
+
+class _Call:
+    def __init__(self):
+        self.token = CancellationToken()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.participants = 0
+
+class Deduplicator:
+    """
+    Runs a call at most once for every caller presenting the same key.
+
+    A duplicate arriving while the first call is in flight waits for and
+    shares its result, or its error. After success the result is kept in the
+    store for ``window`` seconds and returned to later duplicates without a
+    request. With a ``SQLiteStore`` this also holds across worker processes:
+    the first process marks the key as pending and the others poll the store
+    until the result appears.
+
+    The call itself runs in a background thread, so each caller can give up
+    through its own cancellation token. The upstream request is cancelled
+    only when every caller waiting for it has given up.
+
+    Args:
+        store (StateStore, optional): Where pending markers and results are kept. Defaults to an in-process store.
+        window (float, optional): Seconds a successful result is reused. Defaults to 30.
+        pending_ttl (float, optional): Seconds after which a pending marker of a
+            process that died is ignored. Defaults to 600.
+        poll_interval (float, optional): Seconds between checks while waiting. Defaults to 0.05.
+    """
+
+    def __init__(self, store: Optional[StateStore] = None, window: float = 30.0, pending_ttl: float = 600.0,
+                 poll_interval: float = 0.05):
+        self.store = store or MemoryStore()
+        self.window = window
+        self.pending_ttl = pending_ttl
+        self.poll_interval = poll_interval
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._owner = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(parts: Sequence[Any]) -> str:
+        """Store key for the given key parts."""
+        digest = hashlib.sha256(json.dumps(list(parts), sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"idempotency:{digest}"
+
+    def run(self, parts: Sequence[Any], func: Callable[[CancellationToken], Any],
+            cancel: Optional[CancellationToken] = None) -> Any:
+        """
+        Return the result of ``func`` for these key parts, calling it only if no duplicate is running or stored.
+
+        Args:
+            parts (Sequence[Any]): Values identifying the call, e.g. ``(chat_id, user_message, key)``.
+            func (Callable[[CancellationToken], Any]): Makes the call; must honour the token it is given.
+                Its result must be JSON serializable.
+            cancel (CancellationToken, optional): Stops this caller from waiting.
+
+        Returns:
+            Any: The result of the first call with these key parts.
+
+        Raises:
+            CancelledError: If ``cancel`` fires first.
+            Exception: Whatever the shared call raised.
+        """
+        key = self.key(parts)
+        while True:
+            stored = self.store.get(key)
+            if stored is not None and stored.get("state") == "done" and stored["until"] > time.time():
+                self.hits += 1
+                return stored["result"]
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None and self._claim(key):
+                    call = self._calls[key] = _Call()
+                    self.misses += 1
+                    thread = threading.Thread(target=copy_context().run, args=(self._execute, key, call, func),
+                                              daemon=True)
+                    thread.start()
+                elif call is not None:
+                    self.hits += 1
+                if call is not None:
+                    call.participants += 1
+            if call is not None:
+                return self._wait(call, cancel)
+            # Another process is running it: wait for its result, or take over if it gives up
+            while True:
+                if cancel is not None:
+                    cancel.wait(self.poll_interval)
+                else:
+                    time.sleep(self.poll_interval)
+                stored = self.store.get(key)
+                if stored is None or stored.get("state") == "done" or stored.get("owner") == self._owner:
+                    break
+
+    def _claim(self, key: str) -> bool:
+        def claim(current):
+            # update() rewrites the value with the pending TTL either way, so a
+            # result's own expiry is kept in "until"
+            if current is not None and (current.get("state") != "done" or current["until"] > time.time()):
+                return current, False
+            return {"state": "pending", "owner": self._owner}, True
+        return self.store.update(key, claim, ttl=self.pending_ttl)
+
+    def _execute(self, key: str, call: _Call, func: Callable[[CancellationToken], Any]) -> None:
+        try:
+            call.result = func(call.token)
+            self.store.set(key, {"state": "done", "result": call.result, "until": time.time() + self.window},
+                           ttl=self.window)
+        except BaseException as e:
+            call.error = e
+            self.store.delete(key)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _wait(self, call: _Call, cancel: Optional[CancellationToken]) -> Any:
+        try:
+            while not call.done.wait(self.poll_interval if cancel is not None else None):
+                cancel.raise_if_cancelled()
+        except BaseException:
+            with self._lock:
+                call.participants -= 1
+                if call.participants == 0:
+                    call.token.cancel("all callers cancelled")
+            raise
+        if call.error is not None:
+            raise call.error
+        return call.result
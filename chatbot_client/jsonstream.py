@@ -0,0 +1,194 @@
+import codecs
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Type
+from .exceptions import ChatbotClientError
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+# Consumed text is dropped from the buffer once this much has piled up
+_COMPACT_AT = 64 * 1024
+
+class _Reader:
+    """Decoded text of a chunked body with a read position, filled only as far as parsing needs."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.pos >= _COMPACT_AT:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.text += self._utf8.decode(chunk)
+                return True
+        self.text += self._utf8.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or "" at the end of the body."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            raise _invalid(f"expected {' or '.join(map(repr, characters))} at {self.pos}, got {character!r}")
+        self.pos += 1
+        return character
+
+    def value(self) -> Any:
+        """Decode the JSON value at the read position, reading more of the body until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except ValueError as e:
+                if self.fill():
+                    continue
+                raise _invalid(str(e))
+            # A number at the end of the text may continue in the next chunk
+            if end < len(self.text) or not self.fill():
+                self.pos = end
+                return value
+
+def _invalid(detail: str) -> ChatbotClientError:
+    return ChatbotClientError(f"API request failed: invalid JSON response: {detail}")
+
+class StreamedPage:
+    """
+    Paging result whose ``items`` are decoded one by one while the response is still arriving.
+
+    Iterating yields each item as soon as its last byte is read, so the
+    first item is available after the first chunk and memory holds one item
+    plus the read buffer rather than the whole page. The other fields of the
+    page (``totalPageCount``, ``hasNext``, ...) are collected in ``envelope``;
+    fields the backend sends after ``items`` are only there once iteration
+    has finished. A page can be iterated once. The response is closed when
+    iteration ends or ``close`` is called.
+
+    Args:
+        chunks (Iterable[bytes]): Response body, e.g. ``response.iter_bytes()``.
+        field (str, optional): Name of the array to stream. Defaults to ``"items"``.
+        item_type (type, optional): Pydantic model each item is validated into.
+        close (Callable, optional): Called once when the page is done with, to release the response.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], field: str = "items", item_type: Optional[Type] = None,
+                 close: Optional[Callable[[], None]] = None):
+        self._reader = _Reader(chunks)
+        self.field = field
+        self.item_type = item_type
+        self._close = close
+        self.envelope: Dict[str, Any] = {}
+        self._started = False
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._started:
+            raise ChatbotClientError("A streamed page can only be iterated once")
+        self._started = True
+        try:
+            yield from self._parse()
+        finally:
+            self.close()
+
+    def _parse(self) -> Iterator[Any]:
+        reader = self._reader
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.pos += 1
+            return
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise _invalid(f"expected an object key at {reader.pos}")
+            reader.expect(":")
+            if key == self.field and reader.peek() == "[":
+                yield from self._items()
+            else:
+                self.envelope[key] = reader.value()
+            if reader.expect(",}") == "}":
+                break
+        if reader.peek():
+            raise _invalid(f"extra data at {reader.pos}")
+
+    def _items(self) -> Iterator[Any]:
+        reader = self._reader
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.pos += 1
+            return
+        validate = self.item_type.model_validate if self.item_type is not None else None
+        while True:
+            item = reader.value()
+            yield validate(item) if validate is not None else item
+            if reader.expect(",]") == "]":
+                return
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.envelope.get(key, default)
+
+    def close(self) -> None:
+        close, self._close = self._close, None
+        if close is not None:
+            close()
+
+def stream_page(make_request: Callable, method: str, url: str, field: str = "items",
+                item_type: Optional[Type] = None) -> StreamedPage:
+    """
+    Request a paged endpoint and return the page with its items streamed.
+
+    Args:
+        make_request (Callable): Function to make API requests; must support ``stream=True``.
+        method (str): HTTP method.
+        url (str): Endpoint path with query, e.g. from ``Endpoint.url``.
+        field (str, optional): Name of the array to stream. Defaults to ``"items"``.
+        item_type (type, optional): Pydantic model each item is validated into.
+
+    Returns:
+        StreamedPage: The page; iterate it to the end or close it.
+
+    Raises:
+        APIError: If the API request fails.
+    """
+    response = make_request(method, url, stream=True)
+    return StreamedPage(response.iter_bytes(), field=field, item_type=item_type, close=response.close)
+
+def iter_streamed_items(open_page: Callable[[int], StreamedPage], start_page: int = 1) -> Iterator[Any]:
+    """
+    Iterate over the items of every page of a paged endpoint, streaming each page.
+
+    Unlike ``paging.iter_items`` pages are read one after the other, since a
+    page fetched ahead would have to be buffered whole.
+
+    Args:
+        open_page (Callable[[int], StreamedPage]): Returns the page with the given number, e.g.
+            ``lambda n: stream_page(make_request, "GET", route.url(page_number=n, page_size=1000))``.
+        start_page (int, optional): First page number to fetch. Defaults to 1.
+
+    Yields:
+        Any: Items in page order.
+    """
+    page_number = start_page
+    while True:
+        page = open_page(page_number)
+        try:
+            yield from page
+        finally:
+            page.close()
+        total_pages = page.get("totalPageCount")
+        if (page_number >= total_pages) if total_pages is not None else not page.get("hasNext"):
+            return
+        page_number += 1
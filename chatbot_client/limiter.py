@@ -0,0 +1,268 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from .exceptions import APIError, ConfigurationError, TransportError
+
+if TYPE_CHECKING:
+    from .cancellation import CancellationToken
+
+AIMD = "aimd"
+GRADIENT = "gradient"
+
+# Outcomes of a request, as reported to the limiter
+OK = "ok"
+DROPPED = "dropped"  # 429, 5xx or a network failure: the backend is overloaded
+IGNORED = "ignored"  # Cancelled or failed on our side: says nothing about the backend
+
+# Relative rise of the latency baseline per second without faster samples
+_BASELINE_DRIFT = 0.002
+
+def classify(error: Optional[BaseException]) -> str:
+    """Map the exception a request raised (None if it succeeded) to its limiter outcome."""
+    if error is None:
+        return OK
+    if isinstance(error, APIError):
+        status = error.status_code or 0
+        return DROPPED if status == 429 or status >= 500 else OK
+    if isinstance(error, TransportError):
+        return DROPPED
+    return IGNORED
+
+class _ClassLimit:
+    def __init__(self, limit: float, history: int):
+        self.limit = limit
+        self.in_flight = 0
+        # Reentrant: a token that already fired runs the on_cancel wake-up right away, lock held
+        self.condition = threading.Condition(threading.RLock())
+        # Current window
+        self.samples: List[float] = []
+        self.drops = 0
+        self.peak_in_flight = 0
+        self.window_started = time.monotonic()
+        # Window average latency and the baseline it is compared with
+        self.short_rtt: Optional[float] = None
+        self.long_rtt: Optional[float] = None
+        self.completed = 0
+        self.dropped = 0
+        self.history: Deque[Tuple[float, float, Optional[float], int]] = deque(maxlen=history)
+
+class _Permit:
+    """One admitted request. ``release`` must be called exactly once; later calls do nothing."""
+
+    __slots__ = ("_limiter", "_timeout_class", "_started", "_released")
+
+    def __init__(self, limiter: "AdaptiveLimiter", timeout_class: str):
+        self._limiter = limiter
+        self._timeout_class = timeout_class
+        self._started = time.monotonic()
+        self._released = False
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def release(self, outcome: str = OK, rtt: Optional[float] = None) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._limiter._release(self._timeout_class, outcome, self.elapsed() if rtt is None else rtt)
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit per endpoint timeout class that follows what the backend can take.
+
+    Requests wait until fewer than the current limit of their class
+    (``"fast"``, ``"default"`` or ``"slow"``) are in flight. The limit is
+    adjusted once per window of ``window`` completed requests (or
+    ``window_time`` seconds) from their average latency against the baseline,
+    the lowest window average seen (slowly drifting up), and from the share of
+    429, 5xx and network failures:
+
+    - ``"aimd"``: grow by one when the window ran near the limit with
+      latency within ``tolerance`` times the baseline; shrink by
+      ``backoff`` on any failure or latency above that.
+    - ``"gradient"``: move towards ``limit * baseline / latency`` (at most
+      halving per window) plus a queue allowance of ``sqrt(limit)`` when the
+      limit was reached, smoothed by ``smoothing``; failures cap the factor
+      at ``backoff``.
+
+    A limit that is not reached is not grown, so an idle night does not
+    leave a limit the backend cannot serve when traffic returns.
+
+    Args:
+        initial (int, optional): Starting limit of every class. Defaults to 8.
+        min_limit (int, optional): Lowest limit. Defaults to 1.
+        max_limit (int, optional): Highest limit. Defaults to 64.
+        algorithm (str, optional): ``"aimd"`` or ``"gradient"``. Defaults to ``"gradient"``.
+        tolerance (float, optional): Latency over the baseline still considered healthy. Defaults to 1.5.
+        backoff (float, optional): Factor applied on overload. Defaults to 0.75.
+        smoothing (float, optional): Weight of a new gradient estimate. Defaults to 0.2.
+        window (int, optional): Completed requests per adjustment. Defaults to 10.
+        window_time (float, optional): Longest time between adjustments while requests complete. Defaults to 5.
+        history (int, optional): Adjustments kept per class for ``snapshot``. Defaults to 256.
+
+    Raises:
+        ConfigurationError: If the limits or the algorithm are invalid.
+    """
+
+    def __init__(self, initial: int = 8, min_limit: int = 1, max_limit: int = 64, algorithm: str = GRADIENT,
+                 tolerance: float = 1.5, backoff: float = 0.75, smoothing: float = 0.2, window: int = 10,
+                 window_time: float = 5.0, history: int = 256):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ConfigurationError("limits must satisfy 1 <= min_limit <= initial <= max_limit")
+        if algorithm not in (AIMD, GRADIENT):
+            raise ConfigurationError(f"Unknown limiter algorithm: {algorithm}")
+        if not 0 < backoff < 1:
+            raise ConfigurationError("backoff must be between 0 and 1")
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.algorithm = algorithm
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.window = window
+        self.window_time = window_time
+        self.history = history
+        self._classes: Dict[str, _ClassLimit] = {}
+        self._lock = threading.Lock()
+
+    def _class(self, timeout_class: str) -> _ClassLimit:
+        state = self._classes.get(timeout_class)
+        if state is None:
+            with self._lock:
+                state = self._classes.setdefault(timeout_class, _ClassLimit(float(self.initial), self.history))
+        return state
+
+    def acquire(self, timeout_class: str = "default", cancel: Optional["CancellationToken"] = None) -> _Permit:
+        """
+        Wait until a request of this class may start.
+
+        Args:
+            timeout_class (str, optional): Endpoint timeout class. Defaults to ``"default"``.
+            cancel (CancellationToken, optional): Stops waiting once it fires.
+
+        Returns:
+            _Permit: Call ``release(outcome, rtt)`` on it when the request is done.
+
+        Raises:
+            CancelledError: If ``cancel`` fires while waiting.
+        """
+        state = self._class(timeout_class)
+        with state.condition:
+            if state.in_flight >= int(state.limit) and cancel is not None:
+                def wake():
+                    with state.condition:
+                        state.condition.notify_all()
+                unregister = cancel.on_cancel(wake)
+            else:
+                unregister = None
+            try:
+                while state.in_flight >= int(state.limit):
+                    if cancel is not None:
+                        cancel.raise_if_cancelled()
+                    state.condition.wait()
+            finally:
+                if unregister is not None:
+                    unregister()
+            state.in_flight += 1
+            state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+        return _Permit(self, timeout_class)
+
+    @contextmanager
+    def slot(self, timeout_class: str = "default", cancel: Optional["CancellationToken"] = None) -> Iterator[None]:
+        """Hold a permit for the duration of the block, reporting its latency and outcome. See ``acquire``."""
+        permit = self.acquire(timeout_class, cancel)
+        try:
+            yield
+        except BaseException as e:
+            permit.release(IGNORED if cancel is not None and cancel.cancelled else classify(e))
+            raise
+        permit.release(OK)
+
+    def _release(self, timeout_class: str, outcome: str, rtt: float) -> None:
+        state = self._classes[timeout_class]
+        with state.condition:
+            state.in_flight -= 1
+            if outcome == OK:
+                state.samples.append(rtt)
+                state.completed += 1
+            elif outcome == DROPPED:
+                state.drops += 1
+                state.dropped += 1
+            if outcome != IGNORED:
+                now = time.monotonic()
+                if (len(state.samples) + state.drops >= self.window
+                        or now - state.window_started >= self.window_time):
+                    self._adjust(state, now)
+            state.condition.notify_all()
+
+    def _adjust(self, state: _ClassLimit, now: float) -> None:
+        # Called with the class condition held, at the end of a window
+        limit = state.limit
+        short = sum(state.samples) / len(state.samples) if state.samples else None
+        if short is not None:
+            state.short_rtt = short
+            if state.long_rtt is None:
+                state.long_rtt = short
+            else:
+                # Follows the lowest latency seen, rising only slowly with time, so sustained
+                # queueing never becomes the baseline but a slower backend eventually does
+                drift = 1 + _BASELINE_DRIFT * (now - state.window_started)
+                state.long_rtt = min(short, state.long_rtt * drift)
+        long = state.long_rtt
+        saturated = state.peak_in_flight >= int(limit)
+        slow = short is not None and long is not None and short > self.tolerance * long
+        if self.algorithm == AIMD:
+            if state.drops or slow:
+                limit *= self.backoff
+            elif saturated:
+                limit += 1
+        else:
+            gradient = 1.0
+            if short is not None and long is not None:
+                gradient = max(0.5, min(1.0, self.tolerance * long / short))
+            if state.drops:
+                gradient = min(gradient, self.backoff)
+            estimate = limit * gradient
+            if saturated and not state.drops:
+                estimate += math.sqrt(limit)
+            limit = (1 - self.smoothing) * limit + self.smoothing * estimate
+            if state.drops:
+                # Smoothing must not slow down the retreat from an overloaded backend
+                limit = min(limit, state.limit * self.backoff)
+        state.limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+        state.history.append((time.time(), round(state.limit, 2), short, state.drops))
+        state.samples = []
+        state.drops = 0
+        state.peak_in_flight = state.in_flight
+        state.window_started = now
+
+    def limit(self, timeout_class: str = "default") -> int:
+        """The number of requests of this class currently allowed in flight."""
+        return int(self._class(timeout_class).limit)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the state of every class seen so far.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: ``limit``, ``in_flight``, ``rtt`` and ``baseline_rtt``
+            (seconds), ``completed``, ``dropped`` and ``history`` by timeout class. History
+            entries are ``[unix time, limit, window latency, window failures]``.
+        """
+        result = {}
+        for name, state in list(self._classes.items()):
+            with state.condition:
+                result[name] = {
+                    "limit": int(state.limit),
+                    "in_flight": state.in_flight,
+                    "rtt": state.short_rtt,
+                    "baseline_rtt": state.long_rtt,
+                    "completed": state.completed,
+                    "dropped": state.dropped,
+                    "history": [list(entry) for entry in state.history],
+                }
+        return result
@@ -1,11 +1,15 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict
 from datetime import datetime
 
-class ChatCreateRequest(BaseModel):
+class _DeferredModel(BaseModel):
+    # Build validators on first use instead of at import time
+    model_config = ConfigDict(defer_build=True)
+
+class ChatCreateRequest(_DeferredModel):
     botId: str
 
-class ChatCreateResponse(BaseModel):
+class ChatCreateResponse(_DeferredModel):
     chatId: str
     botId: str
     botDisplayName: str
@@ -15,17 +19,17 @@ class ChatCreateResponse(BaseModel):
     botSampleQuestion2: Optional[str] = None
     isUserSystemMessageSupported: bool
 
-class ChatCompletionRequest(BaseModel):
+class ChatCompletionRequest(_DeferredModel):
     userMessage: str
     ignoreChatHistory: bool = False
     isAdminChat: bool = False
     isTraceLogEnabled: bool = False
 
-class ChatCompletionMetaData(BaseModel):
+class ChatCompletionMetaData(_DeferredModel):
     tags: Optional[List[str]] = None
     sources: Optional[List[Dict[str, str]]] = None
 
-class ChatCompletionResponse(BaseModel):
+class ChatCompletionResponse(_DeferredModel):
     completionId: str
     chatId: str
     userMessage: str
@@ -41,7 +45,7 @@ class ChatCompletionResponse(BaseModel):
     metaData: Optional[ChatCompletionMetaData] = None
     traceLog: Optional[str] = None
 
-class BotFeedbackRequest(BaseModel):
+class BotFeedbackRequest(_DeferredModel):
     chatId: str
     userMessage: str
     assistantMessage: str
@@ -49,10 +53,10 @@ class BotFeedbackRequest(BaseModel):
     userComment: Optional[str] = None
     voteId: int
 
-class BotFeedbackResponse(BaseModel):
+class BotFeedbackResponse(_DeferredModel):
     feedbackId: str
 
-class GetBotsResponseItem(BaseModel):
+class GetBotsResponseItem(_DeferredModel):
     botId: str
     code: str
     displayName: str
@@ -65,7 +69,7 @@ class GetBotsResponseItem(BaseModel):
     createdUtc: datetime
     updatedUtc: datetime
 
-class PagingResult(BaseModel):
+class PagingResult(_DeferredModel):
     pageNumber: int
     totalPageCount: int
     pageSize: int
@@ -76,12 +80,12 @@ class PagingResult(BaseModel):
 class GetBotsResponse(PagingResult):
     items: List[GetBotsResponseItem]
 
-class UserSystemMessage(BaseModel):
+class UserSystemMessage(_DeferredModel):
     userSystemMessageId: str
     displayName: str
     systemMessage: str
 
-class CurrentUser(BaseModel):
+class CurrentUser(_DeferredModel):
     id: int
     login: str
     roles: List[str]
@@ -90,15 +94,15 @@ class CurrentUser(BaseModel):
     keepChatHistoryForDays: int
     isKeepFavoritesForever: bool
 
-class UpdateUserRequest(BaseModel):
+class UpdateUserRequest(_DeferredModel):
     isKeepChatHistory: bool
     keepChatHistoryForDays: int
     isKeepFavoritesForever: bool
 
-class SystemMessage(BaseModel):
+class SystemMessage(_DeferredModel):
     value: str
 
-class TokenUsageStatistic(BaseModel):
+class TokenUsageStatistic(_DeferredModel):
     requestDate: datetime
     botId: str
     botDisplayName: str
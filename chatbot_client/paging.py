@@ -0,0 +1,66 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterator
+
+def iter_pages(fetch_page: Callable[[int], Dict[str, Any]], max_workers: int = 1,
+               start_page: int = 1) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over every page of a paged endpoint.
+
+    The first page is fetched to learn ``totalPageCount``; the remaining pages
+    are then fetched with up to ``max_workers`` concurrent requests and yielded
+    in page order. At most ``2 * max_workers`` pages are buffered at a time.
+    Pages are fetched in the caller's context, so its priority and
+    cancellation scopes apply to them.
+
+    Args:
+        fetch_page (Callable[[int], Dict[str, Any]]): Returns the page with the given number,
+            e.g. ``lambda n: bots.get_bot_facts(make_request, bot_id, page_number=n, page_size=100)``.
+        max_workers (int, optional): Number of pages fetched concurrently. Defaults to 1.
+        start_page (int, optional): First page number to fetch. Defaults to 1.
+
+    Yields:
+        Dict[str, Any]: Paging results in page order.
+    """
+    first = fetch_page(start_page)
+    yield first
+    total_pages = first.get("totalPageCount")
+    if total_pages is None:
+        page, page_number = first, start_page
+        while page.get("hasNext"):
+            page_number += 1
+            page = fetch_page(page_number)
+            yield page
+        return
+    remaining = iter(range(start_page + 1, total_pages + 1))
+    if max_workers <= 1:
+        for page_number in remaining:
+            yield fetch_page(page_number)
+        return
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    try:
+        for page_number in remaining:
+            pending.append(pool.submit(copy_context().run, fetch_page, page_number))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+def iter_items(fetch_page: Callable[[int], Dict[str, Any]], max_workers: int = 1,
+               start_page: int = 1) -> Iterator[Any]:
+    """
+    Iterate over the ``items`` of every page of a paged endpoint.
+
+    See ``iter_pages`` for the arguments.
+
+    Yields:
+        Any: Items in page order.
+    """
+    for page in iter_pages(fetch_page, max_workers=max_workers, start_page=start_page):
+        yield from page.get("items") or ()
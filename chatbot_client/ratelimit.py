@@ -0,0 +1,82 @@
+import time
+from typing import Optional, TYPE_CHECKING
+from .exceptions import DeadlineExceededError, RateLimitError
+from .store import StateStore, MemoryStore
+
+if TYPE_CHECKING:
+    from .cancellation import CancellationToken
+
+class RateLimiter:
+    """
+    Token bucket rate limiter whose bucket lives in a ``StateStore``.
+
+    With a ``SQLiteStore`` every worker process draws from the same bucket, so
+    the configured rate holds for the whole host rather than per process.
+
+    Args:
+        rate (float): Requests allowed per second on average.
+        burst (int, optional): Bucket size. Defaults to ``max(1, rate)``.
+        store (StateStore, optional): Where the bucket is kept. Defaults to an in-process store.
+        name (str, optional): Bucket name, so several limiters can share a store.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, store: Optional[StateStore] = None,
+                 name: str = "requests"):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.store = store or MemoryStore()
+        self.key = f"ratelimit:{name}"
+
+    def _take(self, tokens: float):
+        def take(bucket):
+            now = time.time()
+            if bucket is None:
+                available = float(self.burst)
+            else:
+                available = min(self.burst, bucket["tokens"] + (now - bucket["ts"]) * self.rate)
+            if available >= tokens:
+                return {"tokens": available - tokens, "ts": now}, 0.0
+            return {"tokens": available, "ts": now}, (tokens - available) / self.rate
+        return take
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens if they are available.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds to wait before retrying.
+        """
+        return self.store.update(self.key, self._take(tokens))
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None,
+                cancel: Optional["CancellationToken"] = None) -> None:
+        """
+        Block until tokens are available.
+
+        Args:
+            tokens (float, optional): Tokens to take. Defaults to 1.
+            timeout (float, optional): Maximum seconds to wait. Waits indefinitely if None.
+            cancel (CancellationToken, optional): Stops waiting once it fires.
+
+        Raises:
+            RateLimitError: If the tokens cannot be taken within ``timeout``.
+            CancelledError: If ``cancel`` fires while waiting.
+            DeadlineExceededError: If the wait would outlast the deadline of ``cancel``.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RateLimitError(f"Rate limit exceeded: no capacity within {timeout}s")
+            if cancel is None:
+                time.sleep(wait)
+                continue
+            remaining = cancel.remaining()
+            if remaining is not None and remaining < wait:
+                # No point queueing for capacity the caller can no longer use
+                raise DeadlineExceededError(f"rate limit wait of {wait:.2f}s exceeds the deadline")
+            cancel.wait(wait)
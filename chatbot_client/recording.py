@@ -0,0 +1,382 @@
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from requests.structures import CaseInsensitiveDict
+from .compression import decode_stream
+from .exceptions import ConfigurationError, ReplayError, TransportError
+from .transport import DEFAULT_CHUNK_SIZE, Transport, TransportResponse
+
+if TYPE_CHECKING:
+    from .cancellation import CancellationToken
+
+FORMAT = "chatbot-recording"
+VERSION = 1
+REDACTED = "<redacted>"
+
+# Header, query parameter and JSON field names are compared lowercased with
+# "-" and "_" removed, so "X-Api-Key", "api_key" and "apiKey" all match
+_SECRET_NAMES = frozenset({
+    "authorization", "proxyauthorization", "cookie", "setcookie", "xapikey", "apikey", "key",
+    "token", "accesstoken", "refreshtoken", "idtoken", "bearertoken", "password", "secret", "clientsecret",
+})
+_SECRET_SUFFIXES = ("password", "secret", "apikey")
+
+def _normalize(name: str) -> str:
+    return name.lower().replace("-", "").replace("_", "")
+
+def is_secret(name: str) -> bool:
+    """Whether a header, parameter or JSON field with this name holds a credential."""
+    name = _normalize(name)
+    return name in _SECRET_NAMES or name.endswith(_SECRET_SUFFIXES)
+
+def _scrub_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: REDACTED if is_secret(k) and v is not None else _scrub_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_scrub_json(item) for item in value]
+    return value
+
+def _scrub_mapping(values: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: REDACTED if is_secret(k) else v for k, v in (values or {}).items() if v is not None}
+
+def _scrub_url(url: str) -> str:
+    """The URL with secret query parameters redacted. Endpoints put paging and filters into the URL itself."""
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if not any(is_secret(name) for name, _ in query):
+        # Untouched, so recordings keep the URL byte for byte
+        return url
+    query = [(name, REDACTED if is_secret(name) else value) for name, value in query]
+    return urlunsplit(parts._replace(query=urlencode(query, safe="<>", quote_via=quote)))
+
+def _is_json(headers: Dict[str, str]) -> bool:
+    return "json" in (headers.get("Content-Type") or headers.get("content-type") or "")
+
+def _pack(data: bytes) -> Tuple[str, bool]:
+    """Text when the bytes are UTF-8, which keeps recordings readable and diffable; base64 otherwise."""
+    try:
+        return data.decode("utf-8"), False
+    except UnicodeDecodeError:
+        return base64.b64encode(data).decode("ascii"), True
+
+def _unpack(text: str, binary: bool) -> bytes:
+    return base64.b64decode(text) if binary else text.encode("utf-8")
+
+def _request_body(content: Optional[bytes], headers: Dict[str, str]) -> Optional[str]:
+    """Scrubbed, canonical form of a request body, used both to store and to match requests."""
+    if content is None:
+        return None
+    encoding = headers.get("Content-Encoding")
+    if encoding:
+        # Compressed bodies differ between runs (gzip stores a timestamp), record what was compressed
+        content = b"".join(decode_stream([content], encoding))
+    if _is_json(headers):
+        try:
+            return json.dumps(_scrub_json(json.loads(content)), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            pass
+    text, binary = _pack(content)
+    return "base64:" + text if binary else text
+
+def _key(method: str, url: str, params: Dict[str, Any], body: Optional[str], match_body: bool) -> tuple:
+    query = tuple(sorted((k, str(v)) for k, v in params.items()))
+    return method.upper(), url, query, body if match_body else None
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class _RecordingResponse(TransportResponse):
+    def __init__(self, transport: "RecordingTransport", exchange: Dict[str, Any], response: TransportResponse):
+        self._transport = transport
+        self._exchange = exchange
+        self._response = response
+        self._written = False
+        self.status_code = response.status_code
+        self.reason = response.reason
+        self.headers = response.headers
+        self.http_version = response.http_version
+
+    def _record(self, chunks: Iterator[bytes], encoded: bool) -> Iterator[bytes]:
+        exchange = self._exchange
+        exchange["encoded"] = encoded
+        recorded = exchange["chunks"]
+        last = exchange.pop("_received", time.monotonic())
+        try:
+            for chunk in chunks:
+                now = time.monotonic()
+                recorded.append((round(now - last, 6), chunk))
+                last = now
+                yield chunk
+        except TransportError as e:
+            exchange["error"] = str(e)
+            raise
+        exchange["complete"] = True
+
+    def iter_bytes(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        return self._record(self._response.iter_bytes(chunk_size), encoded=False)
+
+    def iter_raw(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        return self._record(self._response.iter_raw(chunk_size), encoded=True)
+
+    def close(self) -> None:
+        self._response.close()
+        if not self._written:
+            self._written = True
+            self._transport._write(self._exchange)
+
+class RecordingTransport(Transport):
+    """
+    Transport that passes requests to another transport and records every exchange to a file.
+
+    Each line of the recording is one request and its response as JSON: the
+    time to the response headers, then every body chunk as it arrived with the
+    delay since the previous one, so ``ReplayTransport`` can reproduce both the
+    latency and the chunk boundaries of streamed answers. Paths ending in
+    ``.gz`` are gzip compressed. An exchange is written when its response is
+    closed; bodies that were not read are recorded as incomplete.
+
+    Credentials are scrubbed before anything is written: headers, query
+    parameters (passed separately or already in the URL) and JSON fields named
+    like ``Authorization``, ``apiKey``, ``password``, ``secret`` or ``token``
+    are replaced with ``"<redacted>"``. A JSON response containing such a
+    field is stored as a single chunk.
+
+    Args:
+        transport (Transport): The transport that actually sends the requests.
+        path (str): File to write the recording to.
+        append (bool, optional): Add to an existing recording instead of replacing it. Defaults to False.
+        scrub (Callable[[Dict[str, Any]], Dict[str, Any]], optional): Applied to every exchange
+            after the built-in scrubbing, for deployment specific secrets.
+    """
+
+    def __init__(self, transport: Transport, path: str, append: bool = False,
+                 scrub: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.transport = transport
+        self.path = path
+        self.scrub = scrub
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._file = _open(path, "a" if append else "w")
+        if self._file.tell() == 0:
+            self._file.write(json.dumps({"format": FORMAT, "version": VERSION}) + "\n")
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None, content: Optional[bytes] = None,
+                timeout: Optional[float] = None, cancel: Optional["CancellationToken"] = None) -> TransportResponse:
+        headers = headers or {}
+        exchange: Dict[str, Any] = {
+            "method": method.upper(),
+            "url": _scrub_url(url),
+            "params": _scrub_mapping(params),
+            "headers": _scrub_mapping(headers),
+            "body": _request_body(content, headers),
+            "chunks": [],
+        }
+        started = time.monotonic()
+        try:
+            response = self.transport.request(method, url, headers=headers, params=params, content=content,
+                                              timeout=timeout, cancel=cancel)
+        except TransportError as e:
+            exchange["latency"] = round(time.monotonic() - started, 6)
+            exchange["error"] = str(e)
+            self._write(exchange)
+            raise
+        exchange["_received"] = time.monotonic()
+        exchange["latency"] = round(exchange["_received"] - started, 6)
+        exchange["status"] = response.status_code
+        exchange["reason"] = response.reason
+        exchange["http_version"] = response.http_version
+        exchange["response_headers"] = _scrub_mapping(dict(response.headers))
+        return _RecordingResponse(self, exchange, response)
+
+    def _serialize(self, exchange: Dict[str, Any]) -> Dict[str, Any]:
+        exchange.pop("_received", None)
+        chunks: List[Tuple[float, bytes]] = exchange.pop("chunks")
+        response_headers = exchange.get("response_headers")
+        if response_headers is not None and not exchange.get("encoded"):
+            # The body was recorded after decoding, its wire encoding and length no longer apply
+            for name in [name for name in response_headers if name.lower() in ("content-encoding", "content-length")]:
+                del response_headers[name]
+        if chunks and exchange.get("complete") and _is_json(response_headers or {}):
+            body = b"".join(chunk for _, chunk in chunks)
+            encoding = None
+            if exchange.get("encoded"):
+                encoding = next((value for name, value in response_headers.items()
+                                 if name.lower() == "content-encoding"), None)
+            try:
+                document = json.loads(b"".join(decode_stream([body], encoding)))
+            except (ValueError, TransportError):
+                document = None
+            if document is not None:
+                scrubbed = _scrub_json(document)
+                if scrubbed != document:
+                    # Stored decoded, as one chunk: re-encoding would not reproduce the original bytes anyway
+                    chunks = [(round(sum(delay for delay, _ in chunks), 6),
+                               json.dumps(scrubbed).encode("utf-8"))]
+                    if encoding:
+                        exchange["encoded"] = False
+                        for name in [name for name in response_headers
+                                     if name.lower() in ("content-encoding", "content-length")]:
+                            del response_headers[name]
+        packed = [_pack(chunk) for _, chunk in chunks]
+        exchange["binary"] = any(binary for _, binary in packed)
+        if exchange["binary"]:
+            packed = [(base64.b64encode(chunk).decode("ascii"), True) for _, chunk in chunks]
+        exchange["chunks"] = [[delay, text] for (delay, _), (text, _) in zip(chunks, packed)]
+        if self.scrub is not None:
+            exchange = self.scrub(exchange)
+        return exchange
+
+    def _write(self, exchange: Dict[str, Any]) -> None:
+        line = json.dumps(self._serialize(exchange), separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        self.transport.close()
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the exchanges of a recording.
+
+    Raises:
+        ConfigurationError: If the file is not a recording made by ``RecordingTransport``.
+    """
+    with _open(path, "r") as f:
+        lines = [line for line in f if line.strip()]
+    header = json.loads(lines[0]) if lines else {}
+    if header.get("format") != FORMAT:
+        raise ConfigurationError(f"{path} is not a chatbot recording")
+    if header.get("version", 0) > VERSION:
+        raise ConfigurationError(f"{path} was written by a newer version (format {header['version']})")
+    # A file appended to by several sessions contains a header line per session
+    return [exchange for exchange in map(json.loads, lines[1:]) if "method" in exchange]
+
+class _ReplayResponse(TransportResponse):
+    def __init__(self, exchange: Dict[str, Any], latency_scale: float, cancel: Optional["CancellationToken"]):
+        self._exchange = exchange
+        self._latency_scale = latency_scale
+        self._cancel = cancel
+        self._closed = False
+        self.status_code = exchange["status"]
+        self.reason = exchange.get("reason") or ""
+        self.headers = CaseInsensitiveDict(exchange.get("response_headers") or {})
+        self.http_version = exchange.get("http_version") or "HTTP/1.1"
+
+    def _chunks(self) -> Iterator[bytes]:
+        exchange = self._exchange
+        binary = exchange.get("binary", False)
+        # Sleep towards a schedule rather than per chunk, so timing errors do not add up
+        due = time.monotonic()
+        for delay, text in exchange["chunks"]:
+            if self._closed:
+                raise TransportError("response closed")
+            due += delay * self._latency_scale
+            _sleep_until(due, self._cancel)
+            yield _unpack(text, binary)
+        if "error" in exchange:
+            raise TransportError(exchange["error"])
+
+    def iter_raw(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        return self._chunks()
+
+    def iter_bytes(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        encoding = self.headers.get("Content-Encoding") if self._exchange.get("encoded") else None
+        return decode_stream(self._chunks(), encoding)
+
+    def close(self) -> None:
+        self._closed = True
+
+def _sleep_until(due: float, cancel: Optional["CancellationToken"]) -> None:
+    delay = due - time.monotonic()
+    if delay <= 0:
+        return
+    if cancel is not None:
+        cancel.wait(delay)
+    else:
+        time.sleep(delay)
+
+class ReplayTransport(Transport):
+    """
+    Transport that answers requests from a recording made by ``RecordingTransport``, without any network.
+
+    A request is matched on method, URL, query parameters and (scrubbed) body;
+    repeated identical requests get the recorded responses in their original
+    order. Latencies are reproduced multiplied by ``latency_scale``: 1 replays
+    at the recorded speed, 0.1 ten times faster and 0 without any waiting.
+    Timeouts and cancellation behave as against a live backend.
+
+    Args:
+        path (str): Recording to replay.
+        latency_scale (float, optional): Factor applied to every recorded delay. Defaults to 1.
+        match_body (bool, optional): Require the request body to match, not only method,
+            URL and parameters. Defaults to True.
+        loop (bool, optional): Start over with the first matching response once all were
+            used, for load tests longer than the recording. Defaults to False.
+
+    Raises:
+        ConfigurationError: If the file is not a recording or ``latency_scale`` is negative.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0, match_body: bool = True, loop: bool = False):
+        if latency_scale < 0:
+            raise ConfigurationError("latency_scale must not be negative")
+        self.path = path
+        self.latency_scale = latency_scale
+        self.match_body = match_body
+        self.loop = loop
+        self.exchanges = load_recording(path)
+        self._queues: Dict[tuple, Deque[Dict[str, Any]]] = {}
+        for exchange in self.exchanges:
+            key = _key(exchange["method"], exchange["url"], exchange.get("params") or {}, exchange.get("body"),
+                       match_body)
+            self._queues.setdefault(key, deque()).append(exchange)
+        self._lock = threading.Lock()
+        self.replayed = 0
+
+    def _next(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                return None
+            exchange = queue.popleft()
+            if self.loop:
+                queue.append(exchange)
+            self.replayed += 1
+            return exchange
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None, content: Optional[bytes] = None,
+                timeout: Optional[float] = None, cancel: Optional["CancellationToken"] = None) -> TransportResponse:
+        body = _request_body(content, headers or {})
+        exchange = self._next(_key(method, _scrub_url(url), _scrub_mapping(params), body, self.match_body))
+        if exchange is None:
+            raise ReplayError(f"{method.upper()} {url} params={params or {}}")
+        latency = exchange.get("latency", 0.0) * self.latency_scale
+        if timeout is not None and latency > timeout:
+            _sleep_until(time.monotonic() + timeout, cancel)
+            raise TransportError(f"Read timed out. (read timeout={timeout})")
+        _sleep_until(time.monotonic() + latency, cancel)
+        if "status" not in exchange:
+            raise TransportError(exchange.get("error", "connection failed"))
+        return _ReplayResponse(exchange, self.latency_scale, cancel)
+
+    def remaining(self) -> int:
+        """Number of recorded exchanges not replayed yet (always all of them when looping)."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
@@ -0,0 +1,67 @@
+import random
+import time
+from typing import Callable, Optional, TypeVar, TYPE_CHECKING
+from .exceptions import APIError, TransportError
+
+if TYPE_CHECKING:
+    from .cancellation import CancellationToken
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Statuses saying the server did not act on the request, so even a non-idempotent one can be sent again
+NOT_PROCESSED_STATUS_CODES = frozenset({408, 425, 429})
+
+def is_retryable(error: Exception) -> bool:
+    """Return True for transport failures and throttling or transient server errors."""
+    if isinstance(error, TransportError):
+        return True
+    return isinstance(error, APIError) and error.status_code in RETRYABLE_STATUS_CODES
+
+def is_retryable_unsent(error: Exception) -> bool:
+    """
+    Return True only for failures after which the request cannot have taken effect.
+
+    Use it for non-idempotent calls such as creates: a read timeout or a 5xx
+    may come after the server stored the record, and sending it again would
+    duplicate it, so only connection failures and explicit "not processed"
+    statuses are retried.
+    """
+    if isinstance(error, TransportError):
+        return not error.sent
+    return isinstance(error, APIError) and error.status_code in NOT_PROCESSED_STATUS_CODES
+
+def retry_call(func: Callable[[], T], attempts: int = 3, backoff: float = 0.5, max_backoff: float = 30.0,
+               retry_if: Callable[[Exception], bool] = is_retryable,
+               cancel: Optional["CancellationToken"] = None) -> T:
+    """
+    Call ``func`` and retry it with exponential backoff and full jitter.
+
+    Args:
+        func (Callable[[], T]): Operation to run.
+        attempts (int, optional): Total number of attempts. Defaults to 3.
+        backoff (float, optional): Base delay in seconds. Defaults to 0.5.
+        max_backoff (float, optional): Upper bound for a single delay. Defaults to 30.
+        retry_if (Callable[[Exception], bool], optional): Decides whether an error is retried.
+        cancel (CancellationToken, optional): Stops retrying, also during a backoff delay, once it fires.
+
+    Returns:
+        T: The result of the first successful call.
+
+    Raises:
+        CancelledError: If ``cancel`` fires between attempts.
+        Exception: The last error once attempts are exhausted or it is not retryable.
+    """
+    for attempt in range(attempts):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == attempts - 1 or not retry_if(e):
+                raise
+            if cancel is not None and cancel.cancelled:
+                raise
+            delay = random.uniform(0, min(max_backoff, backoff * (2 ** attempt)))
+            if cancel is not None:
+                cancel.wait(delay)
+            else:
+                time.sleep(delay)
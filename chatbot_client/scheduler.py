@@ -0,0 +1,219 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+from .exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    from .cancellation import CancellationToken
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+class PriorityClass:
+    """
+    Scheduling parameters of one class of traffic.
+
+    Args:
+        weight (float): Share of the upstream capacity the class gets while
+            other classes are also waiting. Defaults to 1.
+        max_concurrency (int, optional): Most requests of this class in flight
+            at once. Unlimited (up to the scheduler total) if None.
+    """
+
+    def __init__(self, weight: float = 1.0, max_concurrency: Optional[int] = None):
+        if weight <= 0:
+            raise ConfigurationError("priority class weight must be positive")
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+
+def default_classes() -> Dict[str, PriorityClass]:
+    """Interactive traffic gets eight times the share of batch jobs."""
+    return {INTERACTIVE: PriorityClass(weight=8.0), BATCH: PriorityClass(weight=1.0)}
+
+class _Waiter:
+    __slots__ = ("finish", "sequence", "event", "granted", "enqueued")
+
+    def __init__(self, finish: float, sequence: int):
+        self.finish = finish
+        self.sequence = sequence
+        self.event = threading.Event()
+        self.granted = False
+        self.enqueued = time.monotonic()
+
+class _ClassState:
+    def __init__(self, config: PriorityClass):
+        self.config = config
+        self.queue: List[_Waiter] = []
+        self.running = 0
+        self.last_finish = 0.0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+class Scheduler:
+    """
+    Bounds the upstream requests in flight and decides who goes next when they are all taken.
+
+    Waiting requests are ordered by weighted fair queuing: each request gets a
+    virtual finish time of ``start + 1 / weight``, so a backlog of batch work
+    is overtaken by interactive requests arriving later, yet still gets its
+    ``weight`` share of the slots and is never starved. A class at its
+    ``max_concurrency`` is skipped until one of its requests finishes.
+
+    The class of a request is taken from ``priority_scope`` and defaults to
+    ``"interactive"``.
+
+    Args:
+        max_concurrency (int, optional): Requests in flight across all classes. Defaults to 8.
+        classes (Dict[str, PriorityClass], optional): Classes by name. Defaults to
+            ``default_classes()`` with batch limited to half of ``max_concurrency``.
+    """
+
+    def __init__(self, max_concurrency: int = 8, classes: Optional[Dict[str, PriorityClass]] = None):
+        if max_concurrency < 1:
+            raise ConfigurationError("max_concurrency must be at least 1")
+        if classes is None:
+            classes = default_classes()
+            classes[BATCH].max_concurrency = max(1, max_concurrency // 2)
+        self.max_concurrency = max_concurrency
+        self._classes = {name: _ClassState(config) for name, config in classes.items()}
+        self._lock = threading.Lock()
+        self._running = 0
+        self._virtual_time = 0.0
+        self._sequence = 0
+
+    def _state(self, priority: str) -> _ClassState:
+        try:
+            return self._classes[priority]
+        except KeyError:
+            raise ConfigurationError(f"Unknown priority class: {priority}")
+
+    def _dispatch(self) -> None:
+        # Called with the lock held: grant free slots to the earliest finish tags
+        while self._running < self.max_concurrency:
+            best = None
+            for state in self._classes.values():
+                if not state.queue:
+                    continue
+                if state.config.max_concurrency is not None and state.running >= state.config.max_concurrency:
+                    continue
+                head = state.queue[0]
+                if best is None or (head.finish, head.sequence) < (best[1].finish, best[1].sequence):
+                    best = (state, head)
+            if best is None:
+                return
+            state, waiter = best
+            state.queue.pop(0)
+            state.running += 1
+            self._running += 1
+            self._virtual_time = max(self._virtual_time, waiter.finish - 1.0 / state.config.weight)
+            wait = time.monotonic() - waiter.enqueued
+            state.total_wait += wait
+            state.max_wait = max(state.max_wait, wait)
+            waiter.granted = True
+            waiter.event.set()
+
+    def acquire(self, priority: Optional[str] = None, cancel: Optional["CancellationToken"] = None) -> str:
+        """
+        Wait for a slot.
+
+        Args:
+            priority (str, optional): Class of the request. Defaults to the current ``priority_scope``.
+            cancel (CancellationToken, optional): Gives up the place in the queue once it fires.
+
+        Returns:
+            str: The class the slot was granted to, to pass to ``release``.
+
+        Raises:
+            ConfigurationError: If the class is unknown.
+            CancelledError: If ``cancel`` fires while waiting.
+        """
+        priority = priority or current_priority()
+        with self._lock:
+            state = self._state(priority)
+            start = max(self._virtual_time, state.last_finish)
+            state.last_finish = start + 1.0 / state.config.weight
+            self._sequence += 1
+            waiter = _Waiter(state.last_finish, self._sequence)
+            state.queue.append(waiter)
+            self._dispatch()
+        if waiter.granted:
+            return priority
+        unregister = cancel.on_cancel(waiter.event.set) if cancel is not None else None
+        try:
+            waiter.event.wait()
+        finally:
+            if unregister is not None:
+                unregister()
+        with self._lock:
+            if not waiter.granted:
+                state.queue.remove(waiter)
+                if not state.queue:
+                    # Do not charge the class for work it never did
+                    state.last_finish = self._virtual_time
+                cancel.raise_if_cancelled()
+        return priority
+
+    def release(self, priority: str) -> None:
+        """Give back a slot taken with ``acquire``."""
+        with self._lock:
+            state = self._state(priority)
+            state.running -= 1
+            state.completed += 1
+            self._running -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, cancel: Optional["CancellationToken"] = None) -> Iterator[str]:
+        """Hold a slot for the duration of the block. See ``acquire``."""
+        granted = self.acquire(priority, cancel)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return queue depth, requests in flight and wait times per class.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: ``queued``, ``running``, ``completed``,
+            ``avg_wait``, ``max_wait`` and ``oldest_wait`` (seconds) by class name.
+        """
+        now = time.monotonic()
+        with self._lock:
+            result = {}
+            for name, state in self._classes.items():
+                granted = state.completed + state.running
+                result[name] = {
+                    "queued": len(state.queue),
+                    "running": state.running,
+                    "completed": state.completed,
+                    "avg_wait": state.total_wait / granted if granted else 0.0,
+                    "max_wait": state.max_wait,
+                    "oldest_wait": now - state.queue[0].enqueued if state.queue else 0.0,
+                }
+            return result
+
+_priority: ContextVar[str] = ContextVar("chatbot_client_priority", default=INTERACTIVE)
+
+def current_priority() -> str:
+    """The class of the innermost ``priority_scope``, ``"interactive"`` outside of any."""
+    return _priority.get()
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    """
+    Schedule every client request made inside the block in the given class.
+
+    Worker threads do not inherit the scope unless they run in a copy of the
+    caller's context (``contextvars.copy_context().run``), as the paging and
+    bulk helpers do.
+    """
+    reset = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(reset)
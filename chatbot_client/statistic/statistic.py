@@ -1,6 +1,11 @@
-from typing import Callable, Dict, Any, Optional
+from typing import Callable, Dict, Any, Iterator, Optional, Type
 from datetime import date
 from ..exceptions import APIError
+from ..endpoints import endpoint
+from ..jsonstream import iter_streamed_items, stream_page
+
+_UPDATE_STATISTIC = endpoint("statistic.update_statistic")
+_GET_TOKEN_USAGE_STATISTIC = endpoint("statistic.get_token_usage_statistic")
 
 def update_statistic(make_request: Callable) -> None:
     """
@@ -13,9 +18,9 @@ def update_statistic(make_request: Callable) -> None:
         APIError: If the API request fails.
     """
     try:
-        make_request("PUT", "/api/statistic")
+        make_request(_UPDATE_STATISTIC.method, _UPDATE_STATISTIC.url())
     except APIError as e:
-        raise APIError(f"Failed to update statistics: {str(e)}")
+        raise APIError(f"Failed to update statistics: {str(e)}", status_code=e.status_code, response=e.response)
 
 def get_token_usage_statistic(
     make_request: Callable,
@@ -48,21 +53,63 @@ def get_token_usage_statistic(
     Raises:
         APIError: If the API request fails.
     """
-    params = {
-        "BotId": bot_id,
-        "TokenUsageTypeId": token_usage_type_id,
-        "FromRequestDate": from_request_date.isoformat() if from_request_date else None,
-        "ToRequestDate": to_request_date.isoformat() if to_request_date else None,
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    
-    # Remove None values from params
-    params = {k: v for k, v in params.items() if v is not None}
+    url = _GET_TOKEN_USAGE_STATISTIC.url(
+        bot_id=bot_id,
+        token_usage_type_id=token_usage_type_id,
+        from_request_date=from_request_date,
+        to_request_date=to_request_date,
+        search_for=search_for,
+        order_by=order_by,
+        page_number=page_number,
+        page_size=page_size
+    )
 
     try:
-        return make_request("GET", "/api/statistic/tokenUsageStatistic", params=params)
+        return make_request(_GET_TOKEN_USAGE_STATISTIC.method, url)
     except APIError as e:
-        raise APIError(f"Failed to get token usage statistics: {str(e)}")
\ No newline at end of file
+        raise APIError(f"Failed to get token usage statistics: {str(e)}", status_code=e.status_code,
+                       response=e.response)
+
+def iter_token_usage_statistic(
+    make_request: Callable,
+    bot_id: Optional[str] = None,
+    token_usage_type_id: Optional[int] = None,
+    from_request_date: Optional[date] = None,
+    to_request_date: Optional[date] = None,
+    search_for: Optional[str] = None,
+    order_by: Optional[str] = None,
+    page_size: int = 1000,
+    item_type: Optional[Type] = None
+) -> Iterator[Any]:
+    """
+    Iterate over all token usage statistics, each yielded as soon as it is read from the response.
+
+    The streaming counterpart of ``get_token_usage_statistic`` over all pages.
+
+    Args:
+        make_request (Callable): Function to make API requests; must support ``stream=True``.
+        item_type (type, optional): Pydantic model each entry is validated into, e.g. ``models.TokenUsageStatistic``.
+
+    Yields:
+        Any: Statistics entries in page order.
+
+    Raises:
+        APIError: If the API request fails.
+    """
+    def open_page(page_number: int):
+        url = _GET_TOKEN_USAGE_STATISTIC.url(
+            bot_id=bot_id,
+            token_usage_type_id=token_usage_type_id,
+            from_request_date=from_request_date,
+            to_request_date=to_request_date,
+            search_for=search_for,
+            order_by=order_by,
+            page_number=page_number,
+            page_size=page_size
+        )
+        try:
+            return stream_page(make_request, _GET_TOKEN_USAGE_STATISTIC.method, url, item_type=item_type)
+        except APIError as e:
+            raise APIError(f"Failed to get token usage statistics: {str(e)}", status_code=e.status_code,
+                           response=e.response)
+    return iter_streamed_items(open_page)
@@ -0,0 +1,50 @@
+from typing import Any, Dict, Optional
+from ..store import StateStore, MemoryStore
+
+_FIELDS = ("promptTokens", "completionTokens", "totalTokens")
+
+class TokenUsage:
+    """
+    Local token accounting for chat completions, kept in a ``StateStore``.
+
+    Counters are updated atomically, so processes sharing a ``SQLiteStore``
+    report the same totals.
+
+    Args:
+        store (StateStore, optional): Where the counters are kept. Defaults to an in-process store.
+        prefix (str, optional): Key prefix for the counters.
+    """
+
+    def __init__(self, store: Optional[StateStore] = None, prefix: str = "usage"):
+        self.store = store or MemoryStore()
+        self.prefix = prefix
+
+    def record(self, completion: Dict[str, Any]) -> None:
+        """Add the token counts of a chat completion response to the totals and to its bot."""
+        delta = {field: completion.get(field) or 0 for field in _FIELDS}
+
+        def add(counters):
+            counters = dict(counters or {"requestCount": 0, **{field: 0 for field in _FIELDS}})
+            counters["requestCount"] += 1
+            for field, value in delta.items():
+                counters[field] += value
+            return counters, None
+
+        self.store.update(f"{self.prefix}:total", add)
+        self.store.update(f"{self.prefix}:bot:{completion.get('botId') or 'unknown'}", add)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the totals and the per-bot counters.
+
+        Returns:
+            Dict[str, Any]: ``{"total": {...}, "bots": {bot_id: {...}}}``.
+        """
+        bot_prefix = f"{self.prefix}:bot:"
+        return {
+            "total": self.store.get(f"{self.prefix}:total") or {},
+            "bots": {key[len(bot_prefix):]: value for key, value in self.store.items(bot_prefix).items()},
+        }
+
+    def reset(self) -> None:
+        self.store.clear(f"{self.prefix}:")
@@ -0,0 +1,207 @@
+import copy
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+class StateStore:
+    """
+    Key/value store for state shared by client features such as rate limiting,
+    response caching and token accounting.
+
+    Values must be JSON serializable. ``update`` is atomic, which is what lets
+    several processes share a rate-limit bucket or a counter.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def update(self, key: str, func: Callable[[Optional[Any]], Tuple[Optional[Any], Any]],
+               ttl: Optional[float] = None) -> Any:
+        """
+        Atomically read, modify and write a value.
+
+        Args:
+            key (str): Key to update.
+            func (Callable): Receives the current value (None if missing) and returns
+                ``(new_value, result)``. A new value of None deletes the key.
+            ttl (float, optional): Expiry of the new value in seconds.
+
+        Returns:
+            Any: The ``result`` returned by ``func``.
+        """
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: float = 1) -> float:
+        """Atomically add ``amount`` to a numeric value and return the new value."""
+        def add(value):
+            value = (value or 0) + amount
+            return value, value
+        return self.update(key, add)
+
+    def items(self, prefix: str) -> Dict[str, Any]:
+        """Return all live keys starting with ``prefix`` and their values."""
+        raise NotImplementedError
+
+    def clear(self, prefix: str = "") -> None:
+        """Delete all keys starting with ``prefix``."""
+        raise NotImplementedError
+
+class MemoryStore(StateStore):
+    """
+    In-process store. State is not shared with other worker processes.
+
+    Values are copied on the way in and out, so callers may change what they
+    stored or got back without changing the store, as with ``SQLiteStore``.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.RLock()
+
+    def _read(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return copy.deepcopy(self._read(key))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def update(self, key: str, func: Callable[[Optional[Any]], Tuple[Optional[Any], Any]],
+               ttl: Optional[float] = None) -> Any:
+        with self._lock:
+            value, result = func(copy.deepcopy(self._read(key)))
+            if value is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = (copy.deepcopy(value), time.time() + ttl if ttl is not None else None)
+            return result
+
+    def items(self, prefix: str) -> Dict[str, Any]:
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+            return {key: copy.deepcopy(value) for key in keys if (value := self._read(key)) is not None}
+
+    def clear(self, prefix: str = "") -> None:
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+def deployment_key(base_url: str, credential: Optional[str] = None) -> str:
+    """
+    Short, stable name for one deployment: a backend URL used with one credential.
+
+    Files holding per-deployment state are named after it, so clients of
+    different backends or API keys on one host never share them. The
+    credential is hashed and does not appear in the name.
+    """
+    digest = hashlib.sha256(f"{base_url.rstrip('/')}\n{credential or ''}".encode("utf-8")).hexdigest()
+    return digest[:16]
+
+def default_state_path(base_url: str, credential: Optional[str] = None) -> str:
+    """Path of the state database shared by the workers of one deployment, in /dev/shm when available."""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"chatbot_client_state-{deployment_key(base_url, credential)}.sqlite3")
+
+class SQLiteStore(StateStore):
+    """
+    Store shared by every process on the host through a SQLite database in WAL mode.
+
+    Placed in /dev/shm by default so reads and writes never touch the disk.
+    Each thread uses its own connection; ``update`` runs in an immediate
+    transaction so concurrent workers serialize on the same key.
+
+    Args:
+        path (str): Database file, e.g. ``default_state_path(base_url, api_key)``.
+        timeout (float, optional): Seconds to wait for another process's lock. Defaults to 30.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _read(conn: sqlite3.Connection, key: str) -> Optional[Any]:
+        row = conn.execute("SELECT value, expires FROM state WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, key: str, value: Any, ttl: Optional[float]) -> None:
+        conn.execute("INSERT OR REPLACE INTO state (key, value, expires) VALUES (?, ?, ?)",
+                     (key, json.dumps(value), time.time() + ttl if ttl is not None else None))
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._read(self._conn(), key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        conn = self._conn()
+        self._write(conn, key, value, ttl)
+        if random.random() < 0.01:
+            conn.execute("DELETE FROM state WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def update(self, key: str, func: Callable[[Optional[Any]], Tuple[Optional[Any], Any]],
+               ttl: Optional[float] = None) -> Any:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            value, result = func(self._read(conn, key))
+            if value is None:
+                conn.execute("DELETE FROM state WHERE key = ?", (key,))
+            else:
+                self._write(conn, key, value, ttl)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def items(self, prefix: str) -> Dict[str, Any]:
+        rows = self._conn().execute(
+            "SELECT key, value FROM state WHERE substr(key, 1, ?) = ? AND (expires IS NULL OR expires > ?)",
+            (len(prefix), prefix, time.time())).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def clear(self, prefix: str = "") -> None:
+        self._conn().execute("DELETE FROM state WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
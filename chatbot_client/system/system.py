@@ -1,5 +1,9 @@
 from typing import Callable, Dict, Any
 from ..exceptions import APIError
+from ..endpoints import endpoint
+
+_GET_CURRENT_SYSTEM_STATUS = endpoint("system.get_current_system_status")
+_SET_CURRENT_SYSTEM_STATUS = endpoint("system.set_current_system_status")
 
 def get_current_system_status(make_request: Callable) -> Dict[str, Any]:
     """
@@ -15,9 +19,10 @@ def get_current_system_status(make_request: Callable) -> Dict[str, Any]:
         APIError: If the API request fails.
     """
     try:
-        return make_request("GET", "/api/System/status/current")
+        return make_request(_GET_CURRENT_SYSTEM_STATUS.method, _GET_CURRENT_SYSTEM_STATUS.url())
     except APIError as e:
-        raise APIError(f"Failed to get current system status: {str(e)}")
+        raise APIError(f"Failed to get current system status: {str(e)}", status_code=e.status_code,
+                       response=e.response)
 
 def set_current_system_status(make_request: Callable, status: Dict[str, Any]) -> None:
     """
@@ -31,6 +36,6 @@ def set_current_system_status(make_request: Callable, status: Dict[str, Any]) ->
         APIError: If the API request fails.
     """
     try:
-        make_request("PUT", "/api/System/status/current", json=status)
+        make_request(_SET_CURRENT_SYSTEM_STATUS.method, _SET_CURRENT_SYSTEM_STATUS.url(), json=status)
     except APIError as e:
         raise APIError(f"Failed to set current system status: {str(e)}")
\ No newline at end of file
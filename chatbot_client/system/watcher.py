@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from ..bot.bot import is_stop_all_bots
+from .system import get_current_system_status
+
+class StatusSnapshot:
+    """Immutable result of one status check; a new snapshot replaces the old one as a whole."""
+
+    __slots__ = ("system_status", "stop_all_bots", "changed", "checked", "error", "failures")
+
+    def __init__(self, system_status: Optional[Dict[str, Any]] = None, stop_all_bots: Optional[bool] = None,
+                 changed: Optional[float] = None, checked: Optional[float] = None, error: Optional[str] = None,
+                 failures: int = 0):
+        self.system_status = system_status
+        self.stop_all_bots = stop_all_bots
+        self.changed = changed  # Unix time the values last changed
+        self.checked = checked  # Unix time of the last successful check
+        self.error = error  # Error of the last check, None if it succeeded
+        self.failures = failures  # Failed checks in a row
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful check, None before the first."""
+        return None if self.checked is None else time.time() - self.checked
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"systemStatus": self.system_status, "stopAllBots": self.stop_all_bots, "changed": self.changed,
+                "checked": self.checked, "error": self.error, "failures": self.failures}
+
+class SystemStatusWatcher:
+    """
+    Background poller of ``get_current_system_status`` and ``is_stop_all_bots``, shared by a whole process.
+
+    One thread checks both every ``interval`` seconds (with some jitter, so
+    workers started together do not poll in step) and publishes the result
+    as ``snapshot``. Reading ``snapshot`` takes no lock and makes no request,
+    so health checks and per-request guards cost nothing upstream however
+    many there are. Subscribers are called from the watcher thread with the
+    old and new snapshot whenever the status or the stop switch changes.
+    After a failed check the next one follows after ``retry_interval``; the
+    last good values are kept meanwhile and ``error`` and ``failures`` tell
+    how long they have been unconfirmed.
+
+    The backend has no long-poll or change notification for these
+    endpoints, so the watcher polls; ``interval`` trades upstream calls
+    against how quickly a change is seen.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        interval (float, optional): Seconds between checks. Defaults to 15.
+        retry_interval (float, optional): Seconds until the next check after a failure. Defaults to 5.
+        jitter (float, optional): Relative random variation of the interval. Defaults to 0.1.
+    """
+
+    def __init__(self, make_request: Callable, interval: float = 15.0, retry_interval: float = 5.0,
+                 jitter: float = 0.1):
+        self.make_request = make_request
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.jitter = jitter
+        self.snapshot = StatusSnapshot()
+        self._subscribers: List[Callable[[StatusSnapshot, StatusSnapshot], None]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"checks": 0, "failures": 0, "changes": 0, "subscriber_errors": 0}
+
+    def start(self) -> "SystemStatusWatcher":
+        """Start polling, if not started yet."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="system-status-watcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stopped.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.clear()
+            snapshot = self.check()
+            delay = self.interval if snapshot.error is None else min(self.interval, self.retry_interval)
+            self._wake.wait(max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter))))
+
+    def check(self) -> StatusSnapshot:
+        """Check now, publish and return the new snapshot. Failures are recorded in it, not raised."""
+        old = self.snapshot
+        self.stats["checks"] += 1
+        try:
+            system_status = get_current_system_status(self.make_request)
+            stop_all_bots = is_stop_all_bots(self.make_request)
+        except Exception as e:
+            self.stats["failures"] += 1
+            new = StatusSnapshot(old.system_status, old.stop_all_bots, old.changed, old.checked,
+                                 f"{type(e).__name__}: {e}", old.failures + 1)
+            self.snapshot = new
+            return new
+        now = time.time()
+        changed = old.checked is None or system_status != old.system_status or stop_all_bots != old.stop_all_bots
+        new = StatusSnapshot(system_status, stop_all_bots, now if changed else old.changed, now)
+        self.snapshot = new
+        if changed:
+            self.stats["changes"] += 1
+            self._notify(old, new)
+        return new
+
+    def refresh(self) -> None:
+        """Make the watcher thread check right away instead of at the next interval."""
+        self._wake.set()
+
+    def subscribe(self, callback: Callable[[StatusSnapshot, StatusSnapshot], None]) -> Callable[[], None]:
+        """
+        Call ``callback(old, new)`` whenever the status or the stop switch changes.
+
+        The callback runs in the watcher thread and must not block. Exceptions
+        it raises are counted in ``stats`` and otherwise ignored.
+
+        Returns:
+            Callable[[], None]: Removes the subscription.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _notify(self, old: StatusSnapshot, new: StatusSnapshot) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(old, new)
+            except Exception:
+                self.stats["subscriber_errors"] += 1
+
+    def is_fresh(self, max_age: Optional[float] = None) -> bool:
+        """Whether the last successful check is at most ``max_age`` seconds old (three intervals by default)."""
+        age = self.snapshot.age()
+        return age is not None and age <= (3 * self.interval if max_age is None else max_age)
@@ -0,0 +1,268 @@
+import socket
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, TYPE_CHECKING
+from .exceptions import ConfigurationError, TransportError
+
+if TYPE_CHECKING:
+    from .cancellation import CancellationToken
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+class TransportResponse:
+    """
+    Streaming response returned by a transport.
+
+    The body is not read until ``read`` or ``iter_bytes`` is called, so callers
+    can stream large bodies and must call ``close`` when they are done.
+    """
+    status_code: int
+    reason: str
+    headers: Mapping[str, str]
+    http_version: str
+
+    def iter_bytes(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Iterate over the decoded response body."""
+        raise NotImplementedError
+
+    def iter_raw(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Iterate over the body as received on the wire, still content-encoded."""
+        raise NotImplementedError
+
+    def read(self) -> bytes:
+        """Read and return the whole decoded response body."""
+        return b"".join(self.iter_bytes())
+
+    def close(self) -> None:
+        """Release the underlying connection back to the pool."""
+        raise NotImplementedError
+
+class Transport:
+    """
+    Interface for the HTTP layer underneath ``ChatbotClient``.
+
+    A transport sends one request and returns a ``TransportResponse`` whose body
+    has not been read yet. Network failures must be raised as ``TransportError``.
+    When a ``cancel`` token fires, the transport should close the connection so
+    blocked reads fail promptly; the client turns the resulting error into a
+    ``CancelledError``.
+    """
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None, content: Optional[bytes] = None,
+                timeout: Optional[float] = None, cancel: Optional["CancellationToken"] = None) -> TransportResponse:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+
+class _RequestsResponse(TransportResponse):
+    def __init__(self, response, error_classes: tuple, unregister: Optional[List[Callable[[], None]]] = None):
+        self._response = response
+        self._error_classes = error_classes
+        self._unregister = unregister or []
+        self.status_code = response.status_code
+        self.reason = response.reason or ""
+        self.headers = response.headers
+        self.http_version = "HTTP/1.1"
+
+    def iter_bytes(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_content(chunk_size)
+        except self._error_classes as e:
+            raise TransportError(str(e))
+
+    def iter_raw(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            yield from self._response.raw.stream(chunk_size, decode_content=False)
+        except self._error_classes as e:
+            raise TransportError(str(e))
+
+    def close(self) -> None:
+        for unregister in self._unregister:
+            unregister()
+        self._response.close()
+
+# Per thread hook called with every connection a request checks out of the pool
+_checkout = threading.local()
+
+def _abort_connection(conn) -> None:
+    # shutdown() wakes up a recv() blocked in another thread, close() alone does not
+    sock = getattr(conn, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+class _TrackedPoolMixin:
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        hook = getattr(_checkout, "hook", None)
+        if hook is not None:
+            hook(conn)
+        return conn
+
+_cancellable_adapter = None
+
+def _cancellable_adapter_class():
+    """
+    Adapter whose pools report checked out connections, so a cancelled request can shut its socket.
+
+    Defined on first use: requests and urllib3 take longer to import than the
+    rest of the client, and callers with another transport never need them.
+    """
+    global _cancellable_adapter
+    if _cancellable_adapter is None:
+        import urllib3
+        from requests.adapters import HTTPAdapter
+
+        class TrackedHTTPConnectionPool(_TrackedPoolMixin, urllib3.HTTPConnectionPool):
+            pass
+
+        class TrackedHTTPSConnectionPool(_TrackedPoolMixin, urllib3.HTTPSConnectionPool):
+            pass
+
+        class CancellableAdapter(HTTPAdapter):
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                self.poolmanager.pool_classes_by_scheme = {
+                    "http": TrackedHTTPConnectionPool, "https": TrackedHTTPSConnectionPool}
+
+        _cancellable_adapter = CancellableAdapter
+    return _cancellable_adapter
+
+class RequestsTransport(Transport):
+    """
+    HTTP/1.1 transport backed by a pooled ``requests.Session``.
+
+    Every concurrent request needs its own connection, so ``pool_maxsize``
+    bounds how many sockets are kept alive per host. Cancelling a request shuts
+    down its socket, also while waiting for the response headers; with a custom
+    ``session`` only the body read is interrupted.
+
+    Args:
+        pool_connections (int): Number of host pools to cache. Defaults to 10.
+        pool_maxsize (int): Maximum connections kept per host. Defaults to 10.
+        session (requests.Session, optional): Pre-configured session to use.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, session=None):
+        import requests
+        import urllib3
+        if session is None:
+            session = requests.Session()
+            adapter = _cancellable_adapter_class()(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self._error_class = requests.RequestException
+        self._unsent_error = lambda e: isinstance(e, requests.ConnectTimeout) or (
+            isinstance(e, requests.ConnectionError) and e.args
+            and isinstance(getattr(e.args[0], "reason", None), urllib3.exceptions.NewConnectionError))
+        self._body_error_classes = (requests.RequestException, urllib3.exceptions.HTTPError)
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None, content: Optional[bytes] = None,
+                timeout: Optional[float] = None, cancel: Optional["CancellationToken"] = None) -> TransportResponse:
+        unregister = []
+        if cancel is not None:
+            _checkout.hook = lambda conn: unregister.append(cancel.on_cancel(lambda: _abort_connection(conn)))
+        try:
+            response = self.session.request(method, url, headers=headers, params=params, data=content,
+                                            timeout=timeout, stream=True)
+        except self._error_class as e:
+            for func in unregister:
+                func()
+            raise TransportError(str(e), sent=not self._unsent_error(e))
+        finally:
+            _checkout.hook = None
+        if cancel is not None:
+            unregister.append(cancel.on_cancel(response.close))
+        return _RequestsResponse(response, self._body_error_classes, unregister)
+
+    def close(self) -> None:
+        self.session.close()
+
+class _HTTPXResponse(TransportResponse):
+    def __init__(self, response, error_class, unregister: Optional[Callable[[], None]] = None):
+        self._response = response
+        self._error_class = error_class
+        self._unregister = unregister
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase or ""
+        self.headers = response.headers
+        self.http_version = response.http_version
+
+    def iter_bytes(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except self._error_class as e:
+            raise TransportError(str(e))
+
+    def iter_raw(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_raw(chunk_size)
+        except self._error_class as e:
+            raise TransportError(str(e))
+
+    def close(self) -> None:
+        if self._unregister is not None:
+            self._unregister()
+        self._response.close()
+
+class HTTP2Transport(Transport):
+    """
+    HTTP/2 transport backed by ``httpx``.
+
+    Concurrent requests from any number of threads are multiplexed as streams
+    over a small number of connections per host, so bursts do not open new
+    sockets or pay extra TLS handshakes. Requires ``httpx[http2]``.
+
+    Args:
+        max_connections (int): Maximum connections per client. Defaults to 4.
+        http1 (bool): Allow falling back to HTTP/1.1 when the server does not
+            negotiate HTTP/2. Set to False to use HTTP/2 prior knowledge over
+            plain ``http://`` URLs. Defaults to True.
+        client (httpx.Client, optional): Pre-configured client to use. Its default
+            timeout is not used; requests are bounded by their own ``timeout`` only.
+
+    Cancelling a request closes its stream once the response headers have
+    arrived; before that only the timeout, capped at the token's deadline,
+    bounds the wait, since closing the shared connection would abort every
+    other stream on it.
+
+    Raises:
+        ConfigurationError: If httpx or the h2 package is not installed.
+    """
+
+    def __init__(self, max_connections: int = 4, http1: bool = True, client=None):
+        try:
+            import httpx
+            import h2  # noqa: F401
+        except ImportError:
+            raise ConfigurationError("HTTP/2 transport requires the 'httpx[http2]' package")
+        if client is None:
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            client = httpx.Client(http1=http1, http2=True, limits=limits)
+        self.client = client
+        self._error_class = httpx.HTTPError
+        self._unsent_error_class = (httpx.ConnectError, httpx.ConnectTimeout)
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None, content: Optional[bytes] = None,
+                timeout: Optional[float] = None, cancel: Optional["CancellationToken"] = None) -> TransportResponse:
+        if params:
+            # httpx sends None as an empty value, requests drops it
+            params = {k: v for k, v in params.items() if v is not None}
+        # Always passed: None means no timeout, as with RequestsTransport, not httpx's 5 second default
+        try:
+            request = self.client.build_request(method, url, headers=headers, params=params, content=content,
+                                                timeout=timeout)
+            response = self.client.send(request, stream=True)
+        except self._error_class as e:
+            raise TransportError(str(e), sent=not isinstance(e, self._unsent_error_class))
+        unregister = cancel.on_cancel(response.close) if cancel is not None else None
+        return _HTTPXResponse(response, self._error_class, unregister)
+
+    def close(self) -> None:
+        self.client.close()
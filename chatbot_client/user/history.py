@@ -0,0 +1,271 @@
+import bisect
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from ..chat.chat import get_chat
+from ..exceptions import ResourceNotFoundError
+from ..paging import iter_items
+from ..utils import to_timestamp
+from .user import get_current_user_chats
+
+_WORD = re.compile(r"\w+")
+_TITLE_FIELDS = ("displayName", "chatDisplayName", "title")
+_MESSAGE_FIELDS = ("userMessage", "assistantMessage", "content", "message")
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+def _title(chat: Dict[str, Any]) -> str:
+    for field in _TITLE_FIELDS:
+        if chat.get(field):
+            return str(chat[field])
+    return ""
+
+def _messages(details: Any) -> List[str]:
+    """Collect the message texts of a ``get_chat`` response, whatever list they are nested in."""
+    texts = []
+    if isinstance(details, dict):
+        for key, value in details.items():
+            if key in _MESSAGE_FIELDS and isinstance(value, str):
+                texts.append(value)
+            elif isinstance(value, (list, dict)):
+                texts.extend(_messages(value))
+    elif isinstance(details, list):
+        for item in details:
+            texts.extend(_messages(item))
+    return texts
+
+class _Entry:
+    __slots__ = ("chat", "title_words", "words", "updated")
+
+    def __init__(self, chat: Dict[str, Any], messages: Iterable[str]):
+        self.chat = chat
+        self.title_words = _words(_title(chat))
+        self.words = set(self.title_words)
+        for text in messages:
+            self.words |= _words(text)
+        self.updated = to_timestamp(chat.get("updatedUtc") or chat.get("createdUtc"))
+
+class ChatHistoryIndex:
+    """
+    Opt-in local index of the current user's chats for instant search and filtering.
+
+    ``sync`` lists the user's chats and, for chats that are new or changed
+    since the last sync, fetches their messages concurrently. Chat titles and
+    messages go into an inverted index; the last word of a query also matches
+    as a prefix, for search as you type. Enable it with
+    ``ChatbotClient.enable_chat_history_index()`` so favorite, rename and
+    delete calls made through the client update the index as well.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        page_size (int, optional): Chats per page while listing. Defaults to 100.
+        max_workers (int, optional): Concurrent requests during a sync. Defaults to 4.
+        index_messages (bool, optional): Fetch and index chat messages, not only titles. Defaults to True.
+    """
+
+    def __init__(self, make_request: Callable, page_size: int = 100, max_workers: int = 4,
+                 index_messages: bool = True):
+        self.make_request = make_request
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.index_messages = index_messages
+        self.synced_at: Optional[float] = None
+        self._entries: Dict[str, _Entry] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+
+    def _list_chats(self) -> List[Dict[str, Any]]:
+        return list(iter_items(
+            lambda page_number: get_current_user_chats(self.make_request, page_number=page_number,
+                                                       page_size=self.page_size),
+            max_workers=self.max_workers))
+
+    def _details(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return get_chat(self.make_request, chat_id)
+        except ResourceNotFoundError:
+            return None
+
+    def sync(self) -> int:
+        """
+        Bring the index up to date with the server.
+
+        Returns:
+            int: Number of chats added, changed or removed.
+        """
+        with self._sync_lock:
+            chats = {chat["chatId"]: chat for chat in self._list_chats()}
+            with self._lock:
+                removed = [chat_id for chat_id in self._entries if chat_id not in chats]
+                changed = [chat for chat_id, chat in chats.items()
+                           if chat_id not in self._entries or self._changed(self._entries[chat_id], chat)]
+            details = {}
+            if self.index_messages and changed:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    futures = {chat["chatId"]: pool.submit(copy_context().run, self._details, chat["chatId"])
+                               for chat in changed}
+                    details = {chat_id: future.result() for chat_id, future in futures.items()}
+            with self._lock:
+                for chat_id in removed:
+                    self._remove(chat_id)
+                for chat in changed:
+                    self._add(chat, _messages(details.get(chat["chatId"])))
+            self.synced_at = time.time()
+            return len(removed) + len(changed)
+
+    @staticmethod
+    def _changed(entry: _Entry, chat: Dict[str, Any]) -> bool:
+        updated = to_timestamp(chat.get("updatedUtc") or chat.get("createdUtc"))
+        return updated != entry.updated or chat != entry.chat
+
+    def _add(self, chat: Dict[str, Any], messages: Iterable[str]) -> None:
+        chat_id = chat["chatId"]
+        previous = self._entries.get(chat_id)
+        if previous is not None and not messages:
+            # Metadata only change: keep the messages indexed before
+            entry = _Entry(chat, ())
+            entry.words |= previous.words - previous.title_words
+        else:
+            entry = _Entry(chat, messages)
+        self._remove(chat_id)
+        self._entries[chat_id] = entry
+        for word in entry.words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                self._vocabulary_dirty = True
+            postings.add(chat_id)
+
+    def _remove(self, chat_id: str) -> None:
+        entry = self._entries.pop(chat_id, None)
+        if entry is None:
+            return
+        for word in entry.words:
+            postings = self._postings.get(word)
+            if postings is not None:
+                postings.discard(chat_id)
+                if not postings:
+                    del self._postings[word]
+                    self._vocabulary_dirty = True
+
+    def _prefixed(self, prefix: str) -> Set[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        result: Set[str] = set()
+        vocabulary = self._vocabulary
+        position = bisect.bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            result |= self._postings[vocabulary[position]]
+            position += 1
+        return result
+
+    def search(self, query: str = "", bot_id: Optional[str] = None, user_system_message_id: Optional[str] = None,
+               only_favorites: bool = False, limit: Optional[int] = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search and filter the indexed chats.
+
+        Every word of the query must appear in the chat's title or messages;
+        the last word may be incomplete. Chats whose titles match rank first,
+        then the most recently updated.
+
+        Args:
+            query (str, optional): Search words. An empty query lists every chat.
+            bot_id (str, optional): Only chats with this bot.
+            user_system_message_id (str, optional): Only chats using this user system message.
+            only_favorites (bool, optional): Only favorite chats. Defaults to False.
+            limit (int, optional): Maximum results. Defaults to 20; None returns all.
+            offset (int, optional): Results to skip, for paging. Defaults to 0.
+
+        Returns:
+            List[Dict[str, Any]]: Matching chats as listed by the API.
+        """
+        terms = _WORD.findall(query.lower())
+        with self._lock:
+            if terms:
+                candidates: Optional[Set[str]] = None
+                for position, term in enumerate(terms):
+                    if position == len(terms) - 1 and not query[-1:].isspace():
+                        matches = self._prefixed(term)
+                    else:
+                        matches = self._postings.get(term, set())
+                    candidates = set(matches) if candidates is None else candidates & matches
+                    if not candidates:
+                        return []
+                entries = [self._entries[chat_id] for chat_id in candidates]
+            else:
+                entries = list(self._entries.values())
+            if bot_id is not None:
+                entries = [entry for entry in entries if entry.chat.get("botId") == bot_id]
+            if user_system_message_id is not None:
+                entries = [entry for entry in entries
+                           if entry.chat.get("userSystemMessageId") == user_system_message_id]
+            if only_favorites:
+                entries = [entry for entry in entries if entry.chat.get("isFavorite")]
+
+            def rank(entry: _Entry):
+                title_hits = sum(1 for term in terms if any(word.startswith(term) for word in entry.title_words))
+                return -title_hits, -entry.updated
+
+            entries.sort(key=rank)
+            end = offset + limit if limit is not None else None
+            return [entry.chat for entry in entries[offset:end]]
+
+    def get(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Return the indexed chat with this ID, or None."""
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            return entry.chat if entry is not None else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Local updates, applied after the corresponding API call succeeded
+
+    def _update_chat(self, chat_id: str, **fields) -> None:
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is not None:
+                self._add({**entry.chat, **fields}, ())
+
+    def set_favorite(self, chat_id: str, is_favorite: bool) -> None:
+        self._update_chat(chat_id, isFavorite=is_favorite)
+
+    def rename(self, chat_id: str, display_name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is not None:
+                field = next((field for field in _TITLE_FIELDS if field in entry.chat), "displayName")
+                self._update_chat(chat_id, **{field: display_name})
+
+    def remove_chat(self, chat_id: str) -> None:
+        with self._lock:
+            self._remove(chat_id)
+
+    def remove_completion(self, chat_id: str) -> None:
+        # The deleted message's words cannot be told apart from the others,
+        # so the chat is reindexed from the server on the next sync
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is not None:
+                entry.updated = -1.0
+
+    def remove_chats(self, keep_favorites: bool, bot_id: Optional[str] = None,
+                     user_system_message_id: Optional[str] = None) -> None:
+        with self._lock:
+            for chat_id, entry in list(self._entries.items()):
+                chat = entry.chat
+                if keep_favorites and chat.get("isFavorite"):
+                    continue
+                if bot_id is not None and chat.get("botId") != bot_id:
+                    continue
+                if user_system_message_id is not None and chat.get("userSystemMessageId") != user_system_message_id:
+                    continue
+                self._remove(chat_id)
@@ -0,0 +1,257 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextvars import copy_context
+from typing import Any, Callable, Dict, List, Optional
+from ..admin.bulk_facts import BulkReport
+from ..chat.chat import get_chat
+from ..exceptions import APIError, ConfigurationError, ResourceNotFoundError
+from ..paging import iter_items
+from ..ratelimit import RateLimiter
+from ..retry import retry_call
+from ..scheduler import BATCH, priority_scope
+from ..utils import to_timestamp
+from .user import (get_current_user, get_current_user_chats, delete_current_user_chat_by_id,
+                   delete_current_user_chat_completion_by_id)
+
+_DAY = 24 * 60 * 60
+
+class RetentionReport(BulkReport):
+    """Counters and throughput of a retention run. ``succeeded`` counts deleted chats and completions."""
+
+    def __init__(self, dry_run: bool = False):
+        super().__init__()
+        self.dry_run = dry_run
+        self.scanned = 0
+        self.selected = 0
+        self.cutoff: Optional[float] = None
+        # [chat_id] or [chat_id, completion_id] of everything selected, filled in dry runs only
+        self.candidates: List[List[str]] = []
+        self.errors: List[Dict[str, Any]] = []
+
+    def __repr__(self) -> str:
+        return (f"RetentionReport(scanned={self.scanned}, selected={self.selected}, succeeded={self.succeeded}, "
+                f"failed={self.failed}, skipped={self.skipped}, dry_run={self.dry_run}, "
+                f"elapsed={self.elapsed:.1f}s, rate={self.rate:.1f}/s)")
+
+class _RetentionCheckpoint:
+    """
+    Selected deletions and the ones already done, so an interrupted run resumes without rescanning.
+
+    Chats are selected completely before the first delete, because deleting
+    while paging would shift later pages and skip chats. The selection only
+    holds for the options it was made with, so a checkpoint written with
+    other options is refused rather than resumed.
+    """
+
+    def __init__(self, path: Optional[str], options: Dict[str, Any]):
+        self.path = path
+        self.options = options
+        self.cutoff: Optional[float] = None
+        self.selected: Optional[List[List[str]]] = None
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                state = json.load(f)
+            if state.get("options") != options:
+                raise ConfigurationError(f"Checkpoint {path} was written with other retention options: "
+                                         f"{state.get('options')}")
+            self.cutoff = state["cutoff"]
+            self.selected = state["selected"]
+            self.done = {tuple(target) for target in state["done"]}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"options": self.options, "cutoff": self.cutoff, "selected": self.selected,
+                       "done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+def _completions(details: Any) -> List[Dict[str, Any]]:
+    """Find the completion objects (dicts with a ``completionId``) in a ``get_chat`` response."""
+    found = []
+    if isinstance(details, dict):
+        if "completionId" in details:
+            found.append(details)
+        for value in details.values():
+            if isinstance(value, (dict, list)):
+                found.extend(_completions(value))
+    elif isinstance(details, list):
+        for item in details:
+            found.extend(_completions(item))
+    return found
+
+def enforce_retention(make_request: Callable, older_than_days: Optional[float] = None,
+                      keep_favorites: Optional[bool] = None,
+                      predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                      prune_completions: bool = False, dry_run: bool = False, max_workers: int = 8,
+                      attempts: int = 3, rate: Optional[float] = None, page_size: int = 100,
+                      checkpoint_path: Optional[str] = None, checkpoint_every: int = 100,
+                      progress: Optional[Callable[[RetentionReport], None]] = None,
+                      priority: str = BATCH) -> RetentionReport:
+    """
+    Delete the current user's chats that fall outside the retention policy.
+
+    Chats are streamed page by page and selected when their ``updatedUtc``
+    (``createdUtc`` if missing) is older than the cutoff, or when
+    ``predicate`` returns True. Chats with neither date are never selected by
+    age. By default the cutoff and favorite handling come from the user's
+    ``keepChatHistoryForDays`` and ``isKeepFavoritesForever`` settings. The
+    selected chats are then deleted with at most ``max_workers`` requests in
+    flight, optionally at most ``rate`` per second, retrying transient
+    failures.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        older_than_days (float, optional): Age in days after which chats are deleted.
+            Defaults to the user's ``keepChatHistoryForDays``.
+        keep_favorites (bool, optional): Never delete favorite chats. Defaults to the
+            user's ``isKeepFavoritesForever``.
+        predicate (Callable[[Dict[str, Any]], bool], optional): Selects chats to delete.
+            Used instead of the age rule if ``older_than_days`` is not given, in addition to it otherwise.
+        prune_completions (bool, optional): Also delete completions older than the cutoff
+            from chats that are kept. Requires fetching those chats. Defaults to False.
+        dry_run (bool, optional): Only count what would be deleted. Defaults to False.
+        max_workers (int, optional): Concurrent delete calls. Defaults to 8.
+        attempts (int, optional): Attempts per delete. Defaults to 3.
+        rate (float, optional): Maximum delete calls per second.
+        page_size (int, optional): Chats per page while scanning. Defaults to 100.
+        checkpoint_path (str, optional): File used to save and resume progress.
+        checkpoint_every (int, optional): Save the checkpoint and report progress
+            after this many deletes. Defaults to 100.
+        progress (Callable[[RetentionReport], None], optional): Called with the running report.
+        priority (str, optional): Scheduler class of the requests. Defaults to ``"batch"``.
+
+    Returns:
+        RetentionReport: Scan and delete counts and throughput. Failed deletes are in
+        ``errors``; in a dry run the selection is in ``candidates``.
+
+    Raises:
+        ConfigurationError: If no age limit or predicate applies, or the checkpoint was written with
+            other options.
+    """
+    report = RetentionReport(dry_run)
+    options = {"older_than_days": older_than_days, "keep_favorites": keep_favorites,
+               "predicate": None if predicate is None else
+               f"{getattr(predicate, '__module__', '')}.{getattr(predicate, '__qualname__', repr(predicate))}",
+               "prune_completions": prune_completions}
+    checkpoint = _RetentionCheckpoint(checkpoint_path, options)
+    limiter = RateLimiter(rate, burst=max_workers) if rate else None
+
+    with priority_scope(priority):
+        if checkpoint.selected is None:
+            targets = _select(make_request, report, older_than_days, keep_favorites, predicate,
+                              prune_completions, page_size, max_workers)
+            checkpoint.cutoff = report.cutoff
+            checkpoint.selected = targets
+            if not dry_run:
+                checkpoint.save()
+        else:
+            targets = checkpoint.selected
+            report.cutoff = checkpoint.cutoff
+        report.selected = len(targets)
+        if dry_run:
+            report.candidates = targets
+            report.finished = time.monotonic()
+            if progress:
+                progress(report)
+            return report
+
+        def delete(target: List[str]) -> None:
+            if limiter is not None:
+                limiter.acquire()
+            chat_id, completion_id = target[0], target[1] if len(target) > 1 else None
+            try:
+                if completion_id is None:
+                    retry_call(lambda: delete_current_user_chat_by_id(make_request, chat_id), attempts=attempts)
+                else:
+                    retry_call(lambda: delete_current_user_chat_completion_by_id(make_request, chat_id,
+                                                                                 completion_id),
+                               attempts=attempts)
+            except APIError as e:
+                if e.status_code != 404:  # Already gone
+                    raise
+
+        in_flight = {}
+
+        def finish(futures) -> None:
+            for future in futures:
+                target = in_flight.pop(future)
+                try:
+                    future.result()
+                    report.succeeded += 1
+                    checkpoint.done.add(tuple(target))
+                except Exception as e:
+                    report.failed += 1
+                    report.errors.append({"target": target, "error": f"{type(e).__name__}: {e}"})
+                if report.processed % checkpoint_every == 0:
+                    checkpoint.save()
+                    if progress:
+                        progress(report)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for target in targets:
+                    if tuple(target) in checkpoint.done:
+                        report.skipped += 1
+                        continue
+                    in_flight[pool.submit(copy_context().run, delete, target)] = target
+                    if len(in_flight) >= 2 * max_workers:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        finish(done)
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    finish(done)
+        finally:
+            checkpoint.save()
+            report.finished = time.monotonic()
+    if progress:
+        progress(report)
+    return report
+
+def _select(make_request: Callable, report: RetentionReport, older_than_days: Optional[float],
+            keep_favorites: Optional[bool], predicate: Optional[Callable[[Dict[str, Any]], bool]],
+            prune_completions: bool, page_size: int, max_workers: int) -> List[List[str]]:
+    if (older_than_days is None and predicate is None) or keep_favorites is None:
+        settings = get_current_user(make_request) or {}
+        if keep_favorites is None:
+            keep_favorites = bool(settings.get("isKeepFavoritesForever"))
+        if older_than_days is None and predicate is None:
+            if not settings.get("keepChatHistoryForDays"):
+                raise ConfigurationError("no retention period: pass older_than_days or a predicate")
+            older_than_days = settings["keepChatHistoryForDays"]
+    cutoff = time.time() - older_than_days * _DAY if older_than_days is not None else None
+    report.cutoff = cutoff
+
+    targets: List[List[str]] = []
+    kept: List[str] = []
+    chats = iter_items(lambda page_number: get_current_user_chats(make_request, page_number=page_number,
+                                                                  page_size=page_size),
+                       max_workers=max_workers)
+    for chat in chats:
+        report.scanned += 1
+        if keep_favorites and chat.get("isFavorite"):
+            continue
+        # Chats without a known date are never expired by age
+        expired = cutoff is not None and 0 < to_timestamp(chat.get("updatedUtc") or chat.get("createdUtc")) < cutoff
+        if expired or (predicate is not None and predicate(chat)):
+            targets.append([chat["chatId"]])
+        elif cutoff is not None and prune_completions:
+            kept.append(chat["chatId"])
+
+    if kept:
+        def old_completions(chat_id: str) -> List[List[str]]:
+            try:
+                details = get_chat(make_request, chat_id)
+            except ResourceNotFoundError:
+                return []
+            return [[chat_id, completion["completionId"]] for completion in _completions(details)
+                    if 0 < to_timestamp(completion.get("createdUtc")) < cutoff]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for found in pool.map(lambda chat_id: copy_context().run(old_completions, chat_id), kept):
+                targets.extend(found)
+    return targets
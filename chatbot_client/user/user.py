@@ -1,102 +1,130 @@
-from typing import Callable, Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional, Type
 from ..exceptions import APIError, ResourceNotFoundError
+from ..endpoints import endpoint
+from ..jsonstream import iter_streamed_items, stream_page
+
+_GET_CURRENT_USER = endpoint("user.get_current_user")
+_UPDATE_CURRENT_USER = endpoint("user.update_current_user")
+_ACCEPT_TERMS = endpoint("user.accept_terms")
+_DELETE_CURRENT_USER_CHATS = endpoint("user.delete_current_user_chats")
+_DELETE_CURRENT_USER_CHAT_BY_ID = endpoint("user.delete_current_user_chat_by_id")
+_DELETE_CURRENT_USER_CHAT_COMPLETION_BY_ID = endpoint("user.delete_current_user_chat_completion_by_id")
+_DELETE_CURRENT_USER_CHATS_BY_BOT_ID = endpoint("user.delete_current_user_chats_by_bot_id")
+_DELETE_CURRENT_USER_CHATS_BY_BOT_ID_AND_SYSTEM_MESSAGE_ID = endpoint("user.delete_current_user_chats_by_bot_id_and_system_message_id")
+_GET_CURRENT_USER_CHATS_BY_BOT = endpoint("user.get_current_user_chats_by_bot")
+_GET_CURRENT_USER_CHATS_BY_BOT_AND_SYSTEMPROMPT = endpoint("user.get_current_user_chats_by_bot_and_systemprompt")
+_GET_CURRENT_USER_CHATS = endpoint("user.get_current_user_chats")
+_UPDATE_CHAT_IS_FAVORITE = endpoint("user.update_chat_is_favorite")
+_GET_USER_SYSTEM_MESSAGES = endpoint("user.get_user_system_messages")
+_CREATE_USER_SYSTEM_MESSAGE = endpoint("user.create_user_system_message")
+_GET_USER_SYSTEM_MESSAGE = endpoint("user.get_user_system_message")
+_UPDATE_USER_SYSTEM_MESSAGE = endpoint("user.update_user_system_message")
+_DELETE_USER_SYSTEM_MESSAGE = endpoint("user.delete_user_system_message")
+_GET_USER_SYSTEM_MESSAGE_COUNT = endpoint("user.get_user_system_message_count")
 
 def get_current_user(make_request: Callable) -> Dict[str, Any]:
     """Get the current user's information."""
-    return make_request("GET", "/api/users/current")
+    return make_request(_GET_CURRENT_USER.method, _GET_CURRENT_USER.url())
 
 def update_current_user(make_request: Callable, user_data: Dict[str, Any]) -> None:
     """Update the current user's information."""
-    make_request("PUT", "/api/users/current", json=user_data)
+    make_request(_UPDATE_CURRENT_USER.method, _UPDATE_CURRENT_USER.url(), json=user_data)
 
 def accept_terms(make_request: Callable) -> None:
     """Accept the terms for the current user."""
-    make_request("PUT", "/api/users/current/acceptTerms")
+    make_request(_ACCEPT_TERMS.method, _ACCEPT_TERMS.url())
 
 def delete_current_user_chats(make_request: Callable, keep_favorites: bool) -> None:
     """Delete all chats for the current user."""
-    make_request("DELETE", f"/api/users/current/chats/all/{str(keep_favorites).lower()}")
+    make_request(_DELETE_CURRENT_USER_CHATS.method, _DELETE_CURRENT_USER_CHATS.url(keep_favorites))
 
 def delete_current_user_chat_by_id(make_request: Callable, chat_id: str) -> None:
     """Delete a specific chat for the current user."""
-    make_request("DELETE", f"/api/users/current/chats/byid/{chat_id}")
+    make_request(_DELETE_CURRENT_USER_CHAT_BY_ID.method, _DELETE_CURRENT_USER_CHAT_BY_ID.url(chat_id))
 
 def delete_current_user_chat_completion_by_id(make_request: Callable, chat_id: str, completion_id: str) -> None:
     """Delete a specific chat completion for the current user."""
-    make_request("DELETE", f"/api/users/current/chats/{chat_id}/completion/{completion_id}")
+    make_request(_DELETE_CURRENT_USER_CHAT_COMPLETION_BY_ID.method,
+                 _DELETE_CURRENT_USER_CHAT_COMPLETION_BY_ID.url(chat_id, completion_id))
 
 def delete_current_user_chats_by_bot_id(make_request: Callable, bot_id: str, keep_favorites: bool) -> None:
     """Delete all chats for a specific bot for the current user."""
-    make_request("DELETE", f"/api/users/current/chats/bybot/{bot_id}/{str(keep_favorites).lower()}")
+    make_request(_DELETE_CURRENT_USER_CHATS_BY_BOT_ID.method,
+                 _DELETE_CURRENT_USER_CHATS_BY_BOT_ID.url(bot_id, keep_favorites))
 
 def delete_current_user_chats_by_bot_id_and_system_message_id(make_request: Callable, bot_id: str, system_message_id: str, keep_favorites: bool) -> None:
     """Delete all chats for a specific bot and system message for the current user."""
-    make_request("DELETE", f"/api/users/current/chats/bybot/{bot_id}/{system_message_id}/{str(keep_favorites).lower()}")
+    make_request(_DELETE_CURRENT_USER_CHATS_BY_BOT_ID_AND_SYSTEM_MESSAGE_ID.method,
+                 _DELETE_CURRENT_USER_CHATS_BY_BOT_ID_AND_SYSTEM_MESSAGE_ID.url(bot_id, system_message_id, keep_favorites))
 
 def get_current_user_chats_by_bot(make_request: Callable, bot_id: str, only_favorites: bool = False, search_for: Optional[str] = None, order_by: Optional[str] = None, page_number: int = 1, page_size: int = 20) -> Dict[str, Any]:
     """Get chats for a specific bot for the current user."""
-    params = {
-        "OnlyFavorites": only_favorites,
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", f"/api/users/current/chats/{bot_id}", params=params)
+    route = _GET_CURRENT_USER_CHATS_BY_BOT
+    return make_request(route.method, route.url(bot_id, only_favorites=only_favorites, search_for=search_for,
+                                                order_by=order_by, page_number=page_number, page_size=page_size))
 
 def get_current_user_chats_by_bot_and_systemprompt(make_request: Callable, bot_id: str, user_systemprompt_id: str, only_favorites: bool = False, search_for: Optional[str] = None, order_by: Optional[str] = None, page_number: int = 1, page_size: int = 20) -> Dict[str, Any]:
     """Get chats for a specific bot and system prompt for the current user."""
-    params = {
-        "OnlyFavorites": only_favorites,
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", f"/api/users/current/chats/{bot_id}/{user_systemprompt_id}", params=params)
+    route = _GET_CURRENT_USER_CHATS_BY_BOT_AND_SYSTEMPROMPT
+    return make_request(route.method, route.url(bot_id, user_systemprompt_id, only_favorites=only_favorites,
+                                                search_for=search_for, order_by=order_by,
+                                                page_number=page_number, page_size=page_size))
 
 def get_current_user_chats(make_request: Callable, only_favorites: bool = False, search_for: Optional[str] = None, order_by: Optional[str] = None, page_number: int = 1, page_size: int = 20) -> Dict[str, Any]:
     """Get all chats for the current user."""
-    params = {
-        "OnlyFavorites": only_favorites,
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", "/api/users/current/chats", params=params)
+    route = _GET_CURRENT_USER_CHATS
+    return make_request(route.method, route.url(only_favorites=only_favorites, search_for=search_for,
+                                                order_by=order_by, page_number=page_number, page_size=page_size))
+
+def iter_current_user_chats(make_request: Callable, only_favorites: bool = False, search_for: Optional[str] = None,
+                            order_by: Optional[str] = None, page_size: int = 1000,
+                            item_type: Optional[Type] = None) -> Iterator[Any]:
+    """
+    Iterate over all chats of the current user, each yielded as soon as it is read from the response.
+
+    Pages are parsed incrementally (see ``jsonstream.StreamedPage``), so large
+    ``page_size`` values neither delay the first chat nor hold a whole page in memory.
+
+    Args:
+        make_request (Callable): Function to make API requests; must support ``stream=True``.
+        item_type (type, optional): Pydantic model each chat is validated into.
+
+    Yields:
+        Any: Chats in page order.
+    """
+    route = _GET_CURRENT_USER_CHATS
+    return iter_streamed_items(lambda page_number: stream_page(
+        make_request, route.method, route.url(only_favorites=only_favorites, search_for=search_for,
+                                              order_by=order_by, page_number=page_number, page_size=page_size),
+        item_type=item_type))
 
 def update_chat_is_favorite(make_request: Callable, chat_id: str, is_favorite: bool) -> None:
     """Update whether a chat is marked as favorite for the current user."""
-    make_request("PUT", f"/api/users/current/chats/{chat_id}/isfavorite", json={"isFavorite": is_favorite})
+    make_request(_UPDATE_CHAT_IS_FAVORITE.method, _UPDATE_CHAT_IS_FAVORITE.url(chat_id), json={"isFavorite": is_favorite})
 
 def get_user_system_messages(make_request: Callable, search_for: Optional[str] = None, order_by: Optional[str] = None, page_number: int = 1, page_size: int = 20) -> Dict[str, Any]:
     """Get system messages for the current user."""
-    params = {
-        "SearchFor": search_for,
-        "OrderBy": order_by,
-        "PageNumber": page_number,
-        "PageSize": page_size
-    }
-    return make_request("GET", "/api/users/current/userSystemMessage", params=params)
+    route = _GET_USER_SYSTEM_MESSAGES
+    return make_request(route.method, route.url(search_for=search_for, order_by=order_by,
+                                                page_number=page_number, page_size=page_size))
 
 def create_user_system_message(make_request: Callable, message_data: Dict[str, Any]) -> str:
     """Create a new system message for the current user."""
-    response = make_request("POST", "/api/users/current/userSystemMessage", json=message_data)
+    response = make_request(_CREATE_USER_SYSTEM_MESSAGE.method, _CREATE_USER_SYSTEM_MESSAGE.url(), json=message_data)
     return response
 
 def get_user_system_message(make_request: Callable, message_id: str) -> Dict[str, Any]:
     """Get a specific system message for the current user."""
-    return make_request("GET", f"/api/users/current/userSystemMessage/{message_id}")
+    return make_request(_GET_USER_SYSTEM_MESSAGE.method, _GET_USER_SYSTEM_MESSAGE.url(message_id))
 
 def update_user_system_message(make_request: Callable, message_id: str, message_data: Dict[str, Any]) -> None:
     """Update a specific system message for the current user."""
-    make_request("PUT", f"/api/users/current/userSystemMessage/{message_id}", json=message_data)
+    make_request(_UPDATE_USER_SYSTEM_MESSAGE.method, _UPDATE_USER_SYSTEM_MESSAGE.url(message_id), json=message_data)
 
 def delete_user_system_message(make_request: Callable, message_id: str) -> None:
     """Delete a specific system message for the current user."""
-    make_request("DELETE", f"/api/users/current/userSystemMessage/{message_id}")
+    make_request(_DELETE_USER_SYSTEM_MESSAGE.method, _DELETE_USER_SYSTEM_MESSAGE.url(message_id))
 
 def get_user_system_message_count(make_request: Callable) -> Dict[str, int]:
     """Get the count of system messages for the current user."""
-    return make_request("GET", "/api/users/current/userSystemMessageCount")
\ No newline at end of file
+    return make_request(_GET_USER_SYSTEM_MESSAGE_COUNT.method, _GET_USER_SYSTEM_MESSAGE_COUNT.url())
\ No newline at end of file
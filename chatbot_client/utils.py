@@ -1,14 +1,25 @@
 import json
 from typing import Any, Dict, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from .exceptions import ConfigurationError
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 def json_serial(obj: Any) -> str:
     """JSON serializer for objects not serializable by default json code"""
     if isinstance(obj, (datetime, date)):
         return obj.isoformat()
     raise TypeError(f"Type {type(obj)} not serializable")
 
+def json_loads(data: bytes) -> Any:
+    """Parse a JSON response body, with orjson when it is installed (several times faster on large bodies)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def to_camel_case(snake_str: str) -> str:
     """Convert snake_case string to camelCase"""
     components = snake_str.split('_')
@@ -64,6 +75,19 @@ def parse_datetime(dt_string: str) -> datetime:
     except ValueError:
         raise ValueError(f"Invalid datetime format: {dt_string}")
 
+def to_timestamp(value: Any) -> float:
+    """Convert an API datetime (string or datetime, UTC if no offset is given) to a POSIX timestamp, 0 if unknown"""
+    if isinstance(value, str):
+        try:
+            value = parse_datetime(value)
+        except ValueError:
+            return 0.0
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return 0.0
+
 def generate_user_agent() -> str:
     """Generate a user agent string for the client"""
     from . import __version__  # Assuming you have a __version__ in your __init__.py
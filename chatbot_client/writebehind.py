@@ -0,0 +1,312 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .chat.chat import bot_feedback
+from .exceptions import ConfigurationError
+from .retry import is_retryable
+from .scheduler import BATCH, priority_scope
+from .statistic.statistic import update_statistic
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: journals are not locked
+    fcntl = None
+
+def _feedback_key(chat_id: str, feedback_data: Dict[str, Any]) -> Optional[str]:
+    # A later vote on the same answer replaces the earlier one. BotFeedbackRequest has no completion ID;
+    # an answer is identified by its chat and the time its message was created
+    created = feedback_data.get("messageCreatedUtc")
+    return f"bot_feedback:{feedback_data.get('chatId') or chat_id}:{created}" if created else None
+
+# name -> (call, coalescing key or None, delay in seconds before the first attempt)
+_OPERATIONS: Dict[str, Tuple[Callable, Callable[..., Optional[str]], Optional[float]]] = {
+    "bot_feedback": (bot_feedback, _feedback_key, 0.0),
+    # update_statistic recomputes everything, so calls within the window collapse into one
+    "update_statistic": (update_statistic, lambda: "update_statistic", None),
+}
+
+class _Entry:
+    __slots__ = ("id", "name", "args", "key", "due", "attempts")
+
+    def __init__(self, entry_id: str, name: str, args: List[Any], key: Optional[str], due: float, attempts: int = 0):
+        self.id = entry_id
+        self.name = name
+        self.args = args
+        self.key = key
+        self.due = due
+        self.attempts = attempts
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"op": "add", "id": self.id, "name": self.name, "args": self.args, "key": self.key,
+                "due": self.due, "attempts": self.attempts}
+
+def default_journal_path(deployment: str) -> str:
+    """Journal of one deployment (see ``ChatbotClient.deployment``), so clients of other backends never share it."""
+    return os.path.join(tempfile.gettempdir(), f"chatbot_client_writebehind-{deployment}.jsonl")
+
+class WriteBehindQueue:
+    """
+    Background queue for side calls whose result nobody waits for: ``bot_feedback`` and ``update_statistic``.
+
+    ``submit`` appends the call to a journal file and returns at once; a
+    worker thread makes the call later, in the ``"batch"`` scheduler class.
+    Calls are coalesced while queued: all ``update_statistic`` calls within
+    ``coalesce_window`` seconds become one, and newer feedback on the same
+    answer (same ``chatId`` and ``messageCreatedUtc``) replaces older
+    feedback. Throttling, server and network errors are retried with
+    exponential backoff up to ``max_attempts``; other errors and exhausted
+    calls are dropped and kept in ``failed``.
+
+    The journal is replayed on start, so calls queued before a crash or
+    restart are still made. Each process takes the first journal that no
+    other process has locked (``path``, ``path.1``, ...), so several workers
+    can share one ``path`` and a restarted worker picks up what a stopped one
+    left behind. ``close`` makes every queued call before returning, within
+    its timeout.
+
+    Args:
+        make_request (Callable): Function to make API requests.
+        path (str): Journal file. ``ChatbotClient.enable_write_behind`` defaults it to
+            ``default_journal_path(client.deployment)``.
+        coalesce_window (float, optional): Seconds ``update_statistic`` calls are collected. Defaults to 5.
+        max_attempts (int, optional): Attempts per call. Defaults to 8.
+        backoff (float, optional): Base retry delay in seconds. Defaults to 1.
+        max_backoff (float, optional): Longest retry delay in seconds. Defaults to 300.
+        fsync (bool, optional): Sync the journal to disk on every write, to survive power loss
+            and not only process crashes. Defaults to False.
+    """
+
+    def __init__(self, make_request: Callable, path: Optional[str] = None, coalesce_window: float = 5.0,
+                 max_attempts: int = 8, backoff: float = 1.0, max_backoff: float = 300.0, fsync: bool = False):
+        self.make_request = make_request
+        self.coalesce_window = coalesce_window
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.fsync = fsync
+        self.failed: List[Dict[str, Any]] = []
+        self.stats = {"submitted": 0, "coalesced": 0, "sent": 0, "retried": 0, "failed": 0}
+        self._entries: Dict[str, _Entry] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Condition()
+        self._busy = 0
+        self._closing = False
+        # Calls that failed once more while closing, kept for the next start
+        self._deferred = set()
+        self._journal_lines = 0
+        if not path:
+            raise ConfigurationError("a journal path is required, e.g. default_journal_path(client.deployment)")
+        self.path = self._open_journal(path)
+        self._replay()
+        self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._worker.start()
+
+    # Journal
+
+    def _open_journal(self, base: str) -> str:
+        # The lock is taken on a separate file, since compaction replaces the journal
+        for suffix in range(64):
+            path = base if suffix == 0 else f"{base}.{suffix}"
+            lock = open(f"{path}.lock", "a")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock.close()
+                    continue
+            self._lock_file = lock
+            self._journal = open(path, "a+", encoding="utf-8")
+            return path
+        raise ConfigurationError(f"no unlocked write-behind journal next to {base}")
+
+    def _replay(self) -> None:
+        self._journal.seek(0)
+        for line in self._journal:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line torn by a crash
+            if record.get("op") == "add":
+                entry = _Entry(record["id"], record["name"], record["args"], record.get("key"), record["due"],
+                               record.get("attempts", 0))
+                self._remove(entry.key and self._by_key.get(entry.key))
+                self._entries[entry.id] = entry
+                if entry.key:
+                    self._by_key[entry.key] = entry.id
+            elif record.get("op") == "done":
+                self._remove(record["id"])
+        self._compact()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        # Called with the lock held
+        self._journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._journal_lines += 1
+        if self._journal_lines > 1000 and self._journal_lines > 4 * len(self._entries):
+            self._compact()
+
+    def _compact(self) -> None:
+        # Rewrite the journal with only the pending calls; the old one stays intact until the swap
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry.to_json(), separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp_path, self.path)
+        self._journal = open(self.path, "a+", encoding="utf-8")
+        self._journal_lines = len(self._entries)
+
+    def _remove(self, entry_id: Optional[str]) -> Optional[_Entry]:
+        entry = self._entries.pop(entry_id, None) if entry_id else None
+        if entry is not None and entry.key and self._by_key.get(entry.key) == entry_id:
+            del self._by_key[entry.key]
+        return entry
+
+    # Producers
+
+    def submit(self, name: str, *args: Any) -> None:
+        """
+        Queue a call and return without waiting for it.
+
+        Args:
+            name (str): ``"bot_feedback"`` or ``"update_statistic"``.
+            *args: Arguments after ``make_request``, JSON serializable.
+
+        Raises:
+            ConfigurationError: If the operation is unknown or the queue is closed.
+        """
+        if name not in _OPERATIONS:
+            raise ConfigurationError(f"Unknown write-behind operation: {name}")
+        _, key_of, delay = _OPERATIONS[name]
+        key = key_of(*args)
+        now = time.time()
+        with self._lock:
+            if self._closing:
+                raise ConfigurationError("write-behind queue is closed")
+            self.stats["submitted"] += 1
+            existing = self._entries.get(self._by_key.get(key)) if key else None
+            if existing is not None and existing.attempts == 0 and list(args) == existing.args:
+                self.stats["coalesced"] += 1
+                return
+            due = now + (self.coalesce_window if delay is None else delay)
+            if existing is not None:
+                self.stats["coalesced"] += 1
+                self._remove(existing.id)
+                self._append({"op": "done", "id": existing.id})
+                due = min(due, existing.due) if existing.attempts == 0 else due
+            entry = _Entry(uuid.uuid4().hex, name, list(args), key, due)
+            self._entries[entry.id] = entry
+            if key:
+                self._by_key[key] = entry.id
+            self._append(entry.to_json())
+            self._lock.notify_all()
+
+    def bot_feedback(self, chat_id: str, feedback_data: Dict[str, Any]) -> None:
+        self.submit("bot_feedback", chat_id, feedback_data)
+
+    def update_statistic(self) -> None:
+        self.submit("update_statistic")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # Worker
+
+    def _run(self) -> None:
+        with priority_scope(BATCH):
+            while True:
+                with self._lock:
+                    while True:
+                        now = time.time()
+                        due = [entry for entry in self._entries.values()
+                               if (self._closing and entry.id not in self._deferred) or entry.due <= now]
+                        if due:
+                            break
+                        if self._closing:
+                            return
+                        next_due = min((entry.due for entry in self._entries.values()), default=None)
+                        self._lock.wait(None if next_due is None else max(0.0, next_due - now))
+                    due.sort(key=lambda entry: entry.due)
+                    self._busy += 1
+                try:
+                    for entry in due:
+                        self._send(entry)
+                finally:
+                    with self._lock:
+                        self._busy -= 1
+                        self._lock.notify_all()
+
+    def _send(self, entry: _Entry) -> None:
+        call = _OPERATIONS[entry.name][0]
+        try:
+            call(self.make_request, *entry.args)
+            error = None
+        except Exception as e:
+            error = e
+        with self._lock:
+            if self._entries.get(entry.id) is not entry:
+                return  # Replaced by a newer call meanwhile
+            entry.attempts += 1
+            if error is None:
+                self.stats["sent"] += 1
+            elif is_retryable(error) and entry.attempts < self.max_attempts and not self._closing:
+                self.stats["retried"] += 1
+                entry.due = time.time() + random.uniform(0, min(self.max_backoff,
+                                                                self.backoff * 2 ** (entry.attempts - 1)))
+                self._append(entry.to_json())
+                return
+            elif self._closing and is_retryable(error):
+                self._deferred.add(entry.id)  # Left in the journal for the next start
+                return
+            else:
+                self.stats["failed"] += 1
+                self.failed.append({"name": entry.name, "args": entry.args,
+                                    "error": f"{type(error).__name__}: {error}"})
+                del self.failed[:-100]
+            self._remove(entry.id)
+            self._append({"op": "done", "id": entry.id})
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Make every queued call now, not when it is due, and wait for them.
+
+        Calls that keep failing with retryable errors stay queued.
+
+        Returns:
+            bool: True if the queue is empty afterwards.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            now = time.time()
+            for entry in self._entries.values():
+                entry.due = min(entry.due, now)
+            self._lock.notify_all()
+            while self._entries and any(entry.due <= time.time() for entry in self._entries.values()) \
+                    or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._lock.wait(remaining if remaining is not None else 0.1)
+            return not self._entries
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Make the queued calls, leaving those that still fail in the journal for the next start."""
+        with self._lock:
+            self._closing = True
+            self._lock.notify_all()
+        self._worker.join(timeout)
+        with self._lock:
+            if not self._journal.closed:
+                self._compact()
+                self._journal.close()
+                self._lock_file.close()
@@ -1,14 +1,41 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+import asyncio
 import json
+import os
+import threading
+import time
 
+from chatbot_client.auth import ClientCredentials
+from chatbot_client.bot.images import ImageCache, validate_sizes
+from chatbot_client.cancellation import CancellationToken
 from chatbot_client.client import ChatbotClient
-from chatbot_client.exceptions import ChatbotClientError, ResourceNotFoundError
+from chatbot_client.exceptions import CancelledError, ChatbotClientError, DeadlineExceededError, ResourceNotFoundError
+from chatbot_client.limiter import AdaptiveLimiter
+from chatbot_client.ratelimit import RateLimiter
+from chatbot_client.recording import RecordingTransport, ReplayTransport
+from chatbot_client.scheduler import Scheduler
+from chatbot_client.store import MemoryStore, SQLiteStore, default_state_path
+from chatbot_client.transport import HTTP2Transport, RequestsTransport
 
-app = FastAPI()
+try:
+    import orjson
+except ImportError:  # Optional: responses fall back to the json module
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed."""
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -20,9 +47,101 @@ app.add_middleware(
 )
 
 # Initialize the ChatbotClient
-API_KEY = "your-api-key"  # Replace with your actual API key
-client = ChatbotClient("https://chatbot-dev.example.com", api_key=API_KEY)
-print("ChatbotClient initialized")
+BASE_URL = os.environ.get("CHATBOT_BASE_URL", "https://chatbot-dev.example.com")
+API_KEY = os.environ.get("CHATBOT_API_KEY", "your-api-key")  # Replace with your actual API key
+# OAuth / Azure AD: with CHATBOT_TOKEN_URL, CHATBOT_CLIENT_ID, CHATBOT_CLIENT_SECRET and CHATBOT_TOKEN_SCOPE
+# set, upstream calls use cached bearer tokens that are refreshed in the background instead of API_KEY
+TOKEN_URL = os.environ.get("CHATBOT_TOKEN_URL")
+# Workers started by main() share rate-limit buckets, cached catalog responses and
+# token counters through CHATBOT_STATE_PATH (by default a database named after BASE_URL and the
+# credential, so other deployments on the host keep their own); a single process keeps them in memory.
+STATE_PATH = os.environ.get("CHATBOT_STATE_PATH")
+WORKERS = int(os.environ.get("CHATBOT_WORKERS", "1"))
+RATE_LIMIT = os.environ.get("CHATBOT_RATE_LIMIT")  # upstream requests per second, for all workers together
+CACHE_TTL = os.environ.get("CHATBOT_CACHE_TTL")  # seconds to cache bot catalog responses
+# Upstream requests in flight per worker; requests from this server are interactive,
+# so they overtake queued batch jobs that share the client
+MAX_CONCURRENCY = int(os.environ.get("CHATBOT_MAX_CONCURRENCY", "16"))
+# "gradient" or "aimd": tune the requests in flight per endpoint class below MAX_CONCURRENCY
+# from upstream latency and 429/5xx responses
+ADAPTIVE_LIMIT = os.environ.get("CHATBOT_ADAPTIVE_LIMIT")
+# Chats kept ready per bot so a new conversation skips the create round trip; 0 disables the pool
+CHAT_POOL_DEPTH = int(os.environ.get("CHATBOT_CHAT_POOL_DEPTH", "0"))
+
+# Built by setup() when the server starts, not at import: thumbnail workers are spawned processes
+# that re-import the main module, and must not open the store, journal or watcher a second time
+store = None
+client: Optional[ChatbotClient] = None
+status_watcher = None
+catalog = None
+images: Optional[ImageCache] = None
+
+def setup():
+    global store, client, status_watcher, catalog, images
+    credentials = ClientCredentials(TOKEN_URL, os.environ.get("CHATBOT_CLIENT_ID"),
+                                    os.environ.get("CHATBOT_CLIENT_SECRET"),
+                                    scope=os.environ.get("CHATBOT_TOKEN_SCOPE")) if TOKEN_URL else None
+    state_path = STATE_PATH
+    if not state_path and WORKERS > 1:
+        state_path = default_state_path(BASE_URL, credentials.identity() if credentials is not None else API_KEY)
+    store = SQLiteStore(state_path) if state_path else MemoryStore()
+    # Set CHATBOT_HTTP2=1 to multiplex concurrent upstream calls over a few HTTP/2 connections
+    transport = HTTP2Transport() if os.environ.get("CHATBOT_HTTP2") == "1" else RequestsTransport()
+    # Offline performance testing: CHATBOT_RECORD=path records upstream traffic (with one worker),
+    # CHATBOT_REPLAY=path answers from such a recording, at CHATBOT_REPLAY_SCALE times the recorded latency
+    if os.environ.get("CHATBOT_REPLAY"):
+        transport = ReplayTransport(os.environ["CHATBOT_REPLAY"],
+                                    latency_scale=float(os.environ.get("CHATBOT_REPLAY_SCALE", "1")), loop=True)
+    elif os.environ.get("CHATBOT_RECORD"):
+        transport = RecordingTransport(transport, os.environ["CHATBOT_RECORD"])
+    client = ChatbotClient(BASE_URL, api_key=API_KEY,
+                           credentials=credentials,
+                           transport=transport,
+                           store=store,
+                           rate_limiter=RateLimiter(float(RATE_LIMIT), store=store) if RATE_LIMIT else None,
+                           cache_ttl=float(CACHE_TTL) if CACHE_TTL else None,
+                           scheduler=Scheduler(MAX_CONCURRENCY),
+                           limiter=AdaptiveLimiter(initial=min(8, MAX_CONCURRENCY), max_limit=MAX_CONCURRENCY,
+                                                   algorithm=ADAPTIVE_LIMIT) if ADAPTIVE_LIMIT else None)
+    if CHAT_POOL_DEPTH > 0:
+        client.enable_chat_pool(max_depth=CHAT_POOL_DEPTH)
+    # Chat transcripts are cached so a revisit only sends the completions the browser does not have yet;
+    # transcripts synced within CHATBOT_TRANSCRIPT_MAX_AGE seconds are served without asking upstream
+    client.enable_transcript_cache(max_age=float(os.environ.get("CHATBOT_TRANSCRIPT_MAX_AGE", "0")))
+    # Feedback and statistics updates are journaled to this file and sent in the background
+    client.enable_write_behind(path=os.environ.get("CHATBOT_WRITE_BEHIND_PATH"))
+    # Upstream system status and the stop-all-bots switch are checked once per worker in the background;
+    # /health answers from the last check and never calls upstream itself
+    status_watcher = client.enable_status_watcher(interval=float(os.environ.get("CHATBOT_STATUS_INTERVAL", "15")))
+    status_watcher.subscribe(lambda old, new: print(f"Upstream status changed: stopAllBots={new.stop_all_bots}, "
+                                                    f"status={new.system_status}"))
+    # Bot picker searches are answered from a local index, refreshed in the background
+    catalog = client.bot_catalog()
+    # Bot avatars: memory LRU, then disk, then upstream; thumbnails are made in worker processes
+    images = ImageCache(client.get_bot_image, directory=os.environ.get("CHATBOT_IMAGE_DIR"),
+                        sizes=validate_sizes(os.environ.get("CHATBOT_IMAGE_SIZES", "32,64,128,256").split(",")))
+    print("ChatbotClient initialized")
+
+@app.on_event("startup")
+async def start_client():
+    setup()
+
+@app.on_event("shutdown")
+async def close_client():
+    # Deletes the chats created ahead of time that nobody used and sends queued feedback
+    if client.chat_pool is not None:
+        await run_in_threadpool(client.chat_pool.close)
+    await run_in_threadpool(client.write_behind.close)
+    await run_in_threadpool(status_watcher.stop)
+    images.close()
+
+# Optional upper bound in seconds for one chat completion, retries and rate-limit waits included
+COMPLETION_DEADLINE = os.environ.get("CHATBOT_COMPLETION_DEADLINE")
+# How often a pending completion checks whether the browser is still connected
+DISCONNECT_POLL_INTERVAL = 0.5
+
+def completion_token() -> CancellationToken:
+    return CancellationToken(timeout=float(COMPLETION_DEADLINE) if COMPLETION_DEADLINE else None)
 
 class ChatCreateByBotCodeRequest(BaseModel):
     bot_id: str
@@ -32,6 +151,8 @@ class ChatCompletionRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     chat_id: str
+    # ChatCreateResponse fields (botDisplayName, botDisplayMessage, sample questions) for rendering the chat at once
+    bot: Optional[dict] = None
 
 class MessageResponse(BaseModel):
     assistant_message: str
@@ -45,35 +166,284 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None)):
 async def create_chat_by_bot_code(request: ChatCreateByBotCodeRequest):
     print(f"Creating chat with bot ID: {request.bot_id}")
     try:
-        chat = client.create_chat(request.bot_id)
+        chat = await run_in_threadpool(client.create_chat, request.bot_id)
         print(f"Created chat: {json.dumps(chat, indent=2)}")
-        return ChatResponse(chat_id=chat['chatId'])
+        return ChatResponse(chat_id=chat['chatId'], bot={k: v for k, v in chat.items() if k != 'chatId'})
     except ChatbotClientError as e:
         print(f"Error creating chat: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/chats/{chat_id}/transcript")
+async def get_transcript(chat_id: str, cursor: Optional[str] = None):
+    # Pass the cursor of the previous answer to receive only the completions added, changed or removed since
+    try:
+        return await run_in_threadpool(client.get_chat_delta, chat_id, cursor)
+    except ResourceNotFoundError:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    except ChatbotClientError as e:
+        print(f"Error loading transcript: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/chats/{chat_id}/feedback", status_code=202)
+async def submit_feedback(chat_id: str, feedback: dict):
+    # Queued and journaled; the answer does not wait for the upstream call
+    try:
+        client.bot_feedback(chat_id, feedback)
+    except ChatbotClientError as e:
+        print(f"Error queueing feedback: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"queued": True}
+
+async def run_until_disconnected(http_request: Request, func, *args, **kwargs):
+    """Run a blocking client call in the threadpool and cancel it if the browser goes away."""
+    cancel = completion_token()
+    call = asyncio.ensure_future(run_in_threadpool(func, *args, cancel=cancel, **kwargs))
+    try:
+        while True:
+            done, _ = await asyncio.wait({call}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return call.result()
+            if await http_request.is_disconnected():
+                print("Client disconnected, cancelling upstream request")
+                cancel.cancel("client disconnected")
+                return await call
+    finally:
+        # Also reached when this handler itself is cancelled, e.g. on shutdown
+        cancel.cancel("request finished")
+
 @app.post("/api/chats/{chat_id}/completions", response_model=MessageResponse)
-async def chat_completion(chat_id: str, request: ChatCompletionRequest):
+async def chat_completion(chat_id: str, request: ChatCompletionRequest, http_request: Request,
+                          idempotency_key: Optional[str] = Header(None)):
     print(f"Sending message to chat ID: {chat_id}")
     print(f"Message content: {request.message}")
     try:
-        response = client.chat_completion(chat_id, request.message)
-        print(f"Received full response: {json.dumps(response, indent=2)}")
+        # Retries with the same Idempotency-Key share one upstream generation
+        response = await run_until_disconnected(http_request, client.chat_completion, chat_id, request.message,
+                                                idempotency_key=idempotency_key)
         assistant_message = response['assistantMessage']
-        print(f"Extracted assistant message: {assistant_message}")
-        return MessageResponse(assistant_message=assistant_message)
+        print(f"Received assistant message ({len(assistant_message)} characters, "
+              f"{response.get('totalTokens', '?')} tokens): {assistant_message}")
+        # Relayed as is: only the field the UI uses, serialized once, without building a MessageResponse
+        return FastJSONResponse({"assistant_message": assistant_message})
     except ResourceNotFoundError:
         print(f"Chat not found: {chat_id}")
         raise HTTPException(status_code=404, detail="Chat not found")
+    except DeadlineExceededError as e:
+        print(f"Chat completion timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except CancelledError as e:
+        print(f"Chat completion cancelled: {str(e)}")
+        raise HTTPException(status_code=499, detail=str(e))
     except ChatbotClientError as e:
         print(f"Error in chat completion: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Answer pieces buffered per socket before the upstream read is paused for a slow client
+WS_QUEUE_SIZE = 64
+
+async def stream_answer(websocket: WebSocket, chat_id: str, message: str, cancel: CancellationToken):
+    """Stream one completion to the socket, reading upstream in a worker thread."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+    closed = threading.Event()
+
+    def put(item):
+        # Blocks this worker thread while the queue is full, which stops reading upstream
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                return future.result(timeout=0.25)
+            except TimeoutError:
+                if closed.is_set():
+                    future.cancel()
+                    return
+
+    def produce():
+        # Cancelling the token shuts the upstream connection, so this returns promptly
+        stream = client.stream_chat_completion(chat_id, message, cancel=cancel)
+        try:
+            for text in stream:
+                put(("delta", text))
+            result = ("done", None)
+        except ResourceNotFoundError:
+            result = ("error", "Chat not found")
+        except DeadlineExceededError as e:
+            result = ("error", str(e))
+        except CancelledError:
+            result = ("cancelled", None)
+        except ChatbotClientError as e:
+            print(f"Error in streamed chat completion: {str(e)}")
+            result = ("error", str(e))
+        except Exception as e:
+            # Anything else must still end the answer, or the socket waits for it forever
+            print(f"Unexpected error in streamed chat completion: {e!r}")
+            result = ("error", "Internal error")
+        finally:
+            stream.close()
+        put(result)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        await websocket.send_json({"type": "start"})
+        item = await queue.get()
+        while item[0] == "delta":
+            # Coalesce whatever piled up while the client was slow into one frame
+            texts, item = [item[1]], None
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item[0] != "delta":
+                    break
+                texts.append(item[1])
+                item = None
+            await websocket.send_json({"type": "delta", "text": "".join(texts)})
+            if item is None:
+                item = await queue.get()
+        kind, detail = item
+        await websocket.send_json({"type": kind, "detail": detail} if detail else {"type": kind})
+    finally:
+        closed.set()
+        cancel.cancel("answer finished")
+        await producer
+
+@app.websocket("/ws/chats/{chat_id}")
+async def chat_socket(websocket: WebSocket, chat_id: str):
+    """
+    Persistent chat session.
+
+    Client messages: ``{"type": "message", "message": "..."}`` and ``{"type": "cancel"}``.
+    Server messages: ``start``, ``delta`` (with ``text``), then one of ``done``,
+    ``cancelled`` or ``error`` (with ``detail``).
+    """
+    await websocket.accept()
+    answer: Optional[asyncio.Task] = None
+    cancel: Optional[CancellationToken] = None
+    try:
+        while True:
+            request = await websocket.receive_json()
+            if request.get("type") == "cancel":
+                if cancel is not None:
+                    cancel.cancel("stopped by user")
+            elif request.get("type") == "message" and request.get("message"):
+                if answer is not None and not answer.done():
+                    await websocket.send_json({"type": "error", "detail": "An answer is already in progress"})
+                    continue
+                cancel = completion_token()
+                answer = asyncio.create_task(stream_answer(websocket, chat_id, request["message"], cancel))
+    except WebSocketDisconnect:
+        print(f"WebSocket closed for chat ID: {chat_id}")
+    finally:
+        if cancel is not None:
+            cancel.cancel("client disconnected")
+        if answer is not None and not answer.done():
+            answer.cancel()
+
+CATALOG_REFRESH = float(os.environ.get("CHATBOT_CATALOG_REFRESH", "60"))  # seconds between incremental refreshes
+catalog_refresh: Optional[asyncio.Task] = None
+
+async def refresh_catalog():
+    try:
+        changed = await run_in_threadpool(catalog.refresh)
+        print(f"Bot catalog refreshed: {changed} bots changed, {len(catalog)} total")
+    except ChatbotClientError as e:
+        print(f"Error refreshing bot catalog: {str(e)}")
+
+@app.get("/api/bots/catalog")
+async def search_bot_catalog(q: str = "", start_bot_id: Optional[str] = None, is_start_bot: Optional[bool] = None,
+                             limit: int = 20, offset: int = 0):
+    global catalog_refresh
+    if catalog.synced_at is None:
+        # The first request waits for the initial sync, later ones never block on upstream
+        if catalog_refresh is None or catalog_refresh.done():
+            catalog_refresh = asyncio.create_task(refresh_catalog())
+        await asyncio.shield(catalog_refresh)
+        if catalog.synced_at is None:
+            raise HTTPException(status_code=502, detail="Bot catalog is not available")
+    elif time.time() - catalog.synced_at > CATALOG_REFRESH and (catalog_refresh is None or catalog_refresh.done()):
+        catalog_refresh = asyncio.create_task(refresh_catalog())
+    items = catalog.search(q, start_bot_id=start_bot_id, is_start_bot=is_start_bot, limit=limit, offset=offset)
+    return {"items": items, "syncedAt": catalog.synced_at}
+
+class MultiBotSearchRequest(BaseModel):
+    bot_ids: List[str]
+    query: str
+    limit: Optional[int] = None
+
+# Seconds an "ask all knowledge bots" search waits for the slowest bot before answering with what it has
+SEARCH_DEADLINE = float(os.environ.get("CHATBOT_SEARCH_DEADLINE", "10"))
+
+@app.post("/api/bots/search")
+async def search_bots(request: MultiBotSearchRequest):
+    try:
+        return await run_in_threadpool(client.search_bots, request.bot_ids, request.query,
+                                       deadline=SEARCH_DEADLINE, limit=request.limit)
+    except ChatbotClientError as e:
+        print(f"Error searching bots: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+IMAGE_MAX_AGE = int(os.environ.get("CHATBOT_IMAGE_MAX_AGE", "3600"))
+
+@app.get("/api/bots/{bot_id}/image")
+async def bot_image(bot_id: str, size: Optional[int] = None, if_none_match: Optional[str] = Header(None)):
+    image = images.peek(bot_id, size)
+    if image is None:
+        try:
+            image = await run_in_threadpool(images.get, bot_id, size)
+        except ResourceNotFoundError:
+            raise HTTPException(status_code=404, detail="Bot not found")
+        except ChatbotClientError as e:
+            print(f"Error fetching bot image: {str(e)}")
+            raise HTTPException(status_code=502, detail=str(e))
+    if image.size == images.round_size(size):
+        cache_control = f"public, max-age={IMAGE_MAX_AGE}"
+    else:
+        # The original stands in until the thumbnail is ready, so have the browser check back
+        cache_control = "no-cache"
+    # Bot images are upstream content served from the UI's origin: an SVG may carry script, so the browser
+    # must neither sniff nor run anything in them, even when one is opened directly
+    headers = {"ETag": image.etag, "Cache-Control": cache_control, "X-Content-Type-Options": "nosniff",
+               "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; sandbox"}
+    if if_none_match and (if_none_match.strip() == "*" or image.etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    return Response(image.data, media_type=image.content_type, headers=headers)
+
+@app.get("/api/usage")
+async def token_usage():
+    return client.token_usage.snapshot()
+
+@app.get("/health")
+async def health():
+    # 503 until the first check succeeds and when upstream has not answered for three intervals
+    snapshot = status_watcher.snapshot
+    if not status_watcher.is_fresh():
+        status = "unknown" if snapshot.checked is None else "unreachable"
+    else:
+        status = "stopped" if snapshot.stop_all_bots else "ok"
+    return FastJSONResponse({"status": status, **snapshot.to_json()},
+                            status_code=503 if status in ("unknown", "unreachable") else 200)
+
+@app.get("/api/scheduler")
+async def scheduler_stats():
+    return client.scheduler.stats()
+
+@app.get("/api/limiter")
+async def limiter_stats():
+    return client.limiter.snapshot() if client.limiter is not None else {}
+
 @app.get("/")
 async def root():
     return FileResponse("index.html")
 
+def main():
+    """Run the server with CHATBOT_WORKERS processes (default 1) sharing one state store."""
+    import uvicorn
+    host = os.environ.get("CHATBOT_HOST", "0.0.0.0")
+    port = int(os.environ.get("CHATBOT_PORT", "8000"))
+    if WORKERS > 1:
+        # Each worker process re-imports this module and opens the same state database in setup()
+        uvicorn.run("server:app", host=host, port=port, workers=WORKERS)
+    else:
+        uvicorn.run(app, host=host, port=port)
+
 if __name__ == "__main__":
     print("Starting server...")
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chatbot_client.auth import ClientCredentials, LocalTokenServer
+from chatbot_client.client import ChatbotClient
+from chatbot_client.exceptions import APIError, AuthenticationError
+from chatbot_client.transport import Transport, TransportResponse
+
+class StubResponse(TransportResponse):
+    def __init__(self, status_code: int, body: bytes = b"{}"):
+        self.status_code = status_code
+        self.reason = "OK" if status_code < 400 else "Unauthorized"
+        self.headers = {"Content-Type": "application/json"}
+        self.http_version = "HTTP/1.1"
+        self._body = body
+
+    def iter_bytes(self, chunk_size=None):
+        yield self._body
+
+    def iter_raw(self, chunk_size=None):
+        yield self._body
+
+    def close(self) -> None:
+        pass
+
+class Upstream(Transport):
+    """Accepts a bearer token only while the token server considers it valid."""
+
+    def __init__(self, tokens: LocalTokenServer, always_reject: bool = False):
+        self.tokens = tokens
+        self.always_reject = always_reject
+        self.seen = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, params=None, content=None, timeout=None, cancel=None):
+        token = (headers or {}).get("Authorization", "").removeprefix("Bearer ")
+        with self._lock:
+            self.seen.append(token)
+        if self.always_reject or not self.tokens.is_valid(token):
+            return StubResponse(401, b'{"error": "invalid_token"}')
+        return StubResponse(200, b'{"ok": true}')
+
+@pytest.fixture
+def tokens():
+    with LocalTokenServer(delay=0.2) as server:
+        yield server
+
+def credentials_for(tokens: LocalTokenServer, **kwargs) -> ClientCredentials:
+    return ClientCredentials(tokens.url, tokens.client_id, tokens.client_secret, **kwargs)
+
+def test_concurrent_first_calls_share_one_fetch(tokens):
+    credentials = credentials_for(tokens)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        issued = list(pool.map(lambda _: credentials.token(), range(16)))
+    assert tokens.requests == 1
+    assert len(set(issued)) == 1 and tokens.is_valid(issued[0])
+    assert credentials.stats["fetched"] == 1
+    credentials.close()
+
+def test_failed_fetch_is_shared_and_raised(tokens):
+    credentials = ClientCredentials(tokens.url, tokens.client_id, "wrong-secret")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(credentials.token) for _ in range(8)]
+    for future in futures:
+        with pytest.raises(AuthenticationError):
+            future.result()
+    assert tokens.requests == 1
+    credentials.close()
+
+def test_refreshes_in_background_before_expiry():
+    with LocalTokenServer(expires_in=2.0) as tokens:
+        # Refresh is due after half the lifetime: one second in
+        credentials = credentials_for(tokens, expiry_skew=0.0)
+        first = credentials.token()
+        time.sleep(1.2)
+        started = time.monotonic()
+        assert credentials.token() == first
+        assert time.monotonic() - started < 0.1
+        deadline = time.monotonic() + 5
+        while credentials.token() == first and time.monotonic() < deadline:
+            time.sleep(0.02)
+        second = credentials.token()
+        assert second != first and tokens.is_valid(second)
+        assert tokens.requests == 2
+        assert credentials.stats["background"] == 1
+        credentials.close()
+
+def test_rejected_token_is_refreshed_and_retried_once(tokens):
+    credentials = credentials_for(tokens)
+    upstream = Upstream(tokens)
+    client = ChatbotClient("https://chatbot.test", transport=upstream, credentials=credentials)
+    assert client._make_request("GET", "/api/test") == {"ok": True}
+    tokens.revoke()
+    assert client._make_request("GET", "/api/test") == {"ok": True}
+    assert len(upstream.seen) == 3
+    assert upstream.seen[1] == upstream.seen[0] != upstream.seen[2]
+    assert tokens.requests == 2
+    assert credentials.stats["forced"] == 1
+    client.close()
+
+def test_concurrent_rejections_share_one_refresh(tokens):
+    credentials = credentials_for(tokens)
+    client = ChatbotClient("https://chatbot.test", transport=Upstream(tokens), credentials=credentials)
+    credentials.token()
+    tokens.revoke()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: client._make_request("GET", "/api/test"), range(8)))
+    assert results == [{"ok": True}] * 8
+    assert tokens.requests == 2
+    client.close()
+
+def test_second_rejection_is_not_retried(tokens):
+    credentials = credentials_for(tokens)
+    upstream = Upstream(tokens, always_reject=True)
+    client = ChatbotClient("https://chatbot.test", transport=upstream, credentials=credentials)
+    with pytest.raises(APIError) as error:
+        client._make_request("GET", "/api/test")
+    assert error.value.status_code == 401
+    assert len(upstream.seen) == 2
+    assert tokens.requests == 2
+    client.close()